@@ -0,0 +1,216 @@
+"""
+Admission Control and Load Shedding for Turn Processing
+Each upstream stage (STT, LLM, TTS) gets a concurrency limit and a bounded
+wait queue. Waiters are served round-robin across sessions, so one chatty
+client cannot starve the others. When a queue is full or a wait times out,
+the turn fails fast with Overloaded, which app.py turns into 429/503 with
+Retry-After. A stage with no limit configured is a no-op.
+
+Environment:
+    STT_CONCURRENCY, LLM_CONCURRENCY, TTS_CONCURRENCY
+                                 In-flight calls per stage (default 0 = unlimited)
+    ADMISSION_QUEUE_SIZE         Waiters per stage before shedding (default 32)
+    ADMISSION_PER_SESSION_QUEUE  Waiters one session may hold per stage (default 2)
+    ADMISSION_MAX_WAIT_SECONDS   Longest a call waits for a slot (default 10)
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional
+
+from structured_logging import session_id_var
+
+
+STAGES = ("stt", "llm", "tts")
+
+
+class Overloaded(Exception):
+    """A stage shed this call; status is 429 (session over its share) or 503"""
+
+    def __init__(self, stage: str, status: int, retry_after: int, reason: str):
+        super().__init__(f"{stage} stage overloaded: {reason}")
+        self.stage = stage
+        self.status = status
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ("event", "granted")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.granted = False
+
+
+class StageLimiter:
+    """Concurrency limit with a fair, bounded wait queue"""
+
+    def __init__(self, name: str, limit: int, queue_size: int, per_session: int, max_wait: float):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.per_session = per_session
+        self.max_wait = max_wait
+
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.queued = 0
+        self.queues = OrderedDict()  # session id -> deque of waiters
+        self.service_time = 1.0      # EWMA of seconds per call
+        self.rejected = 0
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained"""
+        return max(1, math.ceil((self.queued + 1) * self.service_time / self.limit))
+
+    def _reject(self, status: int, reason: str) -> Overloaded:
+        self.rejected += 1
+        return Overloaded(self.name, status, self.retry_after(), reason)
+
+    def saturated(self) -> bool:
+        """True when a new call would be shed immediately"""
+        return self.queued >= self.queue_size
+
+    def acquire(self, session_id: Optional[str]):
+        """
+        Take a slot, waiting in this session's queue if needed
+
+        Raises:
+            Overloaded: Queue full, session over its share, or wait timed out
+        """
+        with self.lock:
+            if self.in_flight < self.limit and not self.queued:
+                self.in_flight += 1
+                return
+
+            if self.queued >= self.queue_size:
+                raise self._reject(503, "queue full")
+
+            session_queue = self.queues.setdefault(session_id, deque())
+            if len(session_queue) >= self.per_session:
+                raise self._reject(429, "too many requests from this session")
+
+            waiter = _Waiter()
+            session_queue.append(waiter)
+            self.queued += 1
+
+        if waiter.event.wait(self.max_wait):
+            return
+
+        with self.lock:
+            # Granted between the timeout and taking the lock
+            if waiter.granted:
+                return
+
+            session_queue = self.queues[session_id]
+            session_queue.remove(waiter)
+            if not session_queue:
+                del self.queues[session_id]
+            self.queued -= 1
+
+            raise self._reject(503, "timed out waiting for a slot")
+
+    def release(self, elapsed: float):
+        """Hand the slot to the next session in round-robin order"""
+        with self.lock:
+            self.service_time = 0.8 * self.service_time + 0.2 * elapsed
+
+            if not self.queued:
+                self.in_flight -= 1
+                return
+
+            session_id, session_queue = next(iter(self.queues.items()))
+            waiter = session_queue.popleft()
+            self.queued -= 1
+
+            if session_queue:
+                self.queues.move_to_end(session_id)
+            else:
+                del self.queues[session_id]
+
+            waiter.granted = True
+            waiter.event.set()
+
+    def stats(self) -> Dict:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "waiting_sessions": len(self.queues),
+            "rejected": self.rejected,
+            "avg_service_seconds": round(self.service_time, 3),
+        }
+
+
+class AdmissionController:
+    """Per-stage limiters for one worker process"""
+
+    def __init__(self, limits: Dict[str, int], queue_size: int = 32,
+                 per_session: int = 2, max_wait: float = 10.0):
+        """
+        Args:
+            limits: Stage name -> max in-flight calls (0 = unlimited)
+            queue_size: Waiters per stage before shedding
+            per_session: Waiters one session may hold per stage
+            max_wait: Seconds a call waits for a slot
+        """
+        self.stages = {
+            name: StageLimiter(name, limit, queue_size, per_session, max_wait)
+            for name, limit in limits.items() if limit > 0
+        }
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        return cls(
+            limits={name: int(os.getenv(f"{name.upper()}_CONCURRENCY", "0")) for name in STAGES},
+            queue_size=int(os.getenv("ADMISSION_QUEUE_SIZE", "32")),
+            per_session=int(os.getenv("ADMISSION_PER_SESSION_QUEUE", "2")),
+            max_wait=float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "10"))
+        )
+
+    def admit(self, stages: Iterable[str]):
+        """
+        Shed a turn up front if any stage it needs is already saturated
+
+        Raises:
+            Overloaded: A needed stage's queue is full
+        """
+        for name in stages:
+            limiter = self.stages.get(name)
+            if limiter and limiter.saturated():
+                with limiter.lock:
+                    raise limiter._reject(503, "queue full")
+
+    @contextmanager
+    def stage(self, name: str):
+        """Hold a slot of a stage for the duration of an upstream call"""
+        limiter = self.stages.get(name)
+        if limiter is None:
+            yield
+            return
+
+        limiter.acquire(session_id_var.get())
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            limiter.release(time.monotonic() - started)
+
+    def stats(self) -> Dict:
+        return {name: limiter.stats() for name, limiter in self.stages.items()}
+
+
+class AdmittedGenerator:
+    """Wraps a response generator so every Gemini call runs in the llm stage"""
+
+    def __init__(self, generator, admission: AdmissionController):
+        self.generator = generator
+        self.admission = admission
+
+    def generate_response(self, context: str, task: str, user_input: str) -> str:
+        with self.admission.stage("llm"):
+            return self.generator.generate_response(context, task, user_input)
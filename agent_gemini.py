@@ -4,12 +4,23 @@ COMPLETE WORKING VERSION - Production Ready
 """
 
 import json
+import logging
+import os
 import re
-import google.generativeai as genai
+from bisect import bisect_left, bisect_right
+from itertools import product
 from typing import Dict, List, Optional, Tuple
 from enum import Enum
 from datetime import datetime
 
+from eligibility_compiler import PreparedProfile, compile_eligibility, prepare_profile
+from intent_classifier import AFFIRMATION, APPLY_REQUEST, NEGATION, OFF_TOPIC, PROFILE_CORRECTION, SCHEME_QUESTION
+from scheme_search import SchemeSearchIndex
+from tracing import current_span, span
+
+
+logger = logging.getLogger(__name__)
+
 
 class AgentState(Enum):
     """Conversation states"""
@@ -22,6 +33,71 @@ class AgentState(Enum):
     PROVIDING_APPLICATION_DETAILS = "providing_application_details"
 
 
+# Keyword tables used by the extractors (first matching entry wins)
+STATE_KEYWORDS = {
+    "Telangana": ['telangana', 'తెలంగాణ', 'తెలంగాణా'],
+    "Andhra Pradesh": ['andhra', 'ఆంధ్ర', 'ఆంధ్రప్రదేశ్', 'ఆంధ్రప్రదేశ'],
+}
+
+OCCUPATION_KEYWORDS = {
+    "student": ['విద్యార్థి', 'student', 'చదువు', 'స్కూల్', 'కాలేజీ', 'college', 'school'],
+    "farmer": ['రైతు', 'rythu', 'farmer', 'agriculture', 'వ్యవసాయం', 'వ్యవసాయ'],
+    "weaver": ['చేనేత', 'weaver', 'handloom', 'చేనేత కార్మికుడు'],
+    "labor": ['కూలీ', 'labor', 'worker', 'labour', 'కార్మికుడు'],
+    "business": ['వ్యాపారి', 'business', 'trader', 'వ్యాపారం'],
+}
+
+GENDER_KEYWORDS = {
+    "male": ['అబ్బాయి', 'boy', 'male', 'పురుషుడు'],
+    "female": ['అమ్మాయి', 'girl', 'female', 'మహిళ', 'స్త్రీ'],
+}
+
+# "The second one" refers to the presented schemes by position
+ORDINAL_KEYWORDS = {
+    0: ['మొదటి', 'ఒకటో', 'first', '1st'],
+    1: ['రెండో', 'రెండవ', 'second', '2nd'],
+    2: ['మూడో', 'మూడవ', 'third', '3rd'],
+}
+
+# Keyword fallbacks for follow-up turns when the intent classifier has no opinion
+APPLY_KEYWORDS = ['దరఖాస్తు', 'apply', 'ఎలా', 'how', 'process', 'చేయాలి']
+AFFIRMATION_KEYWORDS = ['yes', 'avunu', 'అవును', 'విస్తరంగా', 'vivaranga']
+
+# Units that mark a number as an age or an income
+AGE_UNITS = ['years', 'సంవత్సరాల', 'ఏళ్ళు', 'year', 'సంవత్సరం', 'ఏళ్ల']
+INCOME_UNITS = ['rupees', 'రూపాయల', 'income', 'ఆదాయం']
+
+# Replies for routine turns the intent classifier answers without Gemini
+NEGATION_RESPONSE = "సరే. ఇంకా ఏ పథకం గురించైనా తెలుసుకోవాలంటే అడగండి."
+OFF_TOPIC_RESPONSE = "నేను ప్రభుత్వ పథకాల గురించి మాత్రమే సహాయం చేయగలను. ఏ పథకం గురించి తెలుసుకోవాలనుకుంటున్నారు?"
+PROFILE_CORRECTION_PROMPT = "ఏ వివరం మార్చాలి? ఉదాహరణకు \"నా వయసు 40 సంవత్సరాలు\" లేదా \"నేను వ్యాపారిని\" అని చెప్పండి."
+
+# BM25 thresholds for answering free-form questions from local search
+SEARCH_MIN_SCORE = 1.0
+SEARCH_CONFIDENT_SCORE = 4.0
+SEARCH_DOMINANCE = 1.5
+
+GENERATION_ERROR_RESPONSE = "క్షమించండి, సమస్య వచ్చింది. మళ్లీ ప్రయత్నించండి."
+
+GREETING_RESPONSE = "నమస్కారం! మీకు అనుకూలమైన ప్రభుత్వ పథకాలను కనుగొనడంలో నేను సహాయం చేస్తాను. మీ వయస్సు ఎంత?"
+AGE_QUESTION = "మీ వయస్సు ఎంత?"
+STATE_QUESTION = "మీరు ఏ రాష్ట్రానికి చెందినవారు? తెలంగాణ లేదా ఆంధ్రప్రదేశ్?"
+OCCUPATION_QUESTION = "మీ వృత్తి ఏమిటి? రైతు, చేనేత, కూలీ, వ్యాపారి, విద్యార్థి?"
+
+# Responses that never vary; their audio is served from a precached manifest
+FIXED_PROMPTS = (
+    GREETING_RESPONSE, AGE_QUESTION, STATE_QUESTION, OCCUPATION_QUESTION,
+    NEGATION_RESPONSE, OFF_TOPIC_RESPONSE, PROFILE_CORRECTION_PROMPT, GENERATION_ERROR_RESPONSE,
+)
+
+EXPLANATION_TASK = """Explain this scheme naturally in Telugu:
+- Start with scheme name
+- Explain what it provides in 2 simple sentences
+- Mention the main benefit with numbers
+- End by asking "దరఖాస్తు ఎలా చేయాలో తెలుసుకోవాలా?"
+Maximum 4 sentences."""
+
+
 class ConversationContext:
     """Manages conversation state and collected information"""
     
@@ -62,7 +138,7 @@ class ConversationContext:
             self.profile[key] = value
             
             if old_value and old_value != value:
-                print(f"INFO: {key} updated from {old_value} to {value}")
+                logger.info("Profile field updated", extra={"field": key, "old": old_value, "new": value})
     
     def has_basic_info(self) -> bool:
         """Check if we have minimum required info"""
@@ -98,36 +174,245 @@ class ConversationContext:
         return False
 
 
+class EligibilityTable:
+    """
+    Precomputed eligible-scheme lists over the discrete profile space
+    
+    Every field the matcher reads is low-cardinality once bucketed: state,
+    occupation and gender take the extractor's values, age and income are
+    bucketed at the catalog's rule thresholds. Identical result lists are
+    stored once and shared between keys.
+    """
+    
+    MAX_KEYS = int(os.getenv("ELIGIBILITY_TABLE_MAX_KEYS", "200000"))
+    
+    def __init__(self, database: "SchemeDatabase"):
+        rules = [database.eligibility_rules(index) for index in range(len(database.schemes))]
+        
+        age_bounds = set()
+        incomes = set()
+        for eligibility in rules:
+            if eligibility.get("age_min") is not None:
+                age_bounds.add(eligibility["age_min"])
+            if eligibility.get("age_max") is not None:
+                age_bounds.add(eligibility["age_max"] + 1)
+            if eligibility.get("income_max"):
+                incomes.add(eligibility["income_max"])
+        
+        self._set_buckets(sorted(age_bounds), sorted(incomes))
+        
+        # One representative value per bucket; None stands for "not provided"
+        age_values = {None: None}
+        for age in range(1, 121):
+            age_values.setdefault(bisect_right(self.age_bounds, age), age)
+        
+        income_values = {None: None}
+        for bucket, threshold in enumerate(self.income_thresholds):
+            income_values[bucket] = threshold
+        income_values[len(self.income_thresholds)] = (self.income_thresholds[-1] + 1) if self.income_thresholds else 1
+        
+        self.age_buckets = list(age_values)
+        self.income_buckets = list(income_values)
+        
+        self.size = (len(self.state_values) * len(self.occupation_values) * len(self.gender_values)
+                     * len(self.age_buckets) * len(self.income_buckets))
+        self.table = {}
+        if self.size > self.MAX_KEYS:
+            logger.warning("Eligibility table skipped: %d keys exceeds limit %d", self.size, self.MAX_KEYS)
+            return
+        
+        shared = {}
+        for state, occupation, gender, age_bucket, income_bucket in product(
+                self.state_values, self.occupation_values, self.gender_values, age_values, income_values):
+            profile = {
+                "state": state,
+                "occupation": occupation,
+                "gender": gender,
+                "age": age_values[age_bucket],
+                "income": income_values[income_bucket],
+            }
+            
+            result = tuple(
+                (index, score, tuple(reasons))
+                for index, score, reasons in database.score_prepared(prepare_profile(profile))
+            )
+            self.table[(state, occupation, gender, age_bucket, income_bucket)] = shared.setdefault(result, result)
+        
+        self.distinct_results = len(shared)
+    
+    def _set_buckets(self, age_bounds: List[int], income_thresholds: List[int]):
+        """Rule thresholds and extractor vocabularies the keys are built from"""
+        self.age_bounds = age_bounds
+        self.income_thresholds = income_thresholds
+        
+        self.state_values = [None, *STATE_KEYWORDS]
+        self.occupation_values = [None, *OCCUPATION_KEYWORDS]
+        self.gender_values = [None, *GENDER_KEYWORDS]
+        self.states = set(self.state_values)
+        self.occupations = set(self.occupation_values)
+        self.genders = set(self.gender_values)
+    
+    def key(self, profile: Dict) -> Optional[Tuple]:
+        """Bucketed key for a profile, or None if it falls outside the table"""
+        state = profile.get("state")
+        occupation = profile.get("occupation")
+        gender = profile.get("gender")
+        if state not in self.states or occupation not in self.occupations or gender not in self.genders:
+            return None
+        
+        age = profile.get("age")
+        if not age:
+            age_bucket = None
+        elif isinstance(age, int) and 1 <= age <= 120:
+            age_bucket = bisect_right(self.age_bounds, age)
+        else:
+            return None
+        
+        income = profile.get("income")
+        if not income:
+            income_bucket = None
+        elif isinstance(income, int):
+            income_bucket = bisect_left(self.income_thresholds, income)
+        else:
+            return None
+        
+        return (state, occupation, gender, age_bucket, income_bucket)
+    
+    def lookup(self, profile: Dict) -> Optional[Tuple]:
+        """Sorted (index, score, reasons) results, or None if not covered"""
+        if not self.table:
+            return None
+        
+        key = self.key(profile)
+        if key is None:
+            return None
+        return self.table.get(key)
+
+
 class SchemeDatabase:
     """Manages government schemes database"""
     
-    def __init__(self, schemes_path: str):
-        with open(schemes_path, 'r', encoding='utf-8') as f:
-            self.data = json.load(f)
+    def __init__(self, schemes_path: str, shared_catalog_path: Optional[str] = None):
+        self.schemes_path = schemes_path
+        self.shared_catalog_path = shared_catalog_path
+        self.version = 0
+        self.cpu_pool = None
+        self.load()
+    
+    def load(self):
+        """(Re)load the catalog and rebuild every derived index"""
+        shared_catalog_path = self.shared_catalog_path
+        self.catalog = None
+        
+        if shared_catalog_path:
+            # Attach to the catalog the gunicorn master built (zero-copy)
+            from shared_catalog import SharedCatalog
+            
+            self.catalog = SharedCatalog(shared_catalog_path)
+            self.data = self.catalog.metadata
+            self.schemes = self.catalog.schemes
+            logger.info("Attached to shared catalog with %d schemes", len(self.schemes))
+        else:
+            with open(self.schemes_path, 'r', encoding='utf-8') as f:
+                self.data = json.load(f)
+            
+            self.schemes = self.data["schemes"]
+            logger.info("Loaded %d schemes from database", len(self.schemes))
         
-        self.schemes = self.data["schemes"]
-        print(f"Loaded {len(self.schemes)} schemes from database")
+        self.version += 1
+        self._compiled_rules = None
+        
+        if self.catalog is not None:
+            # The master built both indexes into the shared file
+            self.table = self.catalog.table or EligibilityTable(self)
+            self.search_index = self.catalog.search_index
+        else:
+            self.table = EligibilityTable(self)
+            self.search_index = SchemeSearchIndex(self.schemes, self.data.get("categories"))
+    
+    def reload(self):
+        """Reload the catalog from disk (rebuilds the lookup table and search index)"""
+        self.load()
+    
+    def search(self, query: str, limit: int = 3) -> List[Tuple[Dict, float]]:
+        """Rank schemes for a free-form question with local BM25"""
+        return [(self.schemes[index], score) for index, score in self.search_index.search(query, limit)]
+    
+    def rule_domains(self) -> Dict[str, List]:
+        """Values the extractors produce per matching field (None = not provided)"""
+        return {
+            "state": [None, *STATE_KEYWORDS],
+            "occupation": [None, *OCCUPATION_KEYWORDS],
+            "gender": [None, *GENDER_KEYWORDS],
+        }
+    
+    @property
+    def compiled_rules(self) -> List:
+        """
+        Every scheme's eligibility dict compiled into a specialized rule function
+        
+        Compiled on first use: with a shared catalog, the table answers most
+        lookups and a worker may never need them.
+        """
+        rules = self._compiled_rules
+        if rules is None:
+            domains = self.rule_domains()
+            rules = self._compiled_rules = [
+                compile_eligibility(self.eligibility_rules(index), domains)
+                for index in range(len(self.schemes))
+            ]
+        return rules
+    
+    def eligibility_rules(self, index: int) -> Dict:
+        """Eligibility rules of the scheme at index"""
+        if self.catalog:
+            return self.catalog.eligibility(index)
+        return self.schemes[index]["eligibility"]
     
     def find_eligible_schemes(self, profile: Dict) -> List[Dict]:
-        """Find schemes user is eligible for"""
-        eligible = []
+        """
+        Find schemes user is eligible for
+        
+        The precomputed table answers every profile the extractors produce.
+        When it cannot (table over MAX_KEYS, or an off-vocabulary value), the
+        whole catalog is scanned.
+        """
+        results = self.table.lookup(profile)
+        
+        if results is None:
+            results = self.score_all(profile)
+        
+        return [{
+            "scheme": self.schemes[index],
+            "eligibility_score": score,
+            "match_reasons": list(reasons)
+        } for index, score, reasons in results]
+    
+    def score_all(self, profile: Dict) -> List[Tuple[int, int, List[str]]]:
+        """Score the whole catalog: eligible (index, score, reasons), best first"""
+        prepared = prepare_profile(profile)
+        
+        # Large catalogs are scanned in a worker process so the GIL stays free
+        if self.cpu_pool is not None and self.cpu_pool.offloads_scan(len(self.schemes)):
+            return self.cpu_pool.score(self, prepared)
+        
+        return self.score_prepared(prepared)
+    
+    def score_prepared(self, prepared: PreparedProfile) -> List[Tuple[int, int, List[str]]]:
+        """score_all for a profile already passed through prepare_profile"""
+        results = []
         
-        for scheme in self.schemes:
-            score, reasons = self._calculate_eligibility(scheme, profile)
+        for index, rule in enumerate(self.compiled_rules):
+            score, reasons = rule(*prepared)
             
             if score >= 75:
-                eligible.append({
-                    "scheme": scheme,
-                    "eligibility_score": score,
-                    "match_reasons": reasons
-                })
-        
-        eligible.sort(key=lambda x: x["eligibility_score"], reverse=True)
-        return eligible
-    
-    def _calculate_eligibility(self, scheme: Dict, profile: Dict) -> Tuple[int, List[str]]:
-        """Calculate eligibility score - STRICT matching"""
-        eligibility = scheme["eligibility"]
+                results.append((index, score, reasons))
+        
+        results.sort(key=lambda x: x[1], reverse=True)
+        return results
+    
+    def _calculate_eligibility(self, eligibility: Dict, profile: Dict) -> Tuple[int, List[str]]:
+        """Calculate eligibility score - STRICT matching (reference for the compiled rules)"""
         score = 0
         max_score = 0
         reasons = []
@@ -203,9 +488,13 @@ class ResponseGenerator:
     """Generates natural Telugu responses using Gemini"""
     
     def __init__(self, api_key: str):
+        # Imported here so importing this module stays cheap at cold start
+        import google.generativeai as genai
+        
         genai.configure(api_key=api_key)
+        self.model_name = "gemini-2.0-flash-exp"
         self.model = genai.GenerativeModel(
-            model_name="gemini-2.0-flash-exp",
+            model_name=self.model_name,
             generation_config={
                 "temperature": 0.6,
                 "top_p": 0.9,
@@ -239,7 +528,8 @@ CRITICAL RULES:
 Generate response (Telugu only, max 4 sentences):"""
 
         try:
-            response = self.model.generate_content(prompt)
+            with span("gemini.generate", {"llm.model": self.model_name, "llm.prompt_chars": len(prompt)}):
+                response = self.model.generate_content(prompt)
             text = response.text.strip()
             
             # Clean up
@@ -254,17 +544,25 @@ Generate response (Telugu only, max 4 sentences):"""
             return text
             
         except Exception as e:
-            print(f"Gemini error: {e}")
-            return "క్షమించండి, సమస్య వచ్చింది. మళ్లీ ప్రయత్నించండి."
+            logger.error("Gemini error: %s", e)
+            return GENERATION_ERROR_RESPONSE
 
 
 class TeluguSchemeAgent:
     """Main agent orchestrator"""
     
-    def __init__(self, api_key: str, schemes_path: str):
+    def __init__(self, api_key: str, schemes_path: str, precomputed=None,
+                 database: Optional[SchemeDatabase] = None, generator=None, prefetcher=None, intents=None):
         self.context = ConversationContext()
-        self.database = SchemeDatabase(schemes_path)
-        self.generator = ResponseGenerator(api_key)
+        self.database = database or SchemeDatabase(schemes_path)
+        self.generator = generator or ResponseGenerator(api_key)
+        self.precomputed = precomputed
+        self.prefetcher = prefetcher
+        self.prefetch = None
+        self.intents = intents
+        self.intent = None
+        self.profile_changed = False
+        self.llm_calls = 0
         self.state = AgentState.GREETING
         
         self.info_extractors = {
@@ -276,16 +574,30 @@ class TeluguSchemeAgent:
         }
     
     def process_input(self, user_input: str) -> Tuple[str, Dict]:
-        """Main processing method"""
-        
-        # Add to history
-        self.context.add_turn("user", user_input)
+        """
+        Main processing method
         
-        # Extract information FIRST
-        self._extract_all_info(user_input)
+        If the turn raises (e.g. admission sheds its Gemini call), the
+        conversation is rolled back to where it was, so a retry of the same
+        input starts from the same state.
+        """
+        checkpoint = self._checkpoint()
         
-        # Determine next action based on state
-        response = self._process_state(user_input)
+        try:
+            # Add to history
+            self.context.add_turn("user", user_input)
+            
+            # Extract information FIRST
+            profile_before = dict(self.context.profile)
+            self._extract_all_info(user_input)
+            self.profile_changed = self.context.profile != profile_before
+            self.intent = None
+            
+            # Determine next action based on state
+            response = self._process_state(user_input)
+        except Exception:
+            self._rollback(checkpoint)
+            raise
         
         # Add response to history
         self.context.add_turn("assistant", response)
@@ -295,13 +607,46 @@ class TeluguSchemeAgent:
             "state": self.state.value,
             "profile": self.context.profile,
             "has_basic_info": self.context.has_basic_info(),
-            "has_sufficient_info": self.context.has_sufficient_info()
+            "has_sufficient_info": self.context.has_sufficient_info(),
+            "intent": self.intent.label if self.intent else None,
+            "llm_calls": self.llm_calls
         }
         
         return response, metadata
     
+    def _checkpoint(self) -> Tuple:
+        """Everything a turn may change before its response is recorded"""
+        context = self.context
+        return (
+            self.state, self.llm_calls, self.prefetch, dict(context.profile),
+            len(context.conversation_history), set(context.asked_questions),
+            context.confirmed_schemes, context.current_scheme_focus
+        )
+    
+    def _rollback(self, checkpoint: Tuple):
+        """Undo a turn that failed part way"""
+        (self.state, self.llm_calls, prefetch, profile, history_length,
+         asked_questions, confirmed_schemes, current_scheme_focus) = checkpoint
+        
+        # Work scheduled for the abandoned turn; the one it replaced was already cancelled
+        if self.prefetch is not prefetch:
+            self.cancel_prefetch()
+        
+        context = self.context
+        context.profile = profile
+        del context.conversation_history[history_length:]
+        context.asked_questions = asked_questions
+        context.confirmed_schemes = confirmed_schemes
+        context.current_scheme_focus = current_scheme_focus
+    
     def _process_state(self, user_input: str) -> str:
         """Process based on current state"""
+        state = self.state.value
+        with span(f"agent.{state}", {"agent.state": state}):
+            return self._dispatch_state(user_input)
+    
+    def _dispatch_state(self, user_input: str) -> str:
+        """Run the handler for the current state"""
         
         if self.state == AgentState.GREETING:
             return self._handle_greeting()
@@ -330,7 +675,7 @@ class TeluguSchemeAgent:
     def _handle_greeting(self) -> str:
         """Handle initial greeting"""
         self.state = AgentState.COLLECTING_BASIC_INFO
-        return "నమస్కారం! మీకు అనుకూలమైన ప్రభుత్వ పథకాలను కనుగొనడంలో నేను సహాయం చేస్తాను. మీ వయస్సు ఎంత?"
+        return GREETING_RESPONSE
     
     def _handle_collecting_basic(self) -> str:
         """Collect basic required info"""
@@ -346,16 +691,17 @@ class TeluguSchemeAgent:
         if self.context.already_asked(field):
             if len(missing) > 1:
                 field = missing[1]
-            else:
+            elif not self.context.profile.get("occupation") and not self.context.already_asked("occupation"):
                 self.state = AgentState.COLLECTING_ADDITIONAL_INFO
                 return self._handle_collecting_additional()
-        
+            # Otherwise matching still needs this field, so ask again
+
         self.context.mark_question_asked(field)
         
         if field == "age":
-            return "మీ వయస్సు ఎంత?"
+            return AGE_QUESTION
         elif field == "state":
-            return "మీరు ఏ రాష్ట్రానికి చెందినవారు? తెలంగాణ లేదా ఆంధ్రప్రదేశ్?"
+            return STATE_QUESTION
         
         return "దయచేసి మీ సమాచారం అందించండి."
     
@@ -365,7 +711,7 @@ class TeluguSchemeAgent:
         if not self.context.profile.get("occupation"):
             if not self.context.already_asked("occupation"):
                 self.context.mark_question_asked("occupation")
-                return "మీ వృత్తి ఏమిటి? రైతు, చేనేత, కూలీ, వ్యాపారి, విద్యార్థి?"
+                return OCCUPATION_QUESTION
         
         # Have enough info
         self.state = AgentState.MATCHING_SCHEMES
@@ -381,11 +727,11 @@ class TeluguSchemeAgent:
         # Find eligible schemes
         eligible = self.database.find_eligible_schemes(self.context.profile)
         
-        # Debug logging
-        print(f"DEBUG: User profile: {self.context.profile}")
-        print(f"DEBUG: Found {len(eligible)} eligible schemes")
-        for item in eligible[:5]:
-            print(f"  - {item['scheme']['name_telugu']}: {item['eligibility_score']}%")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Found %d eligible schemes", len(eligible), extra={
+                "profile": dict(self.context.profile),
+                "top_schemes": [(item["scheme"]["id"], item["eligibility_score"]) for item in eligible[:5]]
+            })
         
         if not eligible:
             # If no schemes found and student, give specific message
@@ -402,6 +748,13 @@ class TeluguSchemeAgent:
         self.state = AgentState.PRESENTING_SCHEMES
         self.context.confirmed_schemes = eligible[:3]
         
+        # Warm the likely follow-ups while the user listens
+        if self.prefetcher:
+            self.cancel_prefetch()
+            self.prefetch = self.prefetcher.schedule(
+                [item["scheme"] for item in self.context.confirmed_schemes]
+            )
+        
         # Build scheme info
         scheme_info = ""
         for i, item in enumerate(self.context.confirmed_schemes, 1):
@@ -423,7 +776,7 @@ Eligible Schemes (verified matches):
 - End by asking "ఏ పథకం గురించి తెలుసుకోవాలనుకుంటున్నారు?"
 Maximum 5 sentences total."""
         
-        return self.generator.generate_response(context, task, "show schemes")
+        return self._generate(context, task, "show schemes")
     
     def _handle_presenting(self, user_input: str) -> str:
         """Handle questions about presented schemes"""
@@ -431,34 +784,19 @@ Maximum 5 sentences total."""
         user_lower = user_input.lower()
         
         # Check if user is asking about a DIFFERENT scheme
-        for item in self.context.confirmed_schemes:
-            scheme = item["scheme"]
-            scheme_name_words = scheme["name_telugu"].split()
+        scheme = self._mentioned_scheme(user_lower)
+        if scheme:
+            self.context.current_scheme_focus = scheme
+            self.state = AgentState.ANSWERING_QUESTIONS
             
-            if (scheme["name_telugu"].lower() in user_lower or 
-                scheme["name_english"].lower() in user_lower or
-                any(word.lower() in user_lower for word in scheme_name_words if len(word) > 2)):
-                
-                self.context.current_scheme_focus = scheme
-                self.state = AgentState.ANSWERING_QUESTIONS
-                
-                context = f"""Scheme:
-Name: {scheme['name_telugu']}
-Description: {scheme['description_telugu']}
-Benefits: {scheme['benefits']}
-Category: {scheme['category']}"""
-                
-                task = """Explain this scheme naturally in Telugu:
-- Start with scheme name
-- Explain what it provides in 2 simple sentences
-- Mention the main benefit with numbers
-- End by asking "దరఖాస్తు ఎలా చేయాలో తెలుసుకోవాలా?"
-Maximum 4 sentences."""
-                
-                return self.generator.generate_response(context, task, user_input)
+            return self._explain_scheme(scheme, user_input)
+        
+        routed = self._route_intent(user_input)
+        if routed is not None:
+            return routed
         
-        # Check if asking about application
-        if any(word in user_lower for word in ['దరఖాస్తు', 'apply', 'ఎలా', 'how', 'process', 'చేయాలి']):
+        # Check if asking about application (keywords only when the classifier had no opinion)
+        if self.intent is None and any(word in user_lower for word in APPLY_KEYWORDS):
             self.state = AgentState.PROVIDING_APPLICATION_DETAILS
             return self._handle_application_details(user_input)
         
@@ -472,36 +810,30 @@ Maximum 4 sentences."""
         user_lower = user_input.lower()
         
         # Check if user is asking about a DIFFERENT scheme
-        if self.context.confirmed_schemes:
-            for item in self.context.confirmed_schemes:
-                scheme = item["scheme"]
-                scheme_name_words = scheme["name_telugu"].split()
-                
-                if (scheme["name_telugu"].lower() in user_lower or 
-                    scheme["name_english"].lower() in user_lower or
-                    any(word.lower() in user_lower for word in scheme_name_words if len(word) > 2)):
-                    
-                    self.context.current_scheme_focus = scheme
-                    
-                    context = f"""Scheme:
-Name: {scheme['name_telugu']}
-Description: {scheme['description_telugu']}
-Benefits: {scheme['benefits']}"""
-                    
-                    task = """Explain this scheme naturally:
-- Start with scheme name
-- What it provides in 2 sentences
-- Main benefit with numbers
-- Ask "దరఖాస్తు ఎలా చేయాలో తెలుసుకోవాలా?"
-Max 4 sentences."""
-                    
-                    return self.generator.generate_response(context, task, user_input)
+        scheme = self._mentioned_scheme(user_lower)
+        if scheme:
+            self.context.current_scheme_focus = scheme
+            
+            return self._explain_scheme(scheme, user_input)
+        
+        routed = self._route_intent(user_input)
+        if routed is not None:
+            return routed
         
         # Check for application request
-        if any(word in user_lower for word in ['దరఖాస్తు', 'apply', 'process', 'ఎలా', 'how', 'చేయాలి', 'yes', 'avunu', 'అవును', 'విస్తరంగా', 'vivaranga']):
+        if self.intent is None and any(word in user_lower for word in APPLY_KEYWORDS + AFFIRMATION_KEYWORDS):
             self.state = AgentState.PROVIDING_APPLICATION_DETAILS
             return self._handle_application_details(user_input)
         
+        # Search the catalog locally before falling back to the LLM
+        hits = [(scheme, score) for scheme, score in self.database.search(user_input)
+                if score >= SEARCH_MIN_SCORE]
+        
+        if hits and self._is_confident_hit(hits):
+            scheme = hits[0][0]
+            self.context.current_scheme_focus = scheme
+            return self._describe_search_hit(scheme)
+        
         # Use LLM for general answer
         context = str(self.context.profile)
         
@@ -512,9 +844,16 @@ Max 4 sentences."""
             ])
             context = f"User Profile: {context}\n\nEligible Schemes:\n{scheme_list}"
         
+        if hits:
+            related = "\n".join([
+                f"- {scheme['name_telugu']}: {scheme['description_telugu']} ({scheme['benefits']})"
+                for scheme, _ in hits
+            ])
+            context = f"{context}\n\nRelated Schemes (database search):\n{related}"
+        
         task = "Answer the user's question helpfully in natural Telugu. Keep it short and clear. Maximum 3 sentences."
         
-        return self.generator.generate_response(str(context), task, user_input)
+        return self._generate(str(context), task, user_input)
     
     def _handle_application_details(self, user_input: str) -> str:
         """Provide application details"""
@@ -522,17 +861,9 @@ Max 4 sentences."""
         user_lower = user_input.lower()
         
         # Check if user is asking about a DIFFERENT scheme now
-        if self.context.confirmed_schemes:
-            for item in self.context.confirmed_schemes:
-                scheme = item["scheme"]
-                scheme_name_words = scheme["name_telugu"].split()
-                
-                if (scheme["name_telugu"].lower() in user_lower or 
-                    scheme["name_english"].lower() in user_lower or
-                    any(word.lower() in user_lower for word in scheme_name_words if len(word) > 2)):
-                    
-                    self.context.current_scheme_focus = scheme
-                    break
+        mentioned = self._mentioned_scheme(user_lower)
+        if mentioned:
+            self.context.current_scheme_focus = mentioned
         
         scheme = self.context.current_scheme_focus
         
@@ -543,32 +874,118 @@ Max 4 sentences."""
         if not scheme:
             return "దయచేసి ముందు ఏ పథకం కావాలో చెప్పండి."
         
-        app_process = scheme.get("application_process", {})
-        steps = app_process.get("steps_telugu", [])
-        online_url = app_process.get("online_url", "")
-        offline_loc = app_process.get("offline_location", "")
+        response = build_application_response(scheme)
         
-        if not steps:
+        if response is None:
             return f"{scheme['name_telugu']} దరఖాస్తు విధానం ప్రస్తుతం అందుబాటులో లేదు."
         
-        # Provide clear, actionable steps
-        response = f"**{scheme['name_telugu']} దరఖాస్తు చేయడం ఎలా:**\n\n"
+        # RESET state so it can handle new scheme requests
+        self.state = AgentState.ANSWERING_QUESTIONS
         
-        for i, step in enumerate(steps, 1):
-            response += f"{i}. {step}\n"
+        return response
+    
+    def _mentioned_scheme(self, user_lower: str) -> Optional[Dict]:
+        """Presented scheme the user names, or refers to by position ("the second one")"""
+        for item in self.context.confirmed_schemes:
+            scheme = item["scheme"]
+            scheme_name_words = scheme["name_telugu"].split()
+            
+            if (scheme["name_telugu"].lower() in user_lower or 
+                scheme["name_english"].lower() in user_lower or
+                any(word.lower() in user_lower for word in scheme_name_words if len(word) > 2)):
+                return scheme
         
-        if online_url:
-            response += f"\n🌐 **ఆన్‌లైన్:** వెబ్‌సైట్ లో కూడా చేయవచ్చు"
+        for position, words in ORDINAL_KEYWORDS.items():
+            if position < len(self.context.confirmed_schemes) and any(word in user_lower for word in words):
+                return self.context.confirmed_schemes[position]["scheme"]
         
-        if offline_loc:
-            response += f"\n📍 **ఆఫ్‌లైన్:** {offline_loc} కి వెళ్ళండి"
+        return None
+    
+    def _route_intent(self, user_input: str) -> Optional[str]:
+        """Answer routine follow-ups locally when the classifier is confident; None falls through"""
+        if not self.intents:
+            return None
         
-        response += "\n\nఇంకా ఏదైనా సహాయం కావాలా?"
+        self.intent = self.intents.predict(user_input)
+        if self.intent is None:
+            return None
         
-        # RESET state so it can handle new scheme requests
-        self.state = AgentState.ANSWERING_QUESTIONS
+        current_span().set_attribute("intent.label", self.intent.label)
+        current_span().set_attribute("intent.confidence", round(self.intent.confidence, 3))
         
-        return response
+        label = self.intent.label
+        
+        if label == APPLY_REQUEST:
+            self.state = AgentState.PROVIDING_APPLICATION_DETAILS
+            return self._handle_application_details(user_input)
+        
+        if label == AFFIRMATION:
+            if self.state == AgentState.PRESENTING_SCHEMES and self.context.confirmed_schemes:
+                # "Which scheme would you like to know about?" - start with the best match
+                scheme = self.context.confirmed_schemes[0]["scheme"]
+                self.context.current_scheme_focus = scheme
+                self.state = AgentState.ANSWERING_QUESTIONS
+                return self._explain_scheme(scheme, user_input)
+            
+            # Explanations end by offering the application steps
+            self.state = AgentState.PROVIDING_APPLICATION_DETAILS
+            return self._handle_application_details(user_input)
+        
+        if label == NEGATION:
+            self.state = AgentState.ANSWERING_QUESTIONS
+            return NEGATION_RESPONSE
+        
+        if label == PROFILE_CORRECTION:
+            if self.profile_changed:
+                self.state = AgentState.MATCHING_SCHEMES
+                return self._handle_matching()
+            return PROFILE_CORRECTION_PROMPT
+        
+        if label == OFF_TOPIC:
+            return OFF_TOPIC_RESPONSE
+        
+        # SCHEME_QUESTION: genuinely open, leave it to search and Gemini
+        return None
+    
+    def _is_confident_hit(self, hits: List[Tuple[Dict, float]]) -> bool:
+        """Top search hit is strong and clearly ahead of the runner-up"""
+        top_score = hits[0][1]
+        if top_score < SEARCH_CONFIDENT_SCORE:
+            return False
+        return len(hits) == 1 or top_score >= SEARCH_DOMINANCE * hits[1][1]
+    
+    def _describe_search_hit(self, scheme: Dict) -> str:
+        """Answer a topical question straight from the database record"""
+        response = f"{scheme['name_telugu']}: {scheme['description_telugu']}. ప్రయోజనం: {scheme['benefits']}."
+        
+        eligible_ids = {
+            item["scheme"]["id"]
+            for item in self.database.find_eligible_schemes(self.context.profile)
+        }
+        if scheme["id"] not in eligible_ids:
+            response += " మీ వివరాల ప్రకారం ఈ పథకానికి అర్హత సరిపోకపోవచ్చు."
+        
+        return response + " దరఖాస్తు ఎలా చేయాలో తెలుసుకోవాలా?"
+    
+    def _explain_scheme(self, scheme: Dict, user_input: str) -> str:
+        """Explain a single scheme, serving the precomputed text when available"""
+        if self.precomputed:
+            explanation = self.precomputed.explanation(scheme)
+            if explanation:
+                return explanation
+        
+        if self.prefetcher:
+            explanation = self.prefetcher.explanation(scheme)
+            if explanation:
+                return explanation
+        
+        context, task = build_explanation_prompt(scheme)
+        return self._generate(context, task, user_input)
+    
+    def _generate(self, context: str, task: str, user_input: str) -> str:
+        """Gemini call, counted per conversation"""
+        self.llm_calls += 1
+        return self.generator.generate_response(context, task, user_input)
     
     def _extract_all_info(self, user_input: str):
         """Extract all possible information from user input"""
@@ -580,7 +997,7 @@ Max 4 sentences."""
     def _extract_age(self, text: str) -> Optional[int]:
         """Extract age from text"""
         # Age with keywords
-        match = re.search(r'(\d{1,3})\s*(?:years|సంవత్సరాల|ఏళ్ళు|year|సంవత్సరం|ఏళ్ల)', text.lower())
+        match = re.search(r'(\d{1,3})\s*(?:' + '|'.join(AGE_UNITS) + ')', text.lower())
         if match:
             age = int(match.group(1))
             if 1 <= age <= 120:
@@ -598,36 +1015,15 @@ Max 4 sentences."""
     
     def _extract_state(self, text: str) -> Optional[str]:
         """Extract state from text"""
-        text_lower = text.lower()
-        
-        if any(word in text_lower for word in ['telangana', 'తెలంగాణ', 'తెలంగాణా']):
-            return "Telangana"
-        elif any(word in text_lower for word in ['andhra', 'ఆంధ్ర', 'ఆంధ్రప్రదేశ్', 'ఆంధ్రప్రదేశ']):
-            return "Andhra Pradesh"
-        
-        return None
+        return match_keywords(text, STATE_KEYWORDS)
     
     def _extract_occupation(self, text: str) -> Optional[str]:
         """Extract occupation from text"""
-        text_lower = text.lower()
-        
-        occupations = {
-            "student": ['విద్యార్థి', 'student', 'చదువు', 'స్కూల్', 'కాలేజీ', 'college', 'school'],
-            "farmer": ['రైతు', 'rythu', 'farmer', 'agriculture', 'వ్యవసాయం', 'వ్యవసాయ'],
-            "weaver": ['చేనేత', 'weaver', 'handloom', 'చేనేత కార్మికుడు'],
-            "labor": ['కూలీ', 'labor', 'worker', 'labour', 'కార్మికుడు'],
-            "business": ['వ్యాపారి', 'business', 'trader', 'వ్యాపారం'],
-        }
-        
-        for occ, keywords in occupations.items():
-            if any(keyword in text_lower for keyword in keywords):
-                return occ
-        
-        return None
+        return match_keywords(text, OCCUPATION_KEYWORDS)
     
     def _extract_income(self, text: str) -> Optional[int]:
         """Extract income from text"""
-        match = re.search(r'(\d+(?:,\d+)*)\s*(?:rupees|రూపాయల|income|ఆదాయం)', text.lower())
+        match = re.search(r'(\d+(?:,\d+)*)\s*(?:' + '|'.join(INCOME_UNITS) + ')', text.lower())
         if match:
             income_str = match.group(1).replace(',', '')
             return int(income_str)
@@ -636,21 +1032,83 @@ Max 4 sentences."""
     
     def _extract_gender(self, text: str) -> Optional[str]:
         """Extract gender from text"""
-        text_lower = text.lower()
-        
-        if any(word in text_lower for word in ['అబ్బాయి', 'boy', 'male', 'పురుషుడు']):
-            return "male"
-        elif any(word in text_lower for word in ['అమ్మాయి', 'girl', 'female', 'మహిళ', 'స్త్రీ']):
-            return "female"
-        
-        return None
+        return match_keywords(text, GENDER_KEYWORDS)
+    
+    def spawn(self) -> "TeluguSchemeAgent":
+        """New conversation sharing this agent's database, generator, precomputed store, prefetcher and intent model"""
+        return TeluguSchemeAgent(
+            api_key=None,
+            schemes_path=None,
+            precomputed=self.precomputed,
+            database=self.database,
+            generator=self.generator,
+            prefetcher=self.prefetcher,
+            intents=self.intents
+        )
+    
+    def cancel_prefetch(self):
+        """Drop speculative work for this conversation (session ended or schemes changed)"""
+        if self.prefetch:
+            self.prefetch.cancel()
+            self.prefetch = None
     
     def reset(self):
         """Reset conversation"""
+        self.cancel_prefetch()
         self.context = ConversationContext()
+        self.llm_calls = 0
         self.state = AgentState.GREETING
 
 
+def match_keywords(text: str, table: Dict[str, List[str]]) -> Optional[str]:
+    """Return the first key whose keywords appear in the text"""
+    text_lower = text.lower()
+    
+    for value, keywords in table.items():
+        if any(keyword in text_lower for keyword in keywords):
+            return value
+    
+    return None
+
+
+def build_explanation_prompt(scheme: Dict) -> Tuple[str, str]:
+    """Build the Gemini context and task used to explain a scheme"""
+    context = f"""Scheme:
+Name: {scheme['name_telugu']}
+Description: {scheme['description_telugu']}
+Benefits: {scheme['benefits']}
+Category: {scheme['category']}"""
+    
+    return context, EXPLANATION_TASK
+
+
+def build_application_response(scheme: Dict) -> Optional[str]:
+    """Build the step-by-step application reply for a scheme (None if no steps)"""
+    app_process = scheme.get("application_process", {})
+    steps = app_process.get("steps_telugu", [])
+    online_url = app_process.get("online_url", "")
+    offline_loc = app_process.get("offline_location", "")
+    
+    if not steps:
+        return None
+    
+    # Provide clear, actionable steps
+    response = f"**{scheme['name_telugu']} దరఖాస్తు చేయడం ఎలా:**\n\n"
+    
+    for i, step in enumerate(steps, 1):
+        response += f"{i}. {step}\n"
+    
+    if online_url:
+        response += f"\n🌐 **ఆన్‌లైన్:** వెబ్‌సైట్ లో కూడా చేయవచ్చు"
+    
+    if offline_loc:
+        response += f"\n📍 **ఆఫ్‌లైన్:** {offline_loc} కి వెళ్ళండి"
+    
+    response += "\n\nఇంకా ఏదైనా సహాయం కావాలా?"
+    
+    return response
+
+
 def clean_text_for_tts(text: str) -> str:
     """Clean text for TTS - Remove ALL English content"""
     # Remove markdown bold
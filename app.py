@@ -3,34 +3,106 @@ Production Flask Application for Telugu Government Scheme Voice Agent
 Ready for Render/Railway/Heroku Deployment
 """
 
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, Response, abort, render_template, request, jsonify, send_file, send_from_directory, stream_with_context
 from flask_cors import CORS
+from flask_sock import Sock
 import os
+import atexit
 import time
 import json
+import logging
+import shutil
 import tempfile
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Optional
 from datetime import datetime
 from dotenv import load_dotenv
-from agent_gemini import TeluguSchemeAgent, clean_text_for_tts
+from agent_gemini import FIXED_PROMPTS, AgentState, SchemeDatabase, TeluguSchemeAgent, clean_text_for_tts
 from voice_pipeline import VoicePipeline
+from audio_store import AudioStore
+from speech_hints import SpeechHints
+from parallel_tts import ParallelSynthesizer
+from precompute import PrecomputedStore
+from bulk_eligibility import decode_lines, match_profiles, read_profiles
+from cpu_pool import CpuPool
+from profiling import RequestProfiler, token_matches
+from admission import AdmissionController, AdmittedGenerator, Overloaded
+from conversation_socket import ConversationSocket
+from prefetch import Prefetcher
+from intent_classifier import IntentClassifier
+from turn_log import TurnLog, normalize_timestamp
+from memory_report import AllocationTracker, session_report, shared_ids
+from structured_logging import bind_session, configure_logging, dropped_records
+from tracing import configure_tracing, current_span, span, traced, tracing_stats
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
 CORS(app)
+app.config["SOCK_SERVER_OPTIONS"] = {"ping_interval": 25}
+sock = Sock(app)
 
 # Global services
 agent = None
 voice_pipeline = None
+precomputed = None
+speech_hints = None
+prefetcher = None
+synthesizer = None
 active_sessions = {}
+open_sockets = set()
 
 # Configuration
 CONFIG = {
     "gemini_api_key": os.getenv("GEMINI_API_KEY"),
     "google_credentials": None,
-    "schemes_path": "schemes_database.json"
+    "schemes_path": os.getenv("SCHEMES_PATH", "schemes_database.json"),
+    "shared_catalog_path": os.getenv("SHARED_CATALOG_PATH"),
+    "precomputed_path": os.getenv("PRECOMPUTED_PATH", "precomputed"),
+    "fast_start": os.getenv("FAST_START", "False").lower() == "true",
+    "fake_upstreams": os.getenv("FAKE_UPSTREAMS", "False").lower() == "true",
+    "ready_wait_seconds": float(os.getenv("READY_WAIT_SECONDS", "10")),
+    "session_ttl_seconds": float(os.getenv("SESSION_TTL_SECONDS", "1800")),
+    "max_sessions": int(os.getenv("MAX_SESSIONS", "1000")),
+    "admin_token": os.getenv("ADMIN_TOKEN"),
+    "bulk_max_bytes": int(os.getenv("BULK_MAX_BYTES", str(20 * 1024 * 1024))),
+    "bulk_max_rows": int(os.getenv("BULK_MAX_ROWS", "50000"))
 }
 
+# Process pool for CPU-heavy stages (None unless configured). Forked before
+# logging, tracing or anything else starts a thread, so each worker loads the
+# catalog itself.
+cpu_pool = CpuPool.from_env(CONFIG["schemes_path"], CONFIG["shared_catalog_path"])
+
+configure_logging()
+configure_tracing()
+
+# Warm-up status per subsystem, reported by /ready
+READINESS = {
+    name: {"status": "pending", "seconds": None, "error": None}
+    for name in ("credentials", "catalog", "llm", "voice")
+}
+services_ready = threading.Event()
+
+# Opt-in sampling profiler for turn endpoints (no-op unless configured)
+profiler = RequestProfiler(CONFIG["admin_token"])
+
+# Per-stage concurrency limits for upstream calls (no-op unless configured)
+admission = AdmissionController.from_env()
+
+# Append-only JSONL log of every turn, written off the request path
+turn_log = TurnLog.from_env()
+
+# Response audio under content-hash URLs, shared by sessions and workers
+audio_store = AudioStore.from_env()
+
+# tracemalloc switch for the admin memory endpoints (off until started)
+allocations = AllocationTracker()
+
 
 def setup_google_credentials():
     """
@@ -41,7 +113,7 @@ def setup_google_credentials():
     google_creds_json = os.getenv('GOOGLE_CREDENTIALS')
     
     if google_creds_json:
-        print("📝 Using Google credentials from environment variable")
+        logger.info("Using Google credentials from environment variable")
         try:
             # Parse JSON from environment variable
             creds_dict = json.loads(google_creds_json)
@@ -55,51 +127,384 @@ def setup_google_credentials():
             os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = temp_creds.name
             return temp_creds.name
         except Exception as e:
-            print(f"❌ Error parsing Google credentials from env: {e}")
+            logger.error("Error parsing Google credentials from env: %s", e)
             raise
     
     # Fallback to file path (for local development)
     creds_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS", "google-credentials.json")
     
     if os.path.exists(creds_path):
-        print(f"📝 Using Google credentials from file: {creds_path}")
+        logger.info("Using Google credentials from file: %s", creds_path)
         return creds_path
     
     raise ValueError("Google credentials not found! Set GOOGLE_CREDENTIALS env var or provide google-credentials.json file")
 
 
+@contextmanager
+def warming(subsystem: str):
+    """Record how long a subsystem takes to warm up and whether it failed"""
+    started = time.time()
+    try:
+        yield
+    except Exception as e:
+        READINESS[subsystem].update(status="failed", error=str(e))
+        raise
+    READINESS[subsystem].update(status="ready", seconds=round(time.time() - started, 3))
+
+
+def initialize_voice(speech_service=None):
+    """Initialize voice pipeline (builds the STT/TTS gRPC clients)"""
+    global voice_pipeline
+    
+    logger.info("Initializing voice pipeline")
+    with warming("voice"):
+        voice_pipeline = VoicePipeline(
+            credentials_path=CONFIG["google_credentials"],
+            speech_service=speech_service
+        )
+
+
 def initialize():
     """Initialize all services"""
-    global agent, voice_pipeline
+    global agent, precomputed, prefetcher, synthesizer, speech_hints
     
-    print("🚀 Initializing services...")
+    logger.info("Initializing services")
     
-    # Check Gemini API key
-    if not CONFIG["gemini_api_key"]:
-        raise ValueError("GEMINI_API_KEY not found in environment variables")
+    fake_generator, fake_speech = None, None
     
-    # Setup Google credentials
-    try:
-        CONFIG["google_credentials"] = setup_google_credentials()
-    except Exception as e:
-        print(f"❌ Google credentials setup failed: {e}")
-        raise
+    if CONFIG["fake_upstreams"]:
+        # Local stand-ins for Gemini and Google Speech (load testing)
+        import fake_services
+        
+        logger.warning("Using fake Gemini and Google Speech services")
+        fake_generator, fake_speech = fake_services.from_env()
+        READINESS["credentials"].update(status="ready", seconds=0.0)
+    else:
+        # Check Gemini API key
+        if not CONFIG["gemini_api_key"]:
+            raise ValueError("GEMINI_API_KEY not found in environment variables")
+        
+        # Setup Google credentials
+        try:
+            with warming("credentials"):
+                CONFIG["google_credentials"] = setup_google_credentials()
+        except Exception as e:
+            logger.error("Google credentials setup failed: %s", e)
+            raise
+    
+    # In fast-start mode the voice clients warm up alongside the agent
+    voice_thread = None
+    if CONFIG["fast_start"]:
+        voice_thread = threading.Thread(target=initialize_voice, args=(fake_speech,), daemon=True)
+        voice_thread.start()
+    
+    # Load catalog and precomputed explanations and audio (optional)
+    with warming("catalog"):
+        database = SchemeDatabase(
+            CONFIG["schemes_path"],
+            shared_catalog_path=CONFIG["shared_catalog_path"]
+        )
+        precomputed = PrecomputedStore(CONFIG["precomputed_path"], database=database)
+        intents = IntentClassifier.from_env()
+        speech_hints = SpeechHints.from_env(database)
+    logger.info("Loaded %d precomputed schemes", len(precomputed))
+    
+    if cpu_pool:
+        database.cpu_pool = cpu_pool
+        logger.info("CPU pool running with %d workers", cpu_pool.workers)
+    if intents is None:
+        logger.warning("No intent model; follow-up routing uses keywords only")
     
     # Initialize agent
-    print("🤖 Initializing agent...")
-    agent = TeluguSchemeAgent(
-        api_key=CONFIG["gemini_api_key"],
-        schemes_path=CONFIG["schemes_path"]
+    logger.info("Initializing agent")
+    with warming("llm"):
+        agent = TeluguSchemeAgent(
+            api_key=CONFIG["gemini_api_key"],
+            schemes_path=CONFIG["schemes_path"],
+            precomputed=precomputed,
+            database=database,
+            generator=fake_generator,
+            intents=intents
+        )
+        if "llm" in admission.stages:
+            agent.generator = AdmittedGenerator(agent.generator, admission)
+    
+    if voice_thread:
+        voice_thread.join()
+        if READINESS["voice"]["status"] != "ready":
+            raise RuntimeError(f"Voice pipeline failed: {READINESS['voice']['error']}")
+    else:
+        initialize_voice(fake_speech)
+    
+    # Speculative follow-up answers, shared by every session's agent. They
+    # use the unwrapped generator so they never hold a live turn's llm slot.
+    prefetcher = Prefetcher(
+        getattr(agent.generator, "generator", agent.generator), voice_pipeline.speech_service,
+        precomputed=precomputed, admission=admission
     )
+    agent.prefetcher = prefetcher
+    
+    # Long live responses are synthesized in parallel segments
+    synthesizer = ParallelSynthesizer.from_env(voice_pipeline.speech_service, admission=admission)
+    synthesizer.cpu_pool = cpu_pool
+    
+    # Audio for prompts that never change, listed in the precache manifest
+    audio_store.warm([clean_text_for_tts(text) for text in FIXED_PROMPTS], synthesizer.text_to_speech)
+    
+    services_ready.set()
+    
+    logger.info("All services initialized", extra={"schemes": len(agent.database.schemes)})
+
+
+def synthesize_response(clean_response: str) -> Optional[str]:
+    """
+    Digest of the response audio in the audio store, or None if there is none
+    
+    Audio already stored under the text's digest is reused as is; otherwise
+    precomputed or prefetched audio is copied in, or the text is synthesized.
+    """
+    digest = audio_store.digest(clean_response)
+    
+    with span("tts", {"tts.chars": len(clean_response)}) as tts_span:
+        if audio_store.get(digest):
+            tts_span.set_attribute("tts.source", "stored")
+            return digest
+        
+        ready_audio = precomputed.audio_for_text(clean_response) if precomputed else None
+        source = "precomputed"
+        
+        if not ready_audio and prefetcher:
+            ready_audio = prefetcher.audio_for_text(clean_response)
+            source = "prefetched"
+        
+        temp_file = audio_store.temp_path()
+        try:
+            if ready_audio:
+                tts_span.set_attribute("tts.source", source)
+                shutil.copyfile(ready_audio, temp_file)
+            else:
+                # Under overload the turn still returns its text, just without audio
+                tts_span.set_attribute("tts.source", "live")
+                try:
+                    if not synthesizer.text_to_speech(clean_response, temp_file):
+                        return None
+                except Overloaded as e:
+                    tts_span.set_attribute("tts.source", "shed")
+                    logger.warning("TTS shed: %s", e)
+                    return None
+            
+            audio_store.add(temp_file, digest)
+            return digest
+        finally:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+
+
+def overloaded_response(e: Overloaded):
+    """429/503 with Retry-After for a shed turn"""
+    response = jsonify({"error": "Server busy, please retry", "stage": e.stage})
+    response.status_code = e.status
+    response.headers["Retry-After"] = str(e.retry_after)
+    return response
+
+
+class UnknownSession(Exception):
+    """A turn named a session that was never started or has expired"""
+
+
+def unknown_session_response():
+    """404 telling the client to start a new session"""
+    return jsonify({"error": "Unknown or expired session; start a new one with /api/start-session"}), 404
+
+
+def new_session() -> dict:
+    """
+    Session record with its own conversation agent
+    
+    The agent holds the conversation state (profile, agent state, presented
+    schemes), so sharing one agent would mix concurrent users' conversations.
+    """
+    return {
+        "started_at": datetime.now().isoformat(),
+        "last_active": time.monotonic(),
+        "turn_count": 0,
+        "turns": [],
+        "agent": agent.spawn()
+    }
+
+
+def get_session(session_id: Optional[str]) -> dict:
+    """
+    Look up a live session and mark it active
+    
+    Raises:
+        UnknownSession: The id is missing, was never started or has expired
+            (sessions are only created by /api/start-session or a WebSocket start)
+    """
+    session = active_sessions.get(session_id) if session_id else None
     
-    # Initialize voice pipeline
-    print("🎤 Initializing voice pipeline...")
-    voice_pipeline = VoicePipeline(
-        credentials_path=CONFIG["google_credentials"]
+    if session is None:
+        raise UnknownSession(session_id)
+    
+    session["last_active"] = time.monotonic()
+    return session
+
+
+def end_session(session_id: str, reason: str = "ended"):
+    """Forget a session and cancel its speculative work"""
+    session = active_sessions.pop(session_id, None)
+    
+    if session:
+        session["agent"].cancel_prefetch()
+        logger.info("Session %s", reason, extra={"turns": session["turn_count"]})
+
+
+def expire_sessions():
+    """End sessions idle past the TTL, then the least recently active ones beyond MAX_SESSIONS"""
+    now = time.monotonic()
+    
+    # A session with an open WebSocket stays, however quiet
+    connected = {connection.session_id for connection in list(open_sockets)}
+    idle = sorted(
+        (session["last_active"], session_id)
+        for session_id, session in list(active_sessions.items())
+        if session_id not in connected
     )
     
-    print("✅ All services initialized successfully")
-    print(f"📊 Loaded {len(agent.database.schemes)} schemes")
+    for last_active, session_id in idle:
+        if now - last_active > CONFIG["session_ttl_seconds"]:
+            end_session(session_id, "expired")
+        elif len(active_sessions) >= CONFIG["max_sessions"]:
+            # Leave room for the session being created
+            end_session(session_id, "evicted")
+        else:
+            break
+
+
+def create_session() -> str:
+    """Start a new session and return its id"""
+    expire_sessions()
+    
+    session_id = datetime.now().strftime("%Y%m%d%H%M%S%f") + uuid.uuid4().hex[:6]
+    
+    # Each session gets its own conversation state
+    active_sessions[session_id] = new_session()
+    
+    bind_session(session_id)
+    logger.info("New session started")
+    
+    return session_id
+
+
+def transcribe(audio_bytes: bytes, session_id: str = None):
+    """Speech-to-text for a recorded turn, hinted for the session's state, inside the STT admission stage"""
+    session = active_sessions.get(session_id)
+    state = session["agent"].state if session else AgentState.GREETING
+    hints = speech_hints.for_state(state) if speech_hints else ()
+    
+    with span("stt", {"audio.bytes": len(audio_bytes), "agent.state": state.value}), admission.stage("stt"):
+        return voice_pipeline.speech_service.transcribe_webm(audio_bytes, hints)
+
+
+def run_turn(session_id: str, text: str, confidence: float = None) -> dict:
+    """
+    Run one agent turn and synthesize its audio (shared by HTTP and WebSocket)
+    
+    Returns:
+        Dict with turn, agent_response, metadata, and audio_file and
+        audio_digest (None if TTS failed)
+    """
+    session = get_session(session_id)
+    session["turn_count"] += 1
+    turn = session["turn_count"]
+    
+    # Attributes go on the request's (or WebSocket turn's) root span
+    trace = current_span()
+    trace.set_attribute("session.id", session_id)
+    trace.set_attribute("turn.number", turn)
+    
+    logger.debug("User input: %s", text, extra={"turn": turn, "voice": confidence is not None})
+    
+    # Process with agent
+    response_text, metadata = session["agent"].process_input(text)
+    trace.set_attribute("agent.state", metadata["state"])
+    trace.set_attribute("session.llm_calls", metadata["llm_calls"])
+    
+    logger.info("Turn processed", extra={
+        "turn": turn, "state": metadata["state"],
+        "intent": metadata["intent"], "llm_calls": metadata["llm_calls"]
+    })
+    logger.debug("Agent responds: %s", response_text[:100], extra={"turn": turn})
+    
+    # Clean for TTS
+    clean_response = clean_text_for_tts(response_text)
+    
+    # Text-to-speech (stored under the content hash of the clean text)
+    audio_digest = synthesize_response(clean_response)
+    audio_file = audio_store.path(audio_digest) if audio_digest else None
+    
+    if not audio_digest:
+        logger.warning("TTS failed", extra={"turn": turn})
+    
+    # Save turn to session
+    record = {
+        "turn": turn,
+        "user_text": text,
+        "agent_response": response_text,
+        "state": metadata["state"],
+        "audio_file": audio_file,
+        "timestamp": datetime.now().isoformat()
+    }
+    if confidence is not None:
+        record["confidence"] = float(confidence)
+    session["turns"].append(record)
+    
+    if turn_log:
+        logged = {key: value for key, value in record.items() if key != "audio_file"}
+        turn_log.append({
+            "session_id": session_id, **logged,
+            "intent": metadata["intent"], "llm_calls": metadata["llm_calls"]
+        })
+    
+    return {
+        "turn": turn,
+        "agent_response": response_text,
+        "metadata": {
+            "state": metadata["state"],
+            "has_basic_info": metadata["has_basic_info"],
+            "has_sufficient_info": metadata["has_sufficient_info"]
+        },
+        "audio_file": audio_file,
+        "audio_digest": audio_digest
+    }
+
+
+def audio_url(result: dict):
+    """Immutable URL of a turn's response audio, or None if there is none"""
+    if not result["audio_digest"]:
+        return None
+    return audio_store.url(result["audio_digest"])
+
+
+@app.before_request
+def clear_log_context():
+    """Worker threads are reused; drop the previous request's session id"""
+    bind_session(None)
+
+
+@app.before_request
+def require_ready():
+    """Hold API calls until services are warm (fast-start mode only ever waits here)"""
+    if not request.path.startswith('/api/') or services_ready.is_set():
+        return None
+    
+    if services_ready.wait(CONFIG["ready_wait_seconds"]):
+        return None
+    
+    response = jsonify({"error": "Service is starting, please retry", "readiness": READINESS})
+    response.status_code = 503
+    response.headers['Retry-After'] = '2'
+    return response
 
 
 @app.route('/')
@@ -112,18 +517,7 @@ def index():
 def start_session():
     """Start new conversation session"""
     try:
-        session_id = datetime.now().strftime("%Y%m%d%H%M%S%f")
-        
-        active_sessions[session_id] = {
-            "started_at": datetime.now().isoformat(),
-            "turn_count": 0,
-            "turns": []
-        }
-        
-        # Reset agent for this session
-        agent.reset()
-        
-        print(f"✅ New session started: {session_id}")
+        session_id = create_session()
         
         return jsonify({
             "session_id": session_id,
@@ -131,11 +525,25 @@ def start_session():
         })
     
     except Exception as e:
-        print(f"❌ Session start error: {e}")
+        logger.exception("Session start error")
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/api/end-session', methods=['POST'])
+def end_session_route():
+    """End a conversation (sent by the page on new session and unload)"""
+    data = request.get_json(silent=True) or {}
+    session_id = data.get('session_id') or request.form.get('session_id')
+    bind_session(session_id)
+    
+    end_session(session_id)
+    
+    return jsonify({"status": "success"})
+
+
 @app.route('/api/voice-input', methods=['POST'])
+@traced("/api/voice-input")
+@profiler.profiled("voice-input")
 def voice_input():
     """Handle voice input from user"""
     try:
@@ -144,187 +552,216 @@ def voice_input():
         
         audio_file = request.files['audio']
         session_id = request.form.get('session_id')
-        
-        # Get or create session
-        session = active_sessions.get(session_id, {})
-        session["turn_count"] = session.get("turn_count", 0) + 1
-        turn = session["turn_count"]
-        
-        # Save audio temporarily
-        temp_file = f"temp_audio_{session_id}_{turn}.webm"
-        audio_file.save(temp_file)
+        bind_session(session_id)
+        get_session(session_id)
+        admission.admit(("stt", "llm", "tts"))
         
         # Speech-to-text
-        from google.cloud import speech_v1p1beta1 as speech
-        
-        with open(temp_file, 'rb') as f:
-            audio_bytes = f.read()
-        
-        audio = speech.RecognitionAudio(content=audio_bytes)
-        config = speech.RecognitionConfig(
-            encoding=speech.RecognitionConfig.AudioEncoding.WEBM_OPUS,
-            language_code="te-IN",
-            enable_automatic_punctuation=True,
-            model="default",
-            use_enhanced=True
-        )
+        audio_bytes = audio_file.read()
         
         try:
-            response = voice_pipeline.speech_service.stt_client.recognize(
-                config=config, audio=audio
-            )
+            text, confidence = transcribe(audio_bytes, session_id)
             
-            if response.results:
-                text = response.results[0].alternatives[0].transcript
-                confidence = response.results[0].alternatives[0].confidence
-            else:
-                os.remove(temp_file)
+            if not text:
                 return jsonify({"error": "Could not understand speech"}), 400
         
+        except Overloaded:
+            raise
         except Exception as stt_error:
-            print(f"❌ STT error: {stt_error}")
-            os.remove(temp_file)
+            logger.error("STT error: %s", stt_error)
             return jsonify({"error": "Speech recognition failed"}), 400
         
-        # Clean up temp file
-        os.remove(temp_file)
-        
-        print(f"🎤 [{session_id}] Turn {turn}: User said: {text}")
-        
-        # Process with agent
-        response_text, metadata = agent.process_input(text)
-        
-        print(f"🤖 [{session_id}] Turn {turn}: Agent responds: {response_text[:100]}...")
-        
-        # Clean for TTS
-        clean_response = clean_text_for_tts(response_text)
-        
-        # Generate unique audio filename
-        timestamp = int(time.time() * 1000)
-        audio_file = f"response_{session_id}_{turn}_{timestamp}.wav"
-        
-        # Text-to-speech
-        tts_success = voice_pipeline.speech_service.text_to_speech(
-            clean_response, audio_file
-        )
-        
-        if not tts_success:
-            print(f"⚠️ TTS failed for turn {turn}")
-        
-        # Save turn to session
-        if session_id in active_sessions:
-            active_sessions[session_id]["turns"].append({
-                "turn": turn,
-                "user_text": text,
-                "confidence": float(confidence),
-                "agent_response": response_text,
-                "state": metadata["state"],
-                "audio_file": audio_file,
-                "timestamp": datetime.now().isoformat()
-            })
+        result = run_turn(session_id, text, confidence)
         
         return jsonify({
             "status": "success",
             "user_text": text,
             "confidence": float(confidence),
-            "agent_response": response_text,
-            "audio_url": f"/api/audio/{session_id}/{turn}/{timestamp}",
-            "turn_number": turn,
-            "metadata": {
-                "state": metadata["state"],
-                "has_basic_info": metadata["has_basic_info"],
-                "has_sufficient_info": metadata["has_sufficient_info"]
-            }
+            "agent_response": result["agent_response"],
+            "audio_url": audio_url(result),
+            "turn_number": result["turn"],
+            "metadata": result["metadata"]
         })
     
+    except UnknownSession:
+        return unknown_session_response()
+    except Overloaded as e:
+        logger.warning("Turn shed: %s", e)
+        return overloaded_response(e)
     except Exception as e:
-        print(f"❌ Voice input error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Voice input error")
         return jsonify({"error": str(e)}), 500
 
 
 @app.route('/api/text-input', methods=['POST'])
+@traced("/api/text-input")
+@profiler.profiled("text-input")
 def text_input():
     """Handle text input from user"""
     try:
         data = request.get_json()
         text = data.get('text', '').strip()
         session_id = data.get('session_id')
+        bind_session(session_id)
         
         if not text:
             return jsonify({"error": "No text provided"}), 400
         
-        # Get or create session
-        session = active_sessions.get(session_id, {})
-        session["turn_count"] = session.get("turn_count", 0) + 1
-        turn = session["turn_count"]
-        
-        print(f"💬 [{session_id}] Turn {turn}: User typed: {text}")
-        
-        # Process with agent
-        response_text, metadata = agent.process_input(text)
-        
-        print(f"🤖 [{session_id}] Turn {turn}: Agent responds: {response_text[:100]}...")
-        
-        # Clean for TTS
-        clean_response = clean_text_for_tts(response_text)
+        get_session(session_id)
+        admission.admit(("llm", "tts"))
         
-        # Generate unique audio filename
-        timestamp = int(time.time() * 1000)
-        audio_file = f"response_{session_id}_{turn}_{timestamp}.wav"
-        
-        # Text-to-speech
-        tts_success = voice_pipeline.speech_service.text_to_speech(
-            clean_response, audio_file
-        )
-        
-        if not tts_success:
-            print(f"⚠️ TTS failed for turn {turn}")
-        
-        # Save turn to session
-        if session_id in active_sessions:
-            active_sessions[session_id]["turns"].append({
-                "turn": turn,
-                "user_text": text,
-                "agent_response": response_text,
-                "state": metadata["state"],
-                "audio_file": audio_file,
-                "timestamp": datetime.now().isoformat()
-            })
+        result = run_turn(session_id, text)
         
         return jsonify({
             "status": "success",
-            "agent_response": response_text,
-            "audio_url": f"/api/audio/{session_id}/{turn}/{timestamp}",
-            "turn_number": turn,
-            "metadata": {
-                "state": metadata["state"],
-                "has_basic_info": metadata["has_basic_info"],
-                "has_sufficient_info": metadata["has_sufficient_info"]
-            }
+            "agent_response": result["agent_response"],
+            "audio_url": audio_url(result),
+            "turn_number": result["turn"],
+            "metadata": result["metadata"]
         })
     
+    except UnknownSession:
+        return unknown_session_response()
+    except Overloaded as e:
+        logger.warning("Turn shed: %s", e)
+        return overloaded_response(e)
     except Exception as e:
-        print(f"❌ Text input error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Text input error")
         return jsonify({"error": str(e)}), 500
 
 
-@app.route('/api/audio/<session_id>/<int:turn>/<int:timestamp>')
-def get_audio(session_id, turn, timestamp):
-    """Serve generated audio file"""
-    audio_path = f"response_{session_id}_{turn}_{timestamp}.wav"
+@sock.route('/ws/conversation')
+def conversation_socket(ws):
+    """Full-duplex conversation: audio up, transcripts/text/audio down"""
+    if not services_ready.wait(CONFIG["ready_wait_seconds"]):
+        ws.send(json.dumps({"type": "error", "error": "Service warming up", "retry_after": 5}))
+        return
     
-    if os.path.exists(audio_path):
-        response = send_file(audio_path, mimetype='audio/wav')
-        response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-        response.headers['Pragma'] = 'no-cache'
-        response.headers['Expires'] = '0'
-        return response
-    else:
+    def open_session(session_id):
+        if session_id and session_id in active_sessions:
+            return session_id
+        return create_session()
+    
+    def run_ws_turn(session_id, text, confidence):
+        admission.admit(("llm", "tts"))
+        return run_turn(session_id, text, confidence)
+    
+    connection = ConversationSocket(ws, open_session, run_ws_turn, transcribe, audio_store.pinned_url)
+    open_sockets.add(connection)
+    try:
+        connection.serve()
+    finally:
+        open_sockets.discard(connection)
+    
+    # Page closed or reconnecting: its speculative work is no longer wanted
+    session = active_sessions.get(connection.session_id)
+    if session:
+        session["agent"].cancel_prefetch()
+
+
+@app.route('/api/bulk-eligibility', methods=['POST'])
+def bulk_eligibility():
+    """
+    Stream eligibility results for a JSONL or CSV upload of profiles (admin only)
+    Send the file as the raw body (Content-Type: text/csv or application/x-ndjson)
+    or as multipart field "file". Results stream back as JSONL.
+    """
+    require_admin()
+    
+    # Checked before the body is read; chunked uploads have no length to check
+    if request.content_length is None:
+        return jsonify({"error": "Content-Length required"}), 411
+    if request.content_length > CONFIG["bulk_max_bytes"]:
+        return jsonify({"error": f"Upload exceeds {CONFIG['bulk_max_bytes']} bytes"}), 413
+    
+    upload = request.files.get('file')
+    source = upload.stream if upload else request.stream
+    
+    fmt = request.args.get('format')
+    if not fmt:
+        content_type = upload.mimetype if upload else (request.mimetype or "")
+        filename = upload.filename if upload else ""
+        fmt = "csv" if content_type == "text/csv" or filename.lower().endswith(".csv") else "jsonl"
+    
+    if fmt not in ("csv", "jsonl"):
+        return jsonify({"error": "format must be csv or jsonl"}), 400
+    
+    rows = read_profiles(decode_lines(source), fmt, max_rows=CONFIG["bulk_max_rows"])
+    
+    return Response(
+        stream_with_context(match_profiles(agent.database, rows, pool=cpu_pool)),
+        mimetype='application/x-ndjson'
+    )
+
+
+@app.route('/api/sessions/export')
+def export_sessions():
+    """
+    Stream logged turns as JSONL (admin only)
+    Filters: from and to (ISO timestamps, to is exclusive), state (repeatable), session_id
+    """
+    require_admin()
+    
+    if turn_log is None:
+        return jsonify({"error": "Turn log is disabled"}), 404
+    
+    try:
+        start = normalize_timestamp(request.args["from"]) if request.args.get("from") else None
+        end = normalize_timestamp(request.args["to"]) if request.args.get("to") else None
+    except ValueError:
+        return jsonify({"error": "from and to must be ISO timestamps"}), 400
+    
+    records = turn_log.records(start, end, request.args.getlist("state"), request.args.get("session_id"))
+    
+    return Response(
+        stream_with_context(json.dumps(record, ensure_ascii=False) + "\n" for record in records),
+        mimetype='application/x-ndjson'
+    )
+
+
+@app.route('/api/audio/<digest>.wav')
+def get_audio(digest):
+    """Serve response audio by content hash (immutable; ETag and Range supported)"""
+    try:
+        audio_path = audio_store.get(digest)
+    except ValueError:
+        audio_path = None
+    
+    if not audio_path:
         return jsonify({"error": "Audio not found"}), 404
+    
+    response = send_file(os.path.abspath(audio_path), mimetype='audio/wav', etag=digest,
+                         last_modified=None, conditional=True)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+
+@app.route('/api/audio/manifest.json')
+def audio_manifest():
+    """Fixed prompt audio for the service worker to precache"""
+    response = jsonify(audio_store.manifest())
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+@app.route('/sw.js')
+def service_worker():
+    """Service worker, served from the root so its scope covers /api/audio/"""
+    response = send_from_directory(app.static_folder, 'sw.js', mimetype='application/javascript')
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+@app.route('/ready')
+def ready():
+    """Readiness endpoint - reports when each subsystem is warm"""
+    is_ready = services_ready.is_set()
+    
+    return jsonify({
+        "ready": is_ready,
+        "fast_start": CONFIG["fast_start"],
+        "subsystems": READINESS
+    }), 200 if is_ready else 503
 
 
 @app.route('/health')
@@ -336,10 +773,90 @@ def health():
         "voice": voice_pipeline is not None,
         "schemes": len(agent.database.schemes) if agent else 0,
         "active_sessions": len(active_sessions),
+        "voice_pool": voice_pipeline.speech_service.pool_stats() if voice_pipeline else None,
+        "log_records_dropped": dropped_records(),
+        "tracing": tracing_stats(),
+        "turn_log": turn_log.stats() if turn_log else None,
+        "admission": admission.stats(),
+        "prefetch": prefetcher.stats() if prefetcher else None,
+        "parallel_tts": synthesizer.stats() if synthesizer else None,
+        "audio_store": audio_store.stats(),
+        "cpu_pool": cpu_pool.stats() if cpu_pool else None,
         "environment": os.getenv("ENVIRONMENT", "development")
     })
 
 
+def require_admin():
+    """Abort unless the request carries the configured admin token"""
+    if not token_matches(request.headers.get("X-Admin-Token"), CONFIG["admin_token"]):
+        abort(403)
+
+
+@app.route('/admin/profiles')
+def list_profiles():
+    """List recent request profiles"""
+    require_admin()
+    
+    if profiler.store is None:
+        return jsonify({"profiles": [], "enabled": False})
+    
+    return jsonify({"profiles": profiler.store.list(), "enabled": True})
+
+
+@app.route('/admin/profiles/<name>')
+def download_profile(name):
+    """Download one profile as folded stacks"""
+    require_admin()
+    
+    if profiler.store is None:
+        abort(404)
+    
+    return send_from_directory(
+        os.path.abspath(profiler.store.directory), name,
+        mimetype='text/plain', as_attachment=True
+    )
+
+
+@app.route('/admin/memory')
+def memory_usage():
+    """Approximate bytes per session and per session structure in this worker"""
+    require_admin()
+    
+    if agent is None:
+        return jsonify({"error": "Services not initialized"}), 503
+    
+    shared = shared_ids(agent.database, (agent.generator, agent.precomputed, agent.intents, prefetcher))
+    sockets = {connection.session_id: connection for connection in list(open_sockets) if connection.session_id}
+    
+    return jsonify(session_report(active_sessions, shared, sockets, top=request.args.get("top", 20, type=int)))
+
+
+@app.route('/admin/memory/allocations', methods=['GET', 'POST', 'DELETE'])
+def memory_allocations():
+    """
+    tracemalloc at runtime: POST starts tracing and takes a baseline, GET
+    reports the allocation sites that grew since it, DELETE stops tracing
+    """
+    require_admin()
+    
+    if request.method == 'DELETE':
+        return jsonify(allocations.stop())
+    
+    try:
+        if request.method == 'POST':
+            return jsonify(allocations.start(frames=request.args.get("frames", 10, type=int)))
+        return jsonify(allocations.diff(
+            top=request.args.get("top", 25, type=int),
+            group_by=request.args.get("group_by", "lineno"),
+            package_only=request.args.get("scope", "package") == "package",
+            reset=request.args.get("reset", "false").lower() == "true"
+        ))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({"error": str(e), **allocations.status()}), 409
+
+
 def cleanup_old_files():
     """Clean up old audio files (older than 1 hour)"""
     import glob
@@ -351,34 +868,60 @@ def cleanup_old_files():
                 age = current_time - os.path.getmtime(file)
                 if age > 3600:  # 1 hour
                     os.remove(file)
-                    print(f"🧹 Cleaned: {file}")
+                    logger.info("Cleaned: %s", file)
             except Exception as e:
-                print(f"⚠️ Cleanup error for {file}: {e}")
+                logger.warning("Cleanup error for %s: %s", file, e)
 
 
-# Initialize on startup
-try:
-    print("=" * 80)
-    print("🇮🇳 Telugu Government Scheme Voice Agent - Production")
-    print("=" * 80)
+def startup():
+    """Initialize services and log the startup summary"""
+    logger.info("Telugu Government Scheme Voice Agent starting")
     
     initialize()
     cleanup_old_files()
     
-    print("\n✅ Server Ready!")
-    print(f"✅ Environment: {os.getenv('ENVIRONMENT', 'development')}")
-    print(f"✅ Loaded {len(agent.database.schemes)} schemes")
-    print("=" * 80)
-    
-except Exception as e:
-    print(f"\n❌ Initialization failed: {e}")
-    print("\n📋 Checklist:")
-    print("1. GEMINI_API_KEY environment variable set")
-    print("2. GOOGLE_CREDENTIALS environment variable or google-credentials.json file")
-    print("3. schemes_database.json exists")
-    import traceback
-    traceback.print_exc()
-    exit(1)
+    logger.info("Server ready", extra={
+        "environment": os.getenv("ENVIRONMENT", "development"),
+        "schemes": len(agent.database.schemes)
+    })
+
+
+def shutdown():
+    """Stop voice channel maintenance and release the gRPC channels and CPU pool"""
+    if voice_pipeline:
+        voice_pipeline.close()
+    if cpu_pool:
+        cpu_pool.shutdown()
+
+
+def log_startup_failure(e: Exception):
+    """Explain what to check when initialization fails"""
+    logger.critical(
+        "Initialization failed: %s. Check that GEMINI_API_KEY is set, "
+        "GOOGLE_CREDENTIALS or google-credentials.json is available "
+        "and schemes_database.json exists", e, exc_info=e
+    )
+
+
+def background_startup():
+    """Fast-start mode: warm up while the server already accepts connections"""
+    try:
+        startup()
+    except Exception as e:
+        # Keep serving so /ready can report which subsystem failed
+        log_startup_failure(e)
+
+
+# Initialize on startup
+atexit.register(shutdown)
+if CONFIG["fast_start"]:
+    threading.Thread(target=background_startup, daemon=True).start()
+else:
+    try:
+        startup()
+    except Exception as e:
+        log_startup_failure(e)
+        exit(1)
 
 
 if __name__ == '__main__':
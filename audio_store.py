@@ -0,0 +1,175 @@
+"""
+Content-Addressed Response Audio
+Response audio is stored under a hash of what was synthesized (the TTS-ready
+text plus the voice settings), so the same prompt always has the same URL:
+
+    /api/audio/<sha256>.wav
+
+Those URLs never change meaning, so they are served with a year-long
+immutable Cache-Control and the hash as a strong ETag. Browsers and proxies
+then cache them, and a repeated prompt is never synthesized twice, whichever
+session or worker asks for it. Changing the voice or sample rate changes
+every hash.
+
+The agent's fixed prompts (greeting, profile questions, standard replies) are
+synthesized at startup and listed in a manifest, which the page's service
+worker precaches. Other audio is kept until the directory passes AUDIO_KEEP
+files, and then the least recently served files are removed.
+
+Environment:
+    AUDIO_DIR    Directory for response audio (default audio_cache)
+    AUDIO_KEEP   Files kept before least recently served ones are pruned (default 2000)
+"""
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import uuid
+from typing import Callable, Dict, Iterable, Optional
+
+from voice_pipeline import VoiceConfig
+
+
+logger = logging.getLogger(__name__)
+
+# Bump when stored audio would change for the same text (e.g. stitching changes)
+AUDIO_VERSION = 1
+
+DIGEST = re.compile(r'^[0-9a-f]{64}$')
+
+PRUNE_EVERY = 50
+
+
+class AudioStore:
+    """Directory of response WAVs named by the hash of their synthesis input"""
+
+    def __init__(self, directory: str, keep: int = 2000):
+        self.directory = directory
+        self.keep = keep
+        self.pinned = set()
+        self.counters = {"hits": 0, "stored": 0, "pruned": 0}
+
+        self.lock = threading.Lock()
+        self.adds_since_prune = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> "AudioStore":
+        return cls(os.getenv("AUDIO_DIR", "audio_cache"), keep=int(os.getenv("AUDIO_KEEP", "2000")))
+
+    @staticmethod
+    def digest(clean_text: str) -> str:
+        """Content address of a TTS-ready text as this deployment would voice it"""
+        payload = json.dumps({
+            "version": AUDIO_VERSION,
+            "text": clean_text,
+            "voice": VoiceConfig.GOOGLE_VOICE,
+            "sample_rate": VoiceConfig.SAMPLE_RATE,
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def url(digest: str) -> str:
+        return f"/api/audio/{digest}.wav"
+
+    def path(self, digest: str) -> str:
+        """
+        File for a digest
+
+        Raises:
+            ValueError: If the digest is not a sha256 hex string
+        """
+        if not DIGEST.match(digest):
+            raise ValueError(f"Invalid audio digest {digest!r}")
+        return os.path.join(self.directory, f"{digest}.wav")
+
+    def get(self, digest: str) -> Optional[str]:
+        """Stored file for a digest, marked as recently used, or None"""
+        path = self.path(digest)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        self.counters["hits"] += 1
+        return path
+
+    def temp_path(self) -> str:
+        """Scratch file in the store directory, so add() is an atomic rename"""
+        return os.path.join(self.directory, f"{uuid.uuid4().hex}.tmp")
+
+    def add(self, temp_file: str, digest: str) -> str:
+        """Move a synthesized file into place under its digest"""
+        path = self.path(digest)
+        os.replace(temp_file, path)
+        self.counters["stored"] += 1
+
+        with self.lock:
+            self.adds_since_prune += 1
+            due = self.adds_since_prune >= PRUNE_EVERY
+            if due:
+                self.adds_since_prune = 0
+        if due:
+            self.prune()
+
+        return path
+
+    def prune(self):
+        """Remove least recently served files beyond keep (fixed prompts are never removed)"""
+        files = []
+        for path in glob.glob(os.path.join(self.directory, "*.wav")):
+            if os.path.basename(path)[:-4] in self.pinned:
+                continue
+            try:
+                files.append((os.path.getmtime(path), path))
+            except FileNotFoundError:
+                continue
+
+        files.sort()
+        for _, path in files[:max(0, len(files) - self.keep)]:
+            try:
+                os.remove(path)
+                self.counters["pruned"] += 1
+            except OSError:
+                pass
+
+    def warm(self, texts: Iterable[str], synthesize: Callable[[str, str], bool]):
+        """
+        Make sure every fixed prompt has stored audio and pin it
+
+        Args:
+            texts: TTS-ready fixed prompt texts
+            synthesize: text_to_speech(text, output_file) for prompts not yet stored
+        """
+        for text in texts:
+            digest = self.digest(text)
+            if not os.path.exists(self.path(digest)):
+                temp_file = self.temp_path()
+                try:
+                    if not synthesize(text, temp_file):
+                        logger.warning("Fixed prompt audio failed: %s", text[:40])
+                        continue
+                    self.add(temp_file, digest)
+                finally:
+                    if os.path.exists(temp_file):
+                        os.remove(temp_file)
+            self.pinned.add(digest)
+
+    def pinned_url(self, digest: str) -> Optional[str]:
+        """URL of a fixed prompt's audio (which clients precache), else None"""
+        return self.url(digest) if digest in self.pinned else None
+
+    def manifest(self) -> Dict:
+        """URLs of the pinned fixed prompts, with a version that changes when they do"""
+        digests = sorted(self.pinned)
+        return {
+            "version": hashlib.sha256("".join(digests).encode()).hexdigest()[:16],
+            "audio": [self.url(digest) for digest in digests],
+        }
+
+    def stats(self) -> Dict:
+        return {"directory": self.directory, "pinned": len(self.pinned), **self.counters}
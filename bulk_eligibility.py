@@ -0,0 +1,276 @@
+"""
+Bulk Eligibility Matching for JSONL/CSV Profile Batches
+Streams profiles through SchemeDatabase matching in chunks and yields JSONL
+results, so memory stays constant regardless of input size.
+
+Usage:
+    python bulk_eligibility.py village.csv > results.jsonl
+    cat profiles.jsonl | python bulk_eligibility.py - --format jsonl
+    python bulk_eligibility.py district.jsonl --workers 8 > results.jsonl
+"""
+
+import argparse
+import csv
+import json
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from agent_gemini import (
+    GENDER_KEYWORDS,
+    OCCUPATION_KEYWORDS,
+    STATE_KEYWORDS,
+    SchemeDatabase,
+    match_keywords,
+)
+
+
+DEFAULT_CHUNK_SIZE = 500
+
+# Columns passed through to the output to identify a row (e.g. household id)
+ID_FIELDS = ("id", "profile_id", "name")
+
+
+def _to_int(value) -> Optional[int]:
+    """Parse an int from JSON or CSV input (commas allowed)"""
+    if value is None or value == "":
+        return None
+    try:
+        if isinstance(value, (int, float)):
+            return int(value)
+        return int(str(value).replace(",", "").strip())
+    except OverflowError:
+        # JSON allows 1e999, which parses to inf
+        raise ValueError(f"not a finite number: {value}")
+
+
+def _canonical(value, table: Dict) -> Optional[str]:
+    """Map a free-form field to the extractor's canonical value"""
+    if not value:
+        return None
+
+    text = str(value).strip()
+    for canonical in table:
+        if text.lower() == canonical.lower():
+            return canonical
+
+    return match_keywords(text, table) or text.lower()
+
+
+def normalize_profile(raw: Dict) -> Dict:
+    """
+    Convert an input row to the profile shape the matcher expects
+
+    Args:
+        raw: Row with age, state, occupation, income, gender (Telugu or English)
+
+    Returns:
+        Profile dict
+
+    Raises:
+        ValueError: If age or income is not a number
+    """
+    age = _to_int(raw.get("age"))
+    if age is not None and not 1 <= age <= 120:
+        raise ValueError(f"age out of range: {age}")
+
+    return {
+        "age": age,
+        "state": _canonical(raw.get("state"), STATE_KEYWORDS),
+        "occupation": _canonical(raw.get("occupation"), OCCUPATION_KEYWORDS),
+        "income": _to_int(raw.get("income")),
+        "gender": _canonical(raw.get("gender"), GENDER_KEYWORDS),
+    }
+
+
+def read_profiles(lines: Iterable[Union[str, bytes]], fmt: str,
+                  max_rows: Optional[int] = None) -> Iterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    """
+    Parse profile rows lazily
+
+    Args:
+        lines: Text lines of the upload (bytes for lines decode_lines could not decode)
+        fmt: "jsonl" or "csv"
+        max_rows: Stop after this many rows, with an error row saying so
+
+    Yields:
+        (row number, raw row or None, parse error or None)
+    """
+    rows = _parse_rows(lines, fmt)
+    if max_rows is None:
+        yield from rows
+        return
+
+    for row_number, raw, error in rows:
+        if row_number > max_rows:
+            yield row_number, None, f"row limit of {max_rows} reached; remaining rows were not matched"
+            return
+        yield row_number, raw, error
+
+
+def _parse_rows(lines: Iterable[Union[str, bytes]], fmt: str) -> Iterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    if fmt == "csv":
+        yield from _parse_csv(lines)
+        return
+
+    row_number = 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        row_number += 1
+        try:
+            if isinstance(line, bytes):
+                line = line.decode("utf-8")
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError("row is not a JSON object")
+            yield row_number, row, None
+        except ValueError as e:
+            yield row_number, None, str(e)
+
+
+def _parse_csv(lines: Iterable[Union[str, bytes]]) -> Iterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    undecodable: List[str] = []
+
+    def text_lines():
+        for line in lines:
+            if isinstance(line, bytes):
+                try:
+                    line = line.decode("utf-8")
+                except UnicodeDecodeError as e:
+                    # A blank line in its place; the reader skips it and the row is reported below
+                    undecodable.append(str(e))
+                    line = "\n"
+            yield line
+
+    row_number = 0
+
+    def flush_undecodable():
+        nonlocal row_number
+        while undecodable:
+            row_number += 1
+            yield row_number, None, undecodable.pop(0)
+
+    for row in csv.DictReader(text_lines()):
+        # Lines the reader consumed before this row came first in the upload
+        yield from flush_undecodable()
+        row_number += 1
+        yield row_number, row, None
+    yield from flush_undecodable()
+
+
+def match_profiles(database: SchemeDatabase,
+                   rows: Iterable[Tuple[int, Optional[Dict], Optional[str]]],
+                   chunk_size: int = DEFAULT_CHUNK_SIZE, pool=None) -> Iterator[str]:
+    """
+    Match parsed rows in chunks and yield one JSONL result line per row
+
+    Args:
+        database: Scheme database to match against
+        rows: Output of read_profiles
+        chunk_size: Rows matched per batch
+        pool: Optional CpuPool; chunks are then matched in worker processes
+
+    Yields:
+        JSON lines with scheme ids, scores and reasons (or an error)
+    """
+    chunks = _chunks(rows, chunk_size)
+
+    if pool is not None:
+        yield from pool.match_chunks(database, chunks)
+        return
+
+    for chunk in chunks:
+        yield from match_chunk(database, chunk)
+
+
+def _chunks(rows: Iterable, chunk_size: int) -> Iterator[list]:
+    chunk = []
+
+    for item in rows:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def match_chunk(database: SchemeDatabase, chunk) -> Iterator[str]:
+    """Match one chunk of rows"""
+    for row_number, raw, error in chunk:
+        result = {"row": row_number}
+
+        if raw is not None:
+            for field in ID_FIELDS:
+                if raw.get(field) not in (None, ""):
+                    result[field] = raw[field]
+
+        if error is None:
+            try:
+                profile = normalize_profile(raw)
+                eligible = database.find_eligible_schemes(profile)
+                result["schemes"] = [{
+                    "id": item["scheme"]["id"],
+                    "score": item["eligibility_score"],
+                    "reasons": item["match_reasons"]
+                } for item in eligible]
+            except (TypeError, ValueError) as e:
+                error = str(e)
+
+        if error is not None:
+            result["error"] = error
+
+        yield json.dumps(result, ensure_ascii=False) + "\n"
+
+
+def decode_lines(byte_lines: Iterable[bytes]) -> Iterator[Union[str, bytes]]:
+    """
+    Decode a binary line stream as UTF-8, dropping a leading BOM
+
+    A line that is not valid UTF-8 is passed on as bytes, so the parser
+    reports it as an invalid row instead of ending the stream.
+    """
+    first = True
+    for line in byte_lines:
+        if first:
+            line = line.lstrip(b"\xef\xbb\xbf")
+            first = False
+        try:
+            yield line.decode("utf-8")
+        except UnicodeDecodeError:
+            yield line
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk scheme eligibility for JSONL/CSV profiles")
+    parser.add_argument("input", help="Profiles file, or - for stdin")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Input format (default: from extension)")
+    parser.add_argument("--schemes", default="schemes_database.json", help="Scheme database path")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per batch")
+    parser.add_argument("--workers", type=int, default=0, help="Match chunks in this many processes (default: inline)")
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.input.lower().endswith(".csv") else "jsonl")
+
+    pool = None
+    if args.workers > 0:
+        from cpu_pool import CpuPool
+        pool = CpuPool(args.schemes, args.workers)
+
+    database = SchemeDatabase(args.schemes)
+
+    source = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+    try:
+        for line in match_profiles(database, read_profiles(decode_lines(source), fmt), args.chunk_size, pool):
+            sys.stdout.write(line)
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        if pool:
+            pool.shutdown()
+
+
+if __name__ == '__main__':
+    main()
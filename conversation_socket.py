@@ -0,0 +1,265 @@
+"""
+WebSocket Conversation Transport
+One connection per session carries the whole conversation: the client
+streams recorded audio up as binary frames and receives transcripts, agent
+text and response audio back on the same socket. This removes the separate
+audio GET per turn, and lets the client interrupt playback (barge-in).
+Fixed prompts the page's service worker has precached are sent as a URL
+instead, so replaying them costs no transfer.
+
+Client -> server:
+    {"type": "start", "session_id": optional}   bind or create a session
+    {"type": "text", "text": "..."}             typed turn
+    {"type": "audio_start"}                     begin a recording (barges in)
+    <binary frames>                             recorded audio chunks (webm)
+    {"type": "audio_end"}                       recording complete, run the turn
+    {"type": "barge_in"}                        stop the audio being sent
+
+Server -> client:
+    {"type": "session", "session_id": "..."}
+    {"type": "transcript", "text": "...", "confidence": 0.93}
+    {"type": "response", "agent_response": "...", "turn_number": 3, "metadata": {...}}
+    {"type": "audio", "turn_number": 3, "format": "wav", "bytes": 48044}
+    <binary frames>                             response audio chunks
+    {"type": "audio_end", "turn_number": 3, "cancelled": false}
+    {"type": "audio_ref", "turn_number": 3, "url": "/api/audio/<sha256>.wav"}
+    {"type": "error", "error": "...", "retry_after": optional}
+"""
+
+import json
+import logging
+import queue
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from admission import Overloaded
+from structured_logging import bind_session
+from tracing import start_trace
+
+
+logger = logging.getLogger(__name__)
+
+AUDIO_CHUNK_BYTES = 32 * 1024
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+
+# Turns queued behind the one being processed
+MAX_PENDING_TURNS = 2
+
+
+class ConversationSocket:
+    """Serves one WebSocket connection"""
+
+    def __init__(self, ws,
+                 open_session: Callable[[Optional[str]], str],
+                 run_turn: Callable[..., Dict],
+                 transcribe: Callable[[bytes, str], Tuple[str, float]],
+                 precached_url: Optional[Callable[[str], Optional[str]]] = None):
+        """
+        Args:
+            ws: flask-sock WebSocket
+            open_session: Session id (or None) -> id of a live session
+            run_turn: (session_id, text, confidence) -> turn result from app.run_turn
+            transcribe: (recorded audio, session id) -> (text, confidence)
+            precached_url: Audio digest -> URL when the client precaches it, else None
+        """
+        self.ws = ws
+        self.open_session = open_session
+        self.run_turn = run_turn
+        self.transcribe = transcribe
+        self.precached_url = precached_url
+
+        self.session_id = None
+        self.send_lock = threading.Lock()
+        self.cancel_audio = threading.Event()
+        self.closed = threading.Event()
+        self.turns = queue.Queue(MAX_PENDING_TURNS)
+        self.recording = None
+        # Set when a recording passes MAX_UPLOAD_BYTES; its remaining chunks are dropped
+        self.overflowed = False
+
+    def buffered_bytes(self) -> int:
+        """Audio held for this connection: the recording in progress and queued recordings"""
+        with self.turns.mutex:
+            queued = sum(len(job[1]) for job in self.turns.queue if job and job[0] == "audio")
+        recording = self.recording
+        return queued + (len(recording) if recording else 0)
+
+    def send_json(self, message: Dict):
+        with self.send_lock:
+            self.ws.send(json.dumps(message, ensure_ascii=False))
+
+    def serve(self):
+        """Receive loop; turns run on a worker thread so barge-in stays responsive"""
+        worker = threading.Thread(target=self._process_turns, daemon=True)
+        worker.start()
+
+        try:
+            while True:
+                message = self.ws.receive()
+                if message is None:
+                    break
+
+                if isinstance(message, (bytes, bytearray)):
+                    self._receive_audio(message)
+                else:
+                    self._receive_text_frame(message)
+        except Exception as e:
+            # ConnectionClosed and friends end the conversation
+            logger.info("WebSocket closed: %s", e)
+        finally:
+            self.closed.set()
+            self.cancel_audio.set()
+            self.turns.put(None)
+
+    def _receive_text_frame(self, frame: str):
+        """Decode a control message; a malformed one is answered, not fatal"""
+        try:
+            message = json.loads(frame)
+        except ValueError:
+            self.send_json({"type": "error", "error": "Control messages must be JSON"})
+            return
+
+        if not isinstance(message, dict):
+            self.send_json({"type": "error", "error": "Control messages must be JSON objects"})
+            return
+
+        self._receive_control(message)
+
+    def _receive_control(self, message: Dict):
+        kind = message.get("type")
+
+        if kind == "start":
+            self.session_id = self.open_session(message.get("session_id"))
+            bind_session(self.session_id)
+            self.send_json({"type": "session", "session_id": self.session_id})
+            return
+
+        if self.session_id is None:
+            self.send_json({"type": "error", "error": "Send a start message first"})
+            return
+
+        if kind == "text":
+            text = message.get("text")
+            text = text.strip() if isinstance(text, str) else ""
+            if text:
+                self.cancel_audio.set()
+                self._enqueue(("text", text))
+        elif kind == "audio_start":
+            self.cancel_audio.set()
+            self.recording = bytearray()
+            self.overflowed = False
+        elif kind == "audio_end":
+            if self.recording and not self.overflowed:
+                self._enqueue(("audio", bytes(self.recording)))
+            self.recording = None
+            self.overflowed = False
+        elif kind == "barge_in":
+            self.cancel_audio.set()
+        else:
+            self.send_json({"type": "error", "error": f"Unknown message type: {kind}"})
+
+    def _receive_audio(self, chunk: bytes):
+        if self.overflowed:
+            return
+
+        if self.recording is None:
+            self.recording = bytearray()
+
+        if len(self.recording) + len(chunk) > MAX_UPLOAD_BYTES:
+            # The tail alone is a headerless WebM fragment; drop it until the next recording
+            self.recording = None
+            self.overflowed = True
+            self.send_json({"type": "error", "error": "Recording too long"})
+            return
+
+        self.recording.extend(chunk)
+
+    def _enqueue(self, job):
+        try:
+            self.turns.put_nowait(job)
+        except queue.Full:
+            self.send_json({"type": "error", "error": "Still processing previous turns", "retry_after": 1})
+
+    def _process_turns(self):
+        """Run queued turns one at a time (the session's agent is not thread-safe)"""
+        while True:
+            job = self.turns.get()
+            if job is None:
+                return
+            if self.closed.is_set():
+                continue
+
+            self.cancel_audio.clear()
+            try:
+                with start_trace("ws.turn", {"session.id": self.session_id, "turn.input": job[0]}):
+                    self._run_job(*job)
+            except Overloaded as e:
+                logger.warning("Turn shed: %s", e)
+                self._send_safely({"type": "error", "error": "Server busy, please retry",
+                                   "stage": e.stage, "retry_after": e.retry_after})
+            except Exception as e:
+                logger.exception("WebSocket turn error")
+                self._send_safely({"type": "error", "error": str(e)})
+
+    def _send_safely(self, message: Dict):
+        try:
+            self.send_json(message)
+        except Exception:
+            pass
+
+    def _run_job(self, kind: str, payload):
+        bind_session(self.session_id)
+        confidence = None
+
+        if kind == "audio":
+            try:
+                text, confidence = self.transcribe(payload, self.session_id)
+            except Overloaded:
+                raise
+            except Exception as e:
+                logger.error("STT error: %s", e)
+                self.send_json({"type": "error", "error": "Speech recognition failed"})
+                return
+
+            if not text:
+                self.send_json({"type": "error", "error": "Could not understand speech"})
+                return
+
+            self.send_json({"type": "transcript", "text": text, "confidence": float(confidence)})
+        else:
+            text = payload
+
+        result = self.run_turn(self.session_id, text, confidence)
+
+        self.send_json({
+            "type": "response",
+            "agent_response": result["agent_response"],
+            "turn_number": result["turn"],
+            "metadata": result["metadata"]
+        })
+
+        if not result["audio_file"]:
+            return
+
+        url = self.precached_url(result["audio_digest"]) if self.precached_url else None
+        if url:
+            self.send_json({"type": "audio_ref", "turn_number": result["turn"], "url": url})
+        else:
+            self._stream_audio(result["turn"], result["audio_file"])
+
+    def _stream_audio(self, turn: int, audio_file: str):
+        """Send the response audio in chunks, stopping early on barge-in"""
+        with open(audio_file, "rb") as f:
+            audio = f.read()
+
+        self.send_json({"type": "audio", "turn_number": turn, "format": "wav", "bytes": len(audio)})
+
+        cancelled = False
+        for offset in range(0, len(audio), AUDIO_CHUNK_BYTES):
+            if self.cancel_audio.is_set():
+                cancelled = True
+                break
+            with self.send_lock:
+                self.ws.send(audio[offset:offset + AUDIO_CHUNK_BYTES])
+
+        self.send_json({"type": "audio_end", "turn_number": turn, "cancelled": cancelled})
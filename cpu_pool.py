@@ -0,0 +1,216 @@
+"""
+Process Pool for CPU-Bound Stages
+Pure-Python work holds the GIL and stalls every other session's request
+thread for its duration. Stages that can be large are sent to a pool of
+worker processes, and the request thread only waits on a future:
+
+- bulk eligibility: each chunk of uploaded rows is normalized and matched in
+  a worker, with several chunks in flight and results yielded in order
+- full catalog scans: a profile's whole-catalog score, once the catalog is
+  large enough that a scan costs more than the round trip
+- WAV stitching of parallel TTS segments (file paths in, nothing out)
+
+The workers are forked when app.py is imported, before logging, tracing, the
+voice clients or any other thread has started. A fork taken while those run
+can copy a held lock or live gRPC state into the child. The catalog is not
+loaded yet at that point, so each worker loads and compiles it from its path;
+with SHARED_CATALOG the workers attach to the same memory-mapped file as the
+gunicorn workers. Tasks carry only compact inputs (prepared profile tuples,
+row chunks or file paths) plus the parent's catalog version, and a worker
+reloads its copy when the parent has reloaded since.
+
+If a worker dies, the pool is not re-forked: the process is threaded by then.
+Every stage falls back to running inline, and /health shows the pool as
+broken until the server process restarts.
+
+With gunicorn, every worker process has its own pool, so the total is
+workers x CPU_POOL_WORKERS processes.
+
+Environment:
+    CPU_POOL_WORKERS       Worker processes (default 0: everything runs inline)
+    CPU_POOL_MIN_SCHEMES   Catalog size from which per-turn full scans are offloaded (default 5000)
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from agent_gemini import SchemeDatabase
+from bulk_eligibility import match_chunk
+from eligibility_compiler import PreparedProfile
+from parallel_tts import stitch_wavs
+
+
+logger = logging.getLogger(__name__)
+
+# Worker-side state, set by _init_worker in each forked process
+_database = None
+_loaded_version = None
+
+
+def _init_worker(schemes_path: str, shared_catalog_path: Optional[str]):
+    global _database, _loaded_version
+    _database = SchemeDatabase(schemes_path, shared_catalog_path=shared_catalog_path)
+    # The parent's first load of the same catalog is also version 1
+    _loaded_version = _database.version
+
+
+def _current_database(version: int) -> SchemeDatabase:
+    """The worker's catalog, reloaded if the parent has reloaded since"""
+    global _loaded_version
+    if version != _loaded_version:
+        _database.reload()
+        _loaded_version = version
+    return _database
+
+
+def _ready() -> int:
+    return os.getpid()
+
+
+def _score(version: int, prepared: PreparedProfile) -> List[Tuple[int, int, List[str]]]:
+    return _current_database(version).score_prepared(prepared)
+
+
+def _match_chunk(version: int, chunk) -> List[str]:
+    return list(match_chunk(_current_database(version), chunk))
+
+
+class CpuPool:
+    """Worker processes forked before any thread starts, each with its own compiled catalog"""
+
+    def __init__(self, schemes_path: str, workers: int, shared_catalog_path: Optional[str] = None,
+                 min_schemes: int = 5000):
+        """
+        Args:
+            schemes_path: Catalog JSON the workers load
+            workers: Worker processes
+            shared_catalog_path: Memory-mapped catalog to attach to instead (see shared_catalog.py)
+            min_schemes: Catalog size from which per-turn scans are offloaded
+        """
+        self.workers = workers
+        self.min_schemes = min_schemes
+        self.max_in_flight = workers * 2
+
+        self.lock = threading.Lock()
+        self.counters = {"scans": 0, "bulk_chunks": 0, "stitches": 0, "inline_fallbacks": 0}
+
+        self.executor = ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context("fork"),
+            initializer=_init_worker, initargs=(schemes_path, shared_catalog_path)
+        )
+        # With fork, the first submit forks every worker, here and now
+        self.executor.submit(_ready)
+
+    @classmethod
+    def from_env(cls, schemes_path: str, shared_catalog_path: Optional[str] = None) -> Optional["CpuPool"]:
+        """
+        Pool configured from the environment, or None when disabled or fork is unavailable
+
+        Call before anything in the process starts a thread.
+        """
+        workers = int(os.getenv("CPU_POOL_WORKERS", "0"))
+        if workers <= 0:
+            return None
+        if "fork" not in multiprocessing.get_all_start_methods():
+            logger.warning("CPU pool needs the fork start method; running CPU stages inline")
+            return None
+        return cls(
+            schemes_path, workers, shared_catalog_path=shared_catalog_path,
+            min_schemes=int(os.getenv("CPU_POOL_MIN_SCHEMES", "5000"))
+        )
+
+    @property
+    def available(self) -> bool:
+        return self.executor is not None
+
+    def _count(self, name: str):
+        with self.lock:
+            self.counters[name] += 1
+
+    def _broken(self, executor: ProcessPoolExecutor):
+        """Stop using a pool whose worker died; callers run inline from now on"""
+        with self.lock:
+            if executor is not None and self.executor is executor:
+                logger.error("CPU pool worker died; running CPU stages inline until restart")
+                executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = None
+
+    def _submit(self, fn, *args):
+        """Future for a task, or None if the pool is broken"""
+        executor = self.executor
+        if executor is None:
+            return None
+        try:
+            return executor.submit(fn, *args)
+        except BrokenProcessPool:
+            self._broken(executor)
+            return None
+
+    def _result(self, future, fallback, *args):
+        """A task's result, or the fallback run inline if the pool broke under it"""
+        if future is not None:
+            try:
+                return future.result()
+            except BrokenProcessPool:
+                self._broken(self.executor)
+        self._count("inline_fallbacks")
+        return fallback(*args)
+
+    def offloads_scan(self, scheme_count: int) -> bool:
+        return self.available and scheme_count >= self.min_schemes
+
+    def score(self, database: SchemeDatabase, prepared: PreparedProfile) -> List[Tuple[int, int, List[str]]]:
+        """Whole-catalog score of a prepared profile, computed in a worker"""
+        self._count("scans")
+        future = self._submit(_score, database.version, prepared)
+        return self._result(future, database.score_prepared, prepared)
+
+    def match_chunks(self, database: SchemeDatabase, chunks: Iterable[list]) -> Iterator[str]:
+        """
+        Bulk-match row chunks in workers, yielding result lines in input order
+
+        Up to two chunks per worker are in flight, so reading the upload
+        overlaps with matching and memory stays bounded.
+        """
+        pending = deque()
+
+        def finish_oldest():
+            chunk, future = pending.popleft()
+            return self._result(future, lambda: list(match_chunk(database, chunk)))
+
+        try:
+            for chunk in chunks:
+                self._count("bulk_chunks")
+                pending.append((chunk, self._submit(_match_chunk, database.version, chunk)))
+                if len(pending) >= self.max_in_flight:
+                    yield from finish_oldest()
+
+            while pending:
+                yield from finish_oldest()
+        finally:
+            # Client went away mid-stream
+            for _, future in pending:
+                if future is not None:
+                    future.cancel()
+
+    def stitch(self, paths: List[str], output_file: str, pause_ms: int):
+        """Concatenate WAV segments in a worker (see parallel_tts.stitch_wavs)"""
+        self._count("stitches")
+        future = self._submit(stitch_wavs, paths, output_file, pause_ms)
+        self._result(future, stitch_wavs, paths, output_file, pause_ms)
+
+    def stats(self):
+        with self.lock:
+            counters = dict(self.counters)
+        return {"workers": self.workers, "min_schemes": self.min_schemes, "broken": not self.available, **counters}
+
+    def shutdown(self):
+        executor = self.executor
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,250 @@
+"""
+Eligibility Rule Compiler
+Turns each scheme's eligibility dict into a generated Python function at
+catalog load, so matching no longer re-interprets the dict on every call.
+
+A compiled rule only tests the fields its scheme actually uses, with the
+scheme's constants (lowercased state, occupation set, age bounds) baked in.
+Rejection checks run first, ordered by how much of the profile space each
+one rejects, so most schemes are ruled out by their first comparison. The
+profile is normalized once per scan with prepare_profile() rather than
+once per scheme.
+
+Compiled rules must return exactly what SchemeDatabase._calculate_eligibility
+returns for every eligible result. When several checks fail, the rejection
+reason may name a different check than the interpreter's (neither path
+exposes rejected schemes). Run this module to verify the two paths agree
+over the bucketed profile space and randomized edge cases:
+
+    python eligibility_compiler.py [schemes_database.json]
+
+tests/test_eligibility_compiler.py runs the same check under pytest.
+"""
+
+import random
+import sys
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+# (age, state, occupation, gender, income) with falsy fields as None and strings lowercased
+PreparedProfile = Tuple[Optional[int], Optional[str], Optional[str], Optional[str], Optional[int]]
+CompiledRule = Callable[..., Tuple[int, List[str]]]
+
+REASON_AGE_OK = "వయస్సు అర్హత సరిపోతుంది"
+REASON_STATE_OK = "రాష్ట్ర అర్హత సరిపోతుంది"
+REASON_OCCUPATION_OK = "వృత్తి అర్హత సరిపోతుంది"
+REASON_INCOME_OK = "ఆదాయం పరిమితిలో ఉంది"
+
+REJECT_AGE_LOW = "వయస్సు తక్కువ"
+REJECT_AGE_HIGH = "వయస్సు మించింది"
+REJECT_STATE = "రాష్ట్రం సరిపోలేదు"
+REJECT_OCCUPATION = "వృత్తి సరిపోలేదు"
+REJECT_OCCUPATION_MISSING = "వృత్తి సమాచారం కావాలి"
+REJECT_GENDER = "లింగం సరిపోలేదు"
+
+AGE_DOMAIN = range(1, 121)
+
+
+def prepare_profile(profile: Dict) -> PreparedProfile:
+    """Normalize a profile once for every compiled rule in a scan"""
+    state = profile.get("state")
+    occupation = profile.get("occupation")
+    gender = profile.get("gender")
+
+    return (
+        profile.get("age") or None,
+        state.lower() if state else None,
+        occupation.lower() if occupation else None,
+        gender.lower() if gender else None,
+        profile.get("income") or None,
+    )
+
+
+def _rejection_rate(matches: Callable, domain: Iterable) -> float:
+    values = list(domain)
+    if not values:
+        return 0.0
+    return sum(1 for value in values if not matches(value)) / len(values)
+
+
+def compile_eligibility(eligibility: Dict, domains: Dict[str, Iterable]) -> CompiledRule:
+    """
+    Generate a specialized rule function for one scheme's eligibility dict
+
+    Args:
+        eligibility: Scheme eligibility rules
+        domains: Known values of "state", "occupation" and "gender" (None
+            for "not provided"), used to estimate how selective each check is
+
+    Returns:
+        Function of the prepare_profile() fields returning (score, reasons)
+    """
+    constants = {}
+    checks = []        # (rejection rate, source lines)
+
+    def constant(value):
+        name = f"C{len(constants)}"
+        constants[name] = value
+        return name
+
+    age_min = eligibility.get("age_min")
+    age_max = eligibility.get("age_max")
+    state = eligibility.get("state")
+    occupations = eligibility.get("occupation")
+    gender = eligibility.get("gender")
+    income_max = eligibility.get("income_max")
+
+    if age_min is not None:
+        checks.append((
+            _rejection_rate(lambda age: age >= age_min, AGE_DOMAIN),
+            [f"if age is not None and age < {constant(age_min)}:",
+             f"    return 0, [{constant(REJECT_AGE_LOW)}]"],
+        ))
+
+    if age_max is not None:
+        checks.append((
+            _rejection_rate(lambda age: age <= age_max, AGE_DOMAIN),
+            [f"if age is not None and age > {constant(age_max)}:",
+             f"    return 0, [{constant(REJECT_AGE_HIGH)}]"],
+        ))
+
+    scheme_state = state.lower() if state else None
+    if scheme_state and scheme_state != "all india":
+        name = constant(scheme_state)
+        checks.append((
+            _rejection_rate(lambda value: not value or value.lower() in scheme_state, domains["state"]),
+            [f"if state is not None and state not in {name}:",
+             f"    return 0, [{constant(REJECT_STATE)}]"],
+        ))
+
+    if occupations:
+        allowed = frozenset(o.lower() for o in occupations)
+        checks.append((
+            _rejection_rate(lambda value: bool(value) and value.lower() in allowed, domains["occupation"]),
+            ["if occupation is None:",
+             f"    return 0, [{constant(REJECT_OCCUPATION_MISSING)}]",
+             f"if occupation not in {constant(allowed)}:",
+             f"    return 0, [{constant(REJECT_OCCUPATION)}]"],
+        ))
+
+    scheme_gender = gender.lower() if gender else None
+    if scheme_gender:
+        checks.append((
+            _rejection_rate(lambda value: not value or value.lower() == scheme_gender, domains["gender"]),
+            [f"if gender is not None and gender != {constant(scheme_gender)}:",
+             f"    return 0, [{constant(REJECT_GENDER)}]"],
+        ))
+
+    # Most selective first; ties keep the interpreter's order
+    checks.sort(key=lambda check: -check[0])
+
+    body = [line for _, lines in checks for line in lines]
+
+    # Every check passed: weights of provided fields count towards the score
+    static_max = (25 if state else 0) + (25 if occupations else 0) + (10 if gender else 0) + (15 if income_max else 0)
+    age_weight = (25 if age_min is not None else 0) + (25 if age_max is not None else 0)
+
+    body += ["score = 0", "reasons = []", f"max_score = {static_max}"]
+
+    if age_weight:
+        body += ["if age is not None:",
+                 f"    max_score += {age_weight}",
+                 f"    score += {age_weight}"]
+        if age_max is not None:
+            body.append(f"    reasons.append({constant(REASON_AGE_OK)})")
+
+    if state:
+        body += ["if state is not None:",
+                 "    score += 25",
+                 f"    reasons.append({constant(REASON_STATE_OK)})"]
+
+    if occupations:
+        body += ["score += 25", f"reasons.append({constant(REASON_OCCUPATION_OK)})"]
+
+    if gender:
+        body += ["if gender is not None:", "    score += 10"]
+
+    if income_max:
+        body += [f"if income is not None and income <= {constant(income_max)}:",
+                 "    score += 15",
+                 f"    reasons.append({constant(REASON_INCOME_OK)})"]
+
+    if static_max or age_weight:
+        body += ["if max_score > 0:",
+                 "    return int((score / max_score) * 100), reasons"]
+    body.append("return 0, []")
+
+    source = "def rule(age, state, occupation, gender, income):\n" + "".join(f"    {line}\n" for line in body)
+    namespace = dict(constants)
+    exec(compile(source, "<eligibility rule>", "exec"), namespace)
+
+    rule = namespace["rule"]
+    rule.source = source
+    return rule
+
+
+def _sample_profiles(domains: Dict[str, Iterable], samples: int, seed: int) -> List[Dict]:
+    """Profiles across the bucket space plus off-catalog values and boundaries"""
+    rng = random.Random(seed)
+
+    states = list(domains["state"]) + ["telangana", "TELANGANA", "andhra", "Karnataka", ""]
+    occupations = list(domains["occupation"]) + ["FARMER", "agriculture", "teacher", ""]
+    genders = list(domains["gender"]) + ["Female", "other", ""]
+    ages = [None, 0, 1, 9, 10, 11, 12, 14, 17, 18, 25, 26, 59, 60, 64, 65, 66, 120]
+    incomes = [None, 0, 1, 100000, 149999, 150000, 150001, 200000, 200001, 500000, 500001, 10 ** 7]
+
+    profiles = [{"state": state, "occupation": occupation, "gender": gender, "age": age, "income": income}
+                for state in states for occupation in occupations for gender in genders
+                for age in (None, 18, 70) for income in (None, 100000)]
+
+    for _ in range(samples):
+        profiles.append({
+            "state": rng.choice(states),
+            "occupation": rng.choice(occupations),
+            "gender": rng.choice(genders),
+            "age": rng.choice(ages) if rng.random() < 0.7 else rng.randint(1, 120),
+            "income": rng.choice(incomes) if rng.random() < 0.7 else rng.randint(1, 10 ** 6),
+        })
+
+    return profiles
+
+
+def verify(database, samples: int = 20000, seed: int = 0) -> List[str]:
+    """
+    Differential check of compiled rules against the interpreter
+
+    Returns:
+        Descriptions of mismatches (empty when the paths agree)
+    """
+    mismatches = []
+
+    for profile in _sample_profiles(database.rule_domains(), samples, seed):
+        prepared = prepare_profile(profile)
+
+        for index, rule in enumerate(database.compiled_rules):
+            expected = database._calculate_eligibility(database.eligibility_rules(index), profile)
+            actual = rule(*prepared)
+
+            # Rejections agree on the score; reasons only matter for results that are kept
+            if actual[0] != expected[0] or (expected[0] > 0 and actual[1] != expected[1]):
+                mismatches.append(f"scheme {index} profile {profile}: compiled {actual} != interpreted {expected}")
+
+    return mismatches
+
+
+def main():
+    from agent_gemini import SchemeDatabase
+
+    path = sys.argv[1] if len(sys.argv) > 1 else "schemes_database.json"
+    database = SchemeDatabase(path)
+
+    mismatches = verify(database)
+    for mismatch in mismatches[:20]:
+        print(mismatch)
+
+    print(f"{len(database.compiled_rules)} compiled rules, {len(mismatches)} mismatches")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
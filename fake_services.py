@@ -0,0 +1,142 @@
+"""
+Local Stand-ins for Gemini and Google Speech
+Injectable replacements for ResponseGenerator and GoogleSpeechService with
+configurable latency distributions and error rates, for load testing
+without spending API quota. Enabled in app.py with FAKE_UPSTREAMS=true.
+
+Environment:
+    FAKE_LLM_LATENCY_MS   "median,p99" for Gemini calls     (default 800,2500)
+    FAKE_STT_LATENCY_MS   "median,p99" for recognition      (default 400,1200)
+    FAKE_TTS_LATENCY_MS   "median,p99" for synthesis        (default 300,900)
+    FAKE_ERROR_RATE       Probability each upstream call fails (default 0.01)
+"""
+
+import logging
+import math
+import os
+import random
+import time
+import wave
+from typing import Dict, Tuple
+
+from agent_gemini import GENERATION_ERROR_RESPONSE
+from tracing import span
+from voice_pipeline import VoiceConfig
+
+
+logger = logging.getLogger(__name__)
+
+# Voice uploads whose body starts with this marker are "recognized" as the text after it
+FAKE_STT_PREFIX = b"FAKE-STT:"
+
+# 2.326 standard deviations above the mean of a normal is its 99th percentile
+Z_99 = 2.326
+
+
+class LatencyModel:
+    """Log-normal latency described by its median and 99th percentile"""
+
+    def __init__(self, median_ms: float, p99_ms: float):
+        self.median = median_ms / 1000.0
+        self.sigma = math.log(max(p99_ms, median_ms) / median_ms) / Z_99 if median_ms > 0 else 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        """Parse "median,p99" in milliseconds"""
+        median, p99 = (float(part) for part in spec.split(","))
+        return cls(median, p99)
+
+    def sample(self) -> float:
+        """Draw one latency in seconds"""
+        if self.median <= 0:
+            return 0.0
+        return self.median * math.exp(self.sigma * random.gauss(0, 1))
+
+    def sleep(self):
+        time.sleep(self.sample())
+
+
+class FakeResponseGenerator:
+    """Stands in for ResponseGenerator: canned Telugu after a simulated Gemini delay"""
+
+    def __init__(self, latency: LatencyModel, error_rate: float):
+        self.latency = latency
+        self.error_rate = error_rate
+
+    def generate_response(self, context: str, task: str, user_input: str) -> str:
+        # Same span names as the real services, so offline traces have the production shape
+        with span("gemini.generate", {"llm.model": "fake"}):
+            self.latency.sleep()
+
+        # Real generator swallows API errors and returns an apology
+        if random.random() < self.error_rate:
+            return GENERATION_ERROR_RESPONSE
+
+        return "మీకు ఈ పథకాలు సరిపోతాయి. ఏ పథకం గురించి తెలుసుకోవాలనుకుంటున్నారు?"
+
+
+class FakeSpeechService:
+    """Stands in for GoogleSpeechService"""
+
+    def __init__(self, stt_latency: LatencyModel, tts_latency: LatencyModel, error_rate: float):
+        self.stt_latency = stt_latency
+        self.tts_latency = tts_latency
+        self.error_rate = error_rate
+
+    def _recognize(self, audio_data: bytes, hints: Tuple) -> Tuple[str, float]:
+        with span("speech.recognize", {"audio.bytes": len(audio_data), "stt.hint_sets": len(hints)}):
+            self.stt_latency.sleep()
+
+        if random.random() < self.error_rate:
+            raise RuntimeError("Simulated STT failure")
+
+        if audio_data.startswith(FAKE_STT_PREFIX):
+            return audio_data[len(FAKE_STT_PREFIX):].decode("utf-8"), 0.95
+        return "", 0.0
+
+    def speech_to_text(self, audio_data: bytes, hints: Tuple = ()) -> Tuple[str, float]:
+        try:
+            return self._recognize(audio_data, hints)
+        except RuntimeError as e:
+            logger.error("STT error: %s", e)
+            return "", 0.0
+
+    def transcribe_webm(self, audio_data: bytes, hints: Tuple = ()) -> Tuple[str, float]:
+        return self._recognize(audio_data, hints)
+
+    def text_to_speech(self, text: str, output_file: str = "output.wav") -> bool:
+        with span("speech.synthesize", {"tts.chars": len(text)}):
+            self.tts_latency.sleep()
+
+        if random.random() < self.error_rate:
+            logger.error("TTS error: Simulated TTS failure")
+            return False
+
+        # Silence roughly as long as the text would take to speak
+        frames = int(VoiceConfig.SAMPLE_RATE * min(len(text) * 0.06, 30))
+        with wave.open(output_file, "wb") as out:
+            out.setnchannels(VoiceConfig.CHANNELS)
+            out.setsampwidth(2)
+            out.setframerate(VoiceConfig.SAMPLE_RATE)
+            out.writeframes(b"\0\0" * frames)
+
+        return True
+
+    def pool_stats(self) -> Dict:
+        return {"fake": True}
+
+
+def from_env() -> Tuple[FakeResponseGenerator, FakeSpeechService]:
+    """Build fakes configured from environment variables"""
+    error_rate = float(os.getenv("FAKE_ERROR_RATE", "0.01"))
+
+    generator = FakeResponseGenerator(
+        LatencyModel.parse(os.getenv("FAKE_LLM_LATENCY_MS", "800,2500")), error_rate
+    )
+    speech_service = FakeSpeechService(
+        LatencyModel.parse(os.getenv("FAKE_STT_LATENCY_MS", "400,1200")),
+        LatencyModel.parse(os.getenv("FAKE_TTS_LATENCY_MS", "300,900")),
+        error_rate
+    )
+
+    return generator, speech_service
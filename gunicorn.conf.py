@@ -0,0 +1,39 @@
+"""
+Gunicorn configuration
+With SHARED_CATALOG=true the master builds the scheme catalog once into a
+memory-mapped file before forking, and every worker attaches to it.
+"""
+
+import os
+
+from shared_catalog import build_shared_catalog, default_shared_path
+
+
+# Threaded workers: each open /ws/conversation socket holds a thread, not a whole worker
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+
+# Catalog file built by on_starting, if any; an operator-supplied file is never removed
+_built_catalog_path = None
+
+
+def on_starting(server):
+    """Build the shared catalog in the master process"""
+    global _built_catalog_path
+
+    if os.getenv("SHARED_CATALOG", "False").lower() != "true":
+        return
+
+    schemes_path = os.getenv("SCHEMES_PATH", "schemes_database.json")
+    path = build_shared_catalog(schemes_path, default_shared_path())
+    _built_catalog_path = path
+
+    # Workers inherit the environment and attach in initialize()
+    os.environ["SHARED_CATALOG_PATH"] = path
+    server.log.info(f"Built shared scheme catalog at {path}")
+
+
+def on_exit(server):
+    """Remove the shared catalog file built by on_starting"""
+    if _built_catalog_path and os.path.exists(_built_catalog_path):
+        os.remove(_built_catalog_path)
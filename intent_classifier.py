@@ -0,0 +1,275 @@
+"""
+Local Intent Classifier for Follow-up Turns
+Character n-gram Naive Bayes over Telugu, English and romanized Telugu
+utterances. Once schemes are presented, the agent uses it to answer routine
+turns ("yes", "how do I apply", "no thanks", "my age is wrong") without
+calling Gemini. Only open scheme questions, or anything the model is unsure
+about, fall through to search and the LLM.
+
+Character n-grams cope with Telugu inflection and with typos in transcripts,
+and the trained model is a small JSON artifact of n-gram counts.
+
+Training data is JSON lines of {"text": ..., "intent": ...}. The seed set
+ships as intent_seed.jsonl; labelled transcripts from the turn logs can be
+appended to it.
+
+Usage:
+    python intent_classifier.py train intent_seed.jsonl [more.jsonl] -o intent_model.json
+    python intent_classifier.py evaluate intent_seed.jsonl      # leave-one-out accuracy and coverage
+    python intent_classifier.py replay                          # Gemini calls per scripted session
+
+Environment:
+    INTENT_MODEL_PATH       Trained artifact (default intent_model.json; missing disables the classifier)
+    INTENT_MIN_CONFIDENCE   Posterior below which routing falls back to keywords (default 0.7)
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+
+SCHEME_QUESTION = "scheme_question"
+APPLY_REQUEST = "apply_request"
+AFFIRMATION = "affirmation"
+NEGATION = "negation"
+PROFILE_CORRECTION = "profile_correction"
+OFF_TOPIC = "off_topic"
+
+INTENTS = (SCHEME_QUESTION, APPLY_REQUEST, AFFIRMATION, NEGATION, PROFILE_CORRECTION, OFF_TOPIC)
+
+NGRAM_RANGE = (2, 4)
+
+# Mean per-n-gram log-likelihoods are multiplied by this before the softmax;
+# raw Naive Bayes sums are far too confident to threshold
+TEMPERATURE = 6.0
+
+# Below this fraction of known n-grams the utterance is treated as unseen
+MIN_COVERAGE = 0.5
+
+NON_WORD = re.compile(r'[^\u0C00-\u0C7Fa-z0-9]+')
+DIGITS = re.compile(r'[0-9][0-9,]*')
+
+
+class Intent(NamedTuple):
+    label: str
+    confidence: float
+
+
+def normalize(text: str) -> str:
+    """Lowercase, numbers to 0, punctuation to spaces, padded so n-grams see word edges"""
+    text = DIGITS.sub("0", text.lower())
+    return " " + NON_WORD.sub(" ", text).strip() + " "
+
+
+def ngrams(text: str) -> List[str]:
+    """Distinct character n-grams (presence, not frequency, so long utterances don't dominate)"""
+    padded = normalize(text)
+    low, high = NGRAM_RANGE
+    return list(dict.fromkeys(padded[i:i + n] for n in range(low, high + 1) for i in range(len(padded) - n + 1)))
+
+
+class IntentClassifier:
+    """Multinomial Naive Bayes over character n-grams"""
+
+    def __init__(self, counts: Dict[str, Dict[str, int]], priors: Dict[str, int],
+                 min_confidence: float = 0.7, alpha: float = 0.5):
+        """
+        Args:
+            counts: label -> n-gram -> occurrences in training utterances
+            priors: label -> training utterances
+            min_confidence: Posterior a prediction needs to be acted on
+            alpha: Additive smoothing
+        """
+        self.counts = counts
+        self.priors = priors
+        self.min_confidence = min_confidence
+        self.labels = sorted(priors)
+
+        vocabulary = set()
+        for label_counts in counts.values():
+            vocabulary.update(label_counts)
+        self.vocabulary = vocabulary
+
+        total_utterances = sum(priors.values())
+        self.log_priors = {label: math.log(priors[label] / total_utterances) for label in self.labels}
+
+        # Log-likelihood per label for every known n-gram
+        self.log_likelihoods = {}
+        for label in self.labels:
+            label_counts = counts.get(label, {})
+            denominator = sum(label_counts.values()) + alpha * len(vocabulary)
+            self.log_likelihoods[label] = {
+                gram: math.log((label_counts.get(gram, 0) + alpha) / denominator) for gram in vocabulary
+            }
+
+    @classmethod
+    def train(cls, examples: Iterable[Tuple[str, str]], min_count: int = 1, **kwargs) -> "IntentClassifier":
+        """Fit from (text, intent) pairs; n-grams seen fewer than min_count times overall are dropped"""
+        counts = defaultdict(Counter)
+        priors = Counter()
+
+        for text, label in examples:
+            if label not in INTENTS:
+                raise ValueError(f"Unknown intent {label!r}")
+            counts[label].update(ngrams(text))
+            priors[label] += 1
+
+        if min_count > 1:
+            overall = Counter()
+            for label_counts in counts.values():
+                overall.update(label_counts)
+            for label_counts in counts.values():
+                for gram in [gram for gram in label_counts if overall[gram] < min_count]:
+                    del label_counts[gram]
+
+        return cls({label: dict(c) for label, c in counts.items()}, dict(priors), **kwargs)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "IntentClassifier":
+        with open(path, encoding="utf-8") as f:
+            artifact = json.load(f)
+        return cls(artifact["counts"], artifact["priors"], **kwargs)
+
+    @classmethod
+    def from_env(cls) -> Optional["IntentClassifier"]:
+        """Classifier from INTENT_MODEL_PATH, or None when no model has been trained"""
+        path = os.getenv("INTENT_MODEL_PATH", "intent_model.json")
+        if not os.path.exists(path):
+            return None
+        return cls.load(path, min_confidence=float(os.getenv("INTENT_MIN_CONFIDENCE", "0.7")))
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"ngram_range": NGRAM_RANGE, "priors": self.priors, "counts": self.counts},
+                      f, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+
+    def posteriors(self, text: str) -> Dict[str, float]:
+        """Probability of each intent (empty when the utterance is mostly unseen n-grams)"""
+        grams = ngrams(text)
+        known = [gram for gram in grams if gram in self.vocabulary]
+        if not grams or len(known) < MIN_COVERAGE * len(grams):
+            return {}
+
+        scores = {}
+        for label in self.labels:
+            likelihoods = self.log_likelihoods[label]
+            mean = sum(likelihoods[gram] for gram in known) / len(known)
+            scores[label] = self.log_priors[label] + TEMPERATURE * mean
+
+        top = max(scores.values())
+        exps = {label: math.exp(score - top) for label, score in scores.items()}
+        total = sum(exps.values())
+        return {label: value / total for label, value in exps.items()}
+
+    def classify(self, text: str) -> Optional[Intent]:
+        """Most likely intent, whatever its confidence"""
+        posteriors = self.posteriors(text)
+        if not posteriors:
+            return None
+        label = max(posteriors, key=posteriors.get)
+        return Intent(label, posteriors[label])
+
+    def predict(self, text: str) -> Optional[Intent]:
+        """Intent confident enough to route on, else None"""
+        intent = self.classify(text)
+        if intent is None or intent.confidence < self.min_confidence:
+            return None
+        return intent
+
+
+def read_examples(paths: List[str]) -> List[Tuple[str, str]]:
+    examples = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    examples.append((record["text"], record["intent"]))
+    return examples
+
+
+def evaluate(examples: List[Tuple[str, str]], min_confidence: float) -> Dict:
+    """Leave-one-out accuracy, and precision/coverage of predictions above the threshold"""
+    correct = confident = confident_correct = 0
+
+    for index, (text, label) in enumerate(examples):
+        model = IntentClassifier.train(examples[:index] + examples[index + 1:], min_confidence=min_confidence)
+        intent = model.classify(text)
+        if intent and intent.label == label:
+            correct += 1
+        if intent and intent.confidence >= min_confidence:
+            confident += 1
+            confident_correct += intent.label == label
+
+    return {
+        "examples": len(examples),
+        "accuracy": round(correct / len(examples), 3),
+        "coverage": round(confident / len(examples), 3),
+        "confident_precision": round(confident_correct / confident, 3) if confident else None,
+    }
+
+
+class CountingGenerator:
+    """Stand-in for the Gemini generator that only counts calls"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate_response(self, context: str, task: str, user_input: str) -> str:
+        self.calls += 1
+        return "మీకు ఈ పథకాలు సరిపోతాయి. ఏ పథకం గురించి తెలుసుకోవాలనుకుంటున్నారు?"
+
+
+def replay(intents: Optional[IntentClassifier]) -> float:
+    """Mean Gemini calls per session over the load test's scripted conversations"""
+    from agent_gemini import TeluguSchemeAgent
+    from load_test import CONVERSATIONS
+
+    generator = CountingGenerator()
+    agent = TeluguSchemeAgent(None, "schemes_database.json", generator=generator, intents=intents)
+
+    for script in CONVERSATIONS:
+        session = agent.spawn()
+        for text in script:
+            session.process_input(text)
+
+    return generator.calls / len(CONVERSATIONS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train and evaluate the local intent classifier")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    train = commands.add_parser("train", help="Train the model artifact")
+    train.add_argument("data", nargs="+", help="JSONL files of {text, intent}")
+    train.add_argument("-o", "--output", default="intent_model.json")
+    train.add_argument("--min-count", type=int, default=1, help="Drop n-grams seen fewer times overall")
+
+    check = commands.add_parser("evaluate", help="Leave-one-out evaluation")
+    check.add_argument("data", nargs="+")
+    check.add_argument("--min-confidence", type=float, default=float(os.getenv("INTENT_MIN_CONFIDENCE", "0.7")))
+
+    commands.add_parser("replay", help="Gemini calls per scripted session with and without the model")
+
+    args = parser.parse_args()
+
+    if args.command == "train":
+        examples = read_examples(args.data)
+        IntentClassifier.train(examples, min_count=args.min_count).save(args.output)
+        print(f"Trained on {len(examples)} examples -> {args.output} ({os.path.getsize(args.output)} bytes)")
+    elif args.command == "evaluate":
+        print(json.dumps(evaluate(read_examples(args.data), args.min_confidence), indent=2))
+    else:
+        intents = IntentClassifier.from_env()
+        if intents is None:
+            sys.exit("No trained model; run the train command first")
+        print(f"Gemini calls per session: keywords only {replay(None):.2f}, with classifier {replay(intents):.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+"""
+Load Generator for the Telugu Voice Agent
+Drives scripted multi-turn Telugu conversations against a running server at a
+target concurrency and reports throughput, p50/p95/p99 latency and error rate
+per endpoint.
+
+Run the server with FAKE_UPSTREAMS=true so no Gemini or Speech quota is used;
+voice turns then upload "FAKE-STT:<text>" as the recording.
+
+Usage:
+    FAKE_UPSTREAMS=true python app.py
+    python load_test.py --concurrency 20 --duration 60
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import requests
+
+from fake_services import FAKE_STT_PREFIX
+
+
+# Each conversation is one session: profile questions, then scheme follow-ups
+CONVERSATIONS = [
+    [
+        "నా వయసు 35 సంవత్సరాలు",
+        "నేను తెలంగాణలో ఉంటాను",
+        "నేను రైతును",
+        "నా సంవత్సర ఆదాయం 80000 రూపాయలు",
+        "అవును, మొదటి పథకం గురించి చెప్పండి",
+        "ఎలా దరఖాస్తు చేయాలి?",
+    ],
+    [
+        "నేను 28 ఏళ్ల మహిళను, ఆంధ్రప్రదేశ్ లో ఉంటాను",
+        "నేను గృహిణిని",
+        "మా ఆదాయం 1,50,000",
+        "ఇల్లు కట్టుకోవడానికి ఏమైనా పథకం ఉందా?",
+        "దరఖాస్తు ఎలా చేయాలి?",
+    ],
+    [
+        "నా వయసు 19",
+        "నేను విద్యార్థిని, తెలంగాణ",
+        "మా కుటుంబ ఆదాయం 2 లక్షలు",
+        "చదువుకు స్కాలర్‌షిప్ ఉందా?",
+        "ధన్యవాదాలు",
+    ],
+    [
+        "నా వయసు 67 సంవత్సరాలు",
+        "ఆంధ్రప్రదేశ్",
+        "నేను పని చేయడం లేదు",
+        "ఆదాయం లేదు",
+        "పెన్షన్ గురించి చెప్పండి",
+    ],
+]
+
+PERCENTILES = (50, 95, 99)
+
+
+class Stats:
+    """Thread-safe latency and error recorder, keyed by endpoint"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.shed = defaultdict(int)
+
+    def record(self, endpoint: str, seconds: float, ok: bool, shed: bool = False):
+        with self.lock:
+            self.latencies[endpoint].append(seconds)
+            if shed:
+                self.shed[endpoint] += 1
+            elif not ok:
+                self.errors[endpoint] += 1
+
+    def report(self, elapsed: float) -> Dict:
+        """Summary per endpoint"""
+        summary = {}
+
+        with self.lock:
+            for endpoint, samples in sorted(self.latencies.items()):
+                ordered = sorted(samples)
+                row = {
+                    "requests": len(ordered),
+                    "throughput_rps": round(len(ordered) / elapsed, 2),
+                    "error_rate": round(self.errors[endpoint] / len(ordered), 4),
+                    "shed_rate": round(self.shed[endpoint] / len(ordered), 4),
+                }
+                for p in PERCENTILES:
+                    row[f"p{p}_ms"] = round(_percentile(ordered, p) * 1000, 1)
+                summary[endpoint] = row
+
+        return summary
+
+
+def _percentile(ordered: List[float], p: int) -> float:
+    """Nearest-rank percentile of sorted samples"""
+    if not ordered:
+        return 0.0
+    rank = max(1, int(round(p / 100.0 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class VirtualUser(threading.Thread):
+    """Runs conversations back to back until the deadline"""
+
+    def __init__(self, base_url: str, stats: Stats, deadline: float, voice_ratio: float, think_time: float):
+        super().__init__(daemon=True)
+        self.base_url = base_url.rstrip("/")
+        self.stats = stats
+        self.deadline = deadline
+        self.voice_ratio = voice_ratio
+        self.think_time = think_time
+        self.http = requests.Session()
+
+    def call(self, endpoint: str, method: str, path: str, **kwargs) -> Optional[requests.Response]:
+        """Issue one request and record its latency under the endpoint name"""
+        start = time.perf_counter()
+        shed = False
+        try:
+            response = self.http.request(method, self.base_url + path, timeout=60, **kwargs)
+            ok = response.status_code < 400
+            # Admission control turned the request away (429/503 with Retry-After)
+            shed = response.status_code in (429, 503)
+            if ok and response.headers.get("Content-Type", "").startswith("application/json"):
+                ok = response.json().get("status", "success") == "success"
+        except requests.RequestException:
+            response, ok = None, False
+
+        self.stats.record(endpoint, time.perf_counter() - start, ok, shed)
+        return response if ok else None
+
+    def run(self):
+        while time.time() < self.deadline:
+            self.converse(random.choice(CONVERSATIONS))
+
+    def converse(self, script: List[str]):
+        started = self.call("/api/start-session", "POST", "/api/start-session")
+        if started is None:
+            time.sleep(1)
+            return
+
+        session_id = started.json()["session_id"]
+
+        for text in script:
+            if time.time() >= self.deadline:
+                return
+
+            if random.random() < self.voice_ratio:
+                reply = self.call(
+                    "/api/voice-input", "POST", "/api/voice-input",
+                    data={"session_id": session_id},
+                    files={"audio": ("recording.webm", FAKE_STT_PREFIX + text.encode("utf-8"), "audio/webm")}
+                )
+            else:
+                reply = self.call(
+                    "/api/text-input", "POST", "/api/text-input",
+                    json={"session_id": session_id, "text": text}
+                )
+
+            if reply is not None:
+                audio_url = reply.json().get("audio_url")
+                if audio_url:
+                    self.call("/api/audio", "GET", audio_url)
+
+            time.sleep(random.uniform(0, 2 * self.think_time))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Telugu voice agent")
+    parser.add_argument("--url", default="http://localhost:5000", help="Server base URL")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=60, help="Test length in seconds")
+    parser.add_argument("--voice-ratio", type=float, default=0.5, help="Fraction of turns sent as audio")
+    parser.add_argument("--think-time", type=float, default=0.5, help="Mean pause between turns (seconds)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    stats = Stats()
+    start = time.time()
+    users = [
+        VirtualUser(args.url, stats, start + args.duration, args.voice_ratio, args.think_time)
+        for _ in range(args.concurrency)
+    ]
+
+    print(f"🚦 {args.concurrency} users against {args.url} for {args.duration:.0f}s...")
+    for user in users:
+        user.start()
+    for user in users:
+        user.join()
+
+    report = stats.report(time.time() - start)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"\n{'endpoint':<22}{'reqs':>7}{'rps':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}{'shed':>8}")
+    for endpoint, row in report.items():
+        print(f"{endpoint:<22}{row['requests']:>7}{row['throughput_rps']:>8}"
+              f"{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}"
+              f"{row['error_rate']:>8.1%}{row['shed_rate']:>8.1%}")
+
+
+if __name__ == '__main__':
+    main()
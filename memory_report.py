@@ -0,0 +1,257 @@
+"""
+Memory Accounting for Sessions and Allocation Tracking
+Two views for diagnosing memory growth in a running worker:
+
+- Session accounting walks every live session and estimates the bytes each
+  structure holds: turn records, conversation history, confirmed schemes,
+  profile and eligibility cache, and any audio buffered on its WebSocket.
+  Objects shared by every session are not counted against any one session.
+  That covers the catalog's scheme dicts and the agent's services. Sizes
+  are sys.getsizeof summed over the owned object graph, which is an
+  estimate of the retained bytes rather than an exact figure.
+
+- Allocation tracking switches tracemalloc on at runtime. It takes a baseline
+  snapshot and later reports the allocation sites (file:line or full
+  traceback) that grew the most since then. Tracing slows allocation
+  noticeably, so it is off until an admin starts it and should be stopped
+  when done.
+
+Both are per process; with several gunicorn workers each request sees the
+worker that served it (the report includes its pid).
+"""
+
+import os
+import sys
+import threading
+import tracemalloc
+import types
+from typing import Dict, Iterable, List, Optional, Set
+
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Counted by their own size, never walked
+ATOMIC = (str, bytes, bytearray, int, float, bool, type(None), complex, range)
+
+# Deepest traceback tracemalloc is started with; every traced block stores one
+MAX_FRAMES = 100
+
+# Code belongs to the program, not to a session
+CODE = (type, types.FunctionType, types.MethodType, types.BuiltinFunctionType, types.ModuleType)
+
+
+def owned_size(obj, shared: Set[int], seen: Optional[Set[int]] = None) -> int:
+    """
+    Approximate bytes retained by an object graph
+
+    Args:
+        obj: Root object
+        shared: ids of objects owned elsewhere (not counted or walked)
+        seen: ids already counted (shared between calls to avoid double counting)
+    """
+    if seen is None:
+        seen = set()
+
+    total = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        key = id(current)
+        if key in seen or key in shared:
+            continue
+        seen.add(key)
+
+        if isinstance(current, CODE):
+            continue
+        total += sys.getsizeof(current)
+
+        if isinstance(current, ATOMIC):
+            continue
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        else:
+            attributes = getattr(current, "__dict__", None)
+            if attributes is not None:
+                stack.append(attributes)
+            for slot in getattr(type(current), "__slots__", ()):
+                if hasattr(current, slot):
+                    stack.append(getattr(current, slot))
+
+    return total
+
+
+def shared_ids(database, services: Iterable = ()) -> Set[int]:
+    """ids of catalog scheme dicts and process-wide services sessions only refer to"""
+    ids = {id(service) for service in services if service is not None}
+    ids.add(id(database))
+
+    if isinstance(database.schemes, list):
+        ids.update(id(scheme) for scheme in database.schemes)
+    elif database.catalog is not None:
+        ids.update(id(scheme) for scheme in database.catalog.decoded_records())
+
+    return ids
+
+
+def session_breakdown(session: Dict, shared: Set[int], socket=None) -> Dict[str, int]:
+    """Estimated bytes per structure of one session"""
+    context = session["agent"].context
+    seen = set()
+
+    structures = {
+        "turns": session["turns"],
+        "conversation_history": context.conversation_history,
+        "confirmed_schemes": context.confirmed_schemes,
+        "profile": (context.profile, context.asked_questions, context.current_scheme_focus),
+    }
+
+    breakdown = {name: owned_size(value, shared, seen) for name, value in structures.items()}
+    breakdown["audio_buffers"] = socket.buffered_bytes() if socket else 0
+    breakdown["total"] = sum(breakdown.values())
+    return breakdown
+
+
+def session_report(sessions: Dict[str, Dict], shared: Set[int], sockets: Dict[str, object],
+                   top: int = 20) -> Dict:
+    """Per-structure totals across sessions and the largest sessions"""
+    per_session = []
+    totals = {}
+
+    # Sessions can end while the report runs
+    for session_id, session in list(sessions.items()):
+        breakdown = session_breakdown(session, shared, sockets.get(session_id))
+        per_session.append({"session_id": session_id, "turn_count": session["turn_count"], **breakdown})
+        for name, size in breakdown.items():
+            totals[name] = totals.get(name, 0) + size
+
+    per_session.sort(key=lambda item: -item["total"])
+    count = len(per_session)
+
+    return {
+        "pid": os.getpid(),
+        "sessions": count,
+        "bytes": totals,
+        "mean_bytes_per_session": totals.get("total", 0) // count if count else 0,
+        "largest": per_session[:top],
+    }
+
+
+class AllocationTracker:
+    """Runtime switch for tracemalloc with baseline/diff snapshots"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.baseline = None
+        self.started_here = False
+
+    def start(self, frames: int = 10) -> Dict:
+        """
+        Begin tracing (if not already) and take the baseline
+
+        Raises:
+            ValueError: If frames is outside 1..MAX_FRAMES
+        """
+        if not 1 <= frames <= MAX_FRAMES:
+            raise ValueError(f"frames must be between 1 and {MAX_FRAMES}")
+
+        with self.lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+                self.started_here = True
+            self.baseline = self._snapshot()
+            return self.status()
+
+    def stop(self) -> Dict:
+        with self.lock:
+            if self.started_here:
+                tracemalloc.stop()
+                self.started_here = False
+            self.baseline = None
+            return self.status()
+
+    def status(self) -> Dict:
+        if not tracemalloc.is_tracing():
+            return {"pid": os.getpid(), "tracing": False}
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "pid": os.getpid(),
+            "tracing": True,
+            "frames": tracemalloc.get_traceback_limit(),
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "tracemalloc_overhead_bytes": tracemalloc.get_tracemalloc_memory(),
+        }
+
+    def _snapshot(self):
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ]
+        return tracemalloc.take_snapshot().filter_traces(filters)
+
+    def diff(self, top: int = 25, group_by: str = "lineno", package_only: bool = True,
+             reset: bool = False) -> Dict:
+        """
+        Allocation sites that grew most since the baseline
+
+        Args:
+            top: Sites to return
+            group_by: "lineno", "filename" or "traceback"
+            package_only: Keep only allocations made under this repo's code
+            reset: Make this snapshot the new baseline
+
+        Raises:
+            RuntimeError: If tracking has not been started
+            ValueError: If group_by is not a tracemalloc grouping
+        """
+        if group_by not in ("lineno", "filename", "traceback"):
+            raise ValueError(f"Unknown grouping {group_by!r}")
+
+        with self.lock:
+            if not tracemalloc.is_tracing() or self.baseline is None:
+                raise RuntimeError("Allocation tracking is not running")
+
+            snapshot = self._snapshot()
+            baseline = self.baseline
+            if reset:
+                self.baseline = snapshot
+
+        if package_only:
+            # Allocations with any frame in this repo, i.e. made on the turn path
+            scope = [tracemalloc.Filter(True, os.path.join(PACKAGE_DIR, "*"), all_frames=True)]
+            snapshot = snapshot.filter_traces(scope)
+            baseline = baseline.filter_traces(scope)
+
+        stats = snapshot.compare_to(baseline, group_by)
+        return {
+            **self.status(),
+            "group_by": group_by,
+            "package_only": package_only,
+            "growth_bytes": sum(stat.size_diff for stat in stats),
+            "top": [_stat_dict(stat) for stat in stats[:top]],
+        }
+
+
+def _stat_dict(stat) -> Dict:
+    return {
+        "size_diff": stat.size_diff,
+        "size": stat.size,
+        "count_diff": stat.count_diff,
+        "count": stat.count,
+        "traceback": _frames(stat.traceback),
+    }
+
+
+def _frames(traceback) -> List[str]:
+    frames = []
+    for frame in traceback:
+        filename = frame.filename
+        if filename.startswith(PACKAGE_DIR):
+            filename = os.path.relpath(filename, PACKAGE_DIR)
+        frames.append(f"{filename}:{frame.lineno}")
+    return frames
@@ -0,0 +1,202 @@
+"""
+Parallel Synthesis of Long Responses
+Application steps and scheme explanations run to several hundred characters,
+and one TTS call takes time roughly proportional to its text. Long responses
+are split at sentence and step boundaries, the segments are synthesized
+concurrently on a bounded thread pool, and their PCM is stitched into one
+WAV with a short pause between segments. A long answer then takes about as
+long as its slowest segment rather than the sum of all of them.
+
+Short responses go straight to the speech service. A split response holds
+one slot of the admission "tts" stage for the whole fan-out, the same as a
+single call: its segments must not queue against each other under the
+session's ADMISSION_PER_SESSION_QUEUE. The segments' upstream calls are
+bounded by the shared pool instead. If any segment fails, the whole response
+fails, the same as a single failed call.
+
+Environment:
+    TTS_PARALLEL_WORKERS    Segments synthesized at once, shared by all turns (default 4; 1 disables splitting)
+    TTS_SPLIT_MIN_CHARS     Responses shorter than this are one call (default 240)
+    TTS_SEGMENT_CHARS       Target segment length (default 160)
+    TTS_SEGMENT_PAUSE_MS    Silence inserted between segments (default 250)
+"""
+
+import contextvars
+import logging
+import math
+import os
+import re
+import shutil
+import tempfile
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Dict, List
+
+from tracing import span
+
+
+logger = logging.getLogger(__name__)
+
+# Whitespace after a sentence end (Latin punctuation or the danda), or before
+# a numbered step; clean_text_for_tts has already folded the steps' newlines
+SEGMENT_BREAK = re.compile(r'(?<=[.!?।])(?<!\d\.)\s+|\s+(?=\d+\.\s)')
+
+
+def split_segments(text: str, target_chars: int, max_segments: int) -> List[str]:
+    """
+    Split text at sentence/step boundaries into roughly max_segments pieces or fewer
+
+    Sentences are packed greedily while a segment stays within target_chars
+    (raised for very long texts so the count stays near max_segments). A short
+    tail is folded into the previous segment.
+    """
+    pieces = [piece for piece in SEGMENT_BREAK.split(text.strip()) if piece]
+
+    target = max(target_chars, math.ceil(len(text) / max(max_segments, 1)))
+
+    segments = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + 1 + len(piece) > target and len(current) >= target / 2:
+            segments.append(current)
+            current = ""
+        current = f"{current} {piece}" if current else piece
+
+    if current:
+        if segments and len(current) < target / 2:
+            segments[-1] += " " + current
+        else:
+            segments.append(current)
+
+    return segments
+
+
+def stitch_wavs(paths: List[str], output_file: str, pause_ms: int):
+    """
+    Concatenate WAV files into one, with silence between them
+
+    Raises:
+        ValueError: If the segments' formats differ
+    """
+    with wave.open(output_file, "wb") as out:
+        params = None
+        silence = b""
+
+        for index, path in enumerate(paths):
+            with wave.open(path, "rb") as segment:
+                layout = (segment.getnchannels(), segment.getsampwidth(), segment.getframerate())
+                frames = segment.readframes(segment.getnframes())
+
+            if params is None:
+                params = layout
+                channels, width, rate = layout
+                out.setnchannels(channels)
+                out.setsampwidth(width)
+                out.setframerate(rate)
+                silence = b"\0" * (channels * width * int(rate * pause_ms / 1000))
+            elif layout != params:
+                raise ValueError(f"Segment {index} format {layout} differs from {params}")
+
+            if index:
+                out.writeframes(silence)
+            out.writeframes(frames)
+
+
+class ParallelSynthesizer:
+    """Drop-in text_to_speech that fans long texts out over a thread pool"""
+
+    def __init__(self, speech_service, admission=None, workers: int = 4, split_min_chars: int = 240,
+                 segment_chars: int = 160, pause_ms: int = 250):
+        """
+        Args:
+            speech_service: Speech service used for each segment
+            admission: AdmissionController; each response holds one slot of its tts stage
+            workers: Pool size, shared by all turns
+            split_min_chars: Shorter texts are synthesized in one call
+            segment_chars: Target segment length
+            pause_ms: Silence between stitched segments
+        """
+        self.speech_service = speech_service
+        self.admission = admission
+        self.workers = workers
+        self.split_min_chars = split_min_chars
+        self.segment_chars = segment_chars
+        self.pause_ms = pause_ms
+        # Set to a CpuPool to stitch outside the request thread
+        self.cpu_pool = None
+
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="tts") if workers > 1 else None
+        self.counters = {"single": 0, "split": 0, "segments": 0, "failed": 0}
+
+    @classmethod
+    def from_env(cls, speech_service, admission=None) -> "ParallelSynthesizer":
+        return cls(
+            speech_service,
+            admission=admission,
+            workers=int(os.getenv("TTS_PARALLEL_WORKERS", "4")),
+            split_min_chars=int(os.getenv("TTS_SPLIT_MIN_CHARS", "240")),
+            segment_chars=int(os.getenv("TTS_SEGMENT_CHARS", "160")),
+            pause_ms=int(os.getenv("TTS_SEGMENT_PAUSE_MS", "250")),
+        )
+
+    def _stage(self):
+        return self.admission.stage("tts") if self.admission else nullcontext()
+
+    def text_to_speech(self, text: str, output_file: str) -> bool:
+        """
+        Synthesize text into output_file, in parallel segments when it is long
+
+        Raises:
+            Overloaded: The response was shed by admission control
+        """
+        segments = [text]
+        if self.executor and len(text) >= self.split_min_chars:
+            segments = split_segments(text, self.segment_chars, self.workers)
+
+        if len(segments) == 1:
+            self.counters["single"] += 1
+            with self._stage():
+                return self.speech_service.text_to_speech(text, output_file)
+
+        self.counters["split"] += 1
+        self.counters["segments"] += len(segments)
+
+        workdir = tempfile.mkdtemp(prefix="tts_segments_")
+        try:
+            with span("tts.parallel", {"tts.segments": len(segments)}), self._stage():
+                paths = [os.path.join(workdir, f"{index}.wav") for index in range(len(segments))]
+
+                # Each task gets its own context copy so spans and the session id follow it
+                futures = [
+                    self.executor.submit(contextvars.copy_context().run, self.speech_service.text_to_speech,
+                                         segment, path)
+                    for segment, path in zip(segments, paths)
+                ]
+
+                try:
+                    results = [future.result() for future in futures]
+                except BaseException:
+                    for future in futures:
+                        future.cancel()
+                    raise
+
+                if not all(results):
+                    self.counters["failed"] += 1
+                    logger.error("TTS failed for %d of %d segments", results.count(False), len(segments))
+                    return False
+
+                if self.cpu_pool is not None:
+                    self.cpu_pool.stitch(paths, output_file, self.pause_ms)
+                else:
+                    stitch_wavs(paths, output_file, self.pause_ms)
+                return True
+        except (OSError, EOFError, ValueError, wave.Error) as e:
+            self.counters["failed"] += 1
+            logger.error("Stitching TTS segments failed: %s", e)
+            return False
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def stats(self) -> Dict:
+        return {"workers": self.workers if self.executor else 0, **self.counters}
@@ -0,0 +1,336 @@
+"""
+Offline Precompute Job for Per-Scheme Explanations and Audio
+Walks schemes_database.json and pre-generates, for every scheme, the Gemini
+explanation text plus TTS audio for the explanation and the application steps.
+
+Usage:
+    python precompute.py                 # regenerate changed schemes only
+    python precompute.py --force         # regenerate everything
+    python precompute.py --only EDU001   # regenerate selected schemes, even if unchanged
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+from agent_gemini import (
+    EXPLANATION_TASK,
+    GENERATION_ERROR_RESPONSE,
+    ResponseGenerator,
+    SchemeDatabase,
+    build_application_response,
+    build_explanation_prompt,
+    clean_text_for_tts,
+)
+from structured_logging import configure_logging
+from voice_pipeline import GoogleSpeechService, VoiceConfig
+
+
+logger = logging.getLogger(__name__)
+
+# Bump when the artifact layout or generation logic changes
+ARTIFACT_VERSION = 1
+
+MANIFEST_FILE = "manifest.json"
+AUDIO_DIR = "audio"
+
+
+def scheme_content_hash(scheme: Dict) -> str:
+    """
+    Hash everything a precomputed entry depends on
+
+    Args:
+        scheme: Scheme record from the database
+
+    Returns:
+        Hex digest that changes whenever the record, prompt or voice changes
+    """
+    payload = json.dumps({
+        "version": ARTIFACT_VERSION,
+        "scheme": scheme,
+        "task": EXPLANATION_TASK,
+        "voice": VoiceConfig.GOOGLE_VOICE,
+        "sample_rate": VoiceConfig.SAMPLE_RATE,
+    }, sort_keys=True, ensure_ascii=False)
+
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SchemeHashes:
+    """scheme_content_hash per scheme id, computed once per catalog version"""
+
+    def __init__(self, database):
+        self.database = database
+        self.version = None
+        self.by_id = {}
+
+    def get(self, scheme: Dict) -> str:
+        version = self.database.version
+        if version != self.version:
+            # Reload: any record may have changed
+            self.by_id = {}
+            self.version = version
+
+        digest = self.by_id.get(scheme.get("id"))
+        if digest is None:
+            digest = self.by_id[scheme.get("id")] = scheme_content_hash(scheme)
+        return digest
+
+
+def audio_key(clean_text: str) -> str:
+    """Content key for a TTS-ready text"""
+    return hashlib.sha256(clean_text.encode("utf-8")).hexdigest()
+
+
+class PrecomputedStore:
+    """Read-only view of the precomputed artifact, served by the agent at runtime"""
+
+    def __init__(self, artifact_dir: str, database: Optional[SchemeDatabase] = None):
+        """
+        Load precomputed artifact
+
+        Args:
+            artifact_dir: Directory containing manifest.json and audio/
+            database: Catalog the looked-up schemes come from; content hashes
+                are then cached per catalog version instead of recomputed
+        """
+        self.artifact_dir = artifact_dir
+        self.entries = {}
+        self.audio_index = {}
+        self.hashes = SchemeHashes(database) if database is not None else None
+
+        manifest_path = os.path.join(artifact_dir, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            return
+
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+
+        if manifest.get("version") != ARTIFACT_VERSION:
+            logger.warning("Ignoring precomputed artifact version %s", manifest.get("version"))
+            return
+
+        self.entries = manifest.get("schemes", {})
+
+        for entry in self.entries.values():
+            for key in ("explanation_audio", "application_audio"):
+                audio = entry.get(key)
+                if audio:
+                    self.audio_index[audio["key"]] = os.path.join(artifact_dir, audio["file"])
+
+    def content_hash(self, scheme: Dict) -> str:
+        """scheme_content_hash, from the per-version cache when there is one"""
+        return self.hashes.get(scheme) if self.hashes else scheme_content_hash(scheme)
+
+    def explanation(self, scheme: Dict) -> Optional[str]:
+        """Return the precomputed explanation if it matches the current record"""
+        entry = self.entries.get(scheme.get("id"))
+        if entry and entry["content_hash"] == self.content_hash(scheme):
+            return entry["explanation"]
+        return None
+
+    def audio_for_text(self, clean_text: str) -> Optional[str]:
+        """Return the precomputed WAV path for a TTS-ready text, if any"""
+        path = self.audio_index.get(audio_key(clean_text))
+        if path and os.path.exists(path):
+            return path
+        return None
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class PrecomputeJob:
+    """Generates and incrementally refreshes the precomputed artifact"""
+
+    def __init__(self, database: SchemeDatabase, generator: ResponseGenerator,
+                 speech_service, output_dir: str):
+        self.database = database
+        self.generator = generator
+        self.speech_service = speech_service
+        self.output_dir = output_dir
+        self.audio_dir = os.path.join(output_dir, AUDIO_DIR)
+
+        os.makedirs(self.audio_dir, exist_ok=True)
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self) -> Dict:
+        """Load existing manifest, discarding it on version mismatch"""
+        path = os.path.join(self.output_dir, MANIFEST_FILE)
+
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get("version") == ARTIFACT_VERSION:
+                return manifest
+            logger.info("Artifact version changed, rebuilding everything")
+
+        return {"version": ARTIFACT_VERSION, "revision": 0, "schemes": {}}
+
+    def run(self, force: bool = False, only: Optional[set] = None) -> Dict:
+        """
+        Regenerate entries whose content hash changed
+
+        Args:
+            force: Regenerate every selected scheme regardless of hash
+            only: Restrict to these scheme ids, and regenerate them regardless of hash
+
+        Returns:
+            Counts of generated, skipped and failed schemes
+        """
+        stats = {"generated": 0, "skipped": 0, "failed": 0, "removed": 0}
+        entries = self.manifest["schemes"]
+
+        for scheme in self.database.schemes:
+            scheme_id = scheme["id"]
+            if only and scheme_id not in only:
+                continue
+
+            content_hash = scheme_content_hash(scheme)
+            entry = entries.get(scheme_id)
+
+            if not (force or only) and entry and entry["content_hash"] == content_hash and self._audio_present(entry):
+                stats["skipped"] += 1
+                continue
+
+            logger.info("Generating %s: %s", scheme_id, scheme["name_english"])
+            new_entry = self._generate(scheme, content_hash)
+
+            if new_entry is None:
+                stats["failed"] += 1
+                continue
+
+            entries[scheme_id] = new_entry
+            stats["generated"] += 1
+
+        # Drop schemes that no longer exist in the catalog
+        current_ids = {scheme["id"] for scheme in self.database.schemes}
+        for scheme_id in list(entries):
+            if scheme_id not in current_ids:
+                del entries[scheme_id]
+                stats["removed"] += 1
+
+        if stats["generated"] or stats["removed"]:
+            self.manifest["revision"] = self.manifest.get("revision", 0) + 1
+            self.manifest["generated_at"] = datetime.now().isoformat()
+
+        self._write_manifest()
+        self._remove_orphaned_audio()
+
+        return stats
+
+    def _generate(self, scheme: Dict, content_hash: str) -> Optional[Dict]:
+        """Generate explanation text and audio for one scheme"""
+        context, task = build_explanation_prompt(scheme)
+        explanation = self.generator.generate_response(context, task, scheme["name_telugu"])
+
+        if explanation == GENERATION_ERROR_RESPONSE:
+            logger.error("Gemini failed for %s", scheme["id"])
+            return None
+
+        explanation_audio = self._synthesize(explanation)
+        if explanation_audio is None:
+            return None
+
+        entry = {
+            "content_hash": content_hash,
+            "explanation": explanation,
+            "explanation_audio": explanation_audio,
+            "application_audio": None,
+        }
+
+        application = build_application_response(scheme)
+        if application:
+            entry["application_audio"] = self._synthesize(application)
+            if entry["application_audio"] is None:
+                return None
+
+        return entry
+
+    def _synthesize(self, text: str) -> Optional[Dict]:
+        """Synthesize TTS-cleaned text into a content-keyed WAV file"""
+        clean_text = clean_text_for_tts(text)
+        key = audio_key(clean_text)
+        relative = os.path.join(AUDIO_DIR, f"{key}.wav")
+        path = os.path.join(self.output_dir, relative)
+
+        if not os.path.exists(path):
+            temp_path = f"{path}.tmp"
+            if not self.speech_service.text_to_speech(clean_text, temp_path):
+                logger.error("TTS failed for: %s", clean_text[:60])
+                return None
+            os.replace(temp_path, path)
+
+        return {"key": key, "file": relative}
+
+    def _audio_present(self, entry: Dict) -> bool:
+        """Check all audio files referenced by an entry exist"""
+        for key in ("explanation_audio", "application_audio"):
+            audio = entry.get(key)
+            if audio and not os.path.exists(os.path.join(self.output_dir, audio["file"])):
+                return False
+        return True
+
+    def _write_manifest(self):
+        """Atomically replace the manifest"""
+        path = os.path.join(self.output_dir, MANIFEST_FILE)
+        temp_path = f"{path}.tmp"
+
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+
+        os.replace(temp_path, path)
+
+    def _remove_orphaned_audio(self):
+        """Delete audio files no manifest entry references anymore"""
+        referenced = set()
+        for entry in self.manifest["schemes"].values():
+            for key in ("explanation_audio", "application_audio"):
+                if entry.get(key):
+                    referenced.add(os.path.basename(entry[key]["file"]))
+
+        for name in os.listdir(self.audio_dir):
+            if name not in referenced:
+                os.remove(os.path.join(self.audio_dir, name))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute scheme explanations and audio")
+    parser.add_argument("--schemes", default="schemes_database.json", help="Scheme database path")
+    parser.add_argument("--output", default="precomputed", help="Artifact directory")
+    parser.add_argument("--force", action="store_true", help="Regenerate all schemes")
+    parser.add_argument("--only", nargs="*", help="Scheme ids to regenerate, even if unchanged")
+    args = parser.parse_args()
+
+    load_dotenv()
+    os.environ.setdefault("LOG_FORMAT", "text")
+    configure_logging()
+
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise SystemExit("GEMINI_API_KEY not found in environment variables")
+
+    credentials_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS", "google-credentials.json")
+
+    job = PrecomputeJob(
+        database=SchemeDatabase(args.schemes),
+        generator=ResponseGenerator(api_key),
+        speech_service=GoogleSpeechService(credentials_path=credentials_path),
+        output_dir=args.output
+    )
+
+    stats = job.run(force=args.force, only=set(args.only) if args.only else None)
+
+    logger.info("Precompute done (revision %d): %d generated, %d unchanged, %d failed, %d removed",
+                job.manifest["revision"], stats["generated"], stats["skipped"],
+                stats["failed"], stats["removed"])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+"""
+Speculative Prefetch of Likely Follow-up Answers
+After the agent presents its top schemes, the next turn is almost always
+"tell me about X" or "how do I apply". While the user listens, a background
+executor generates each presented scheme's explanation and synthesizes the
+explanation and application-steps audio, so the follow-up is served from
+cache. Requests that arrive while a prefetch is still running wait for it
+rather than calling Gemini/TTS a second time.
+
+Cache keys match the precompute job (scheme content hash for text, text
+hash for audio), so precomputed schemes are skipped entirely.
+
+Environment:
+    PREFETCH_WORKERS       Background threads (default 2, 0 disables prefetch)
+    PREFETCH_MAX_PENDING   Global cap on queued + running scheme jobs (default 16)
+    PREFETCH_CACHE_SIZE    Explanations and audio files kept (default 256 each)
+    PREFETCH_DIR           Where prefetched audio is written (default prefetched)
+    PREFETCH_WAIT_SECONDS  Longest a turn waits for an in-flight prefetch (default 10)
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from agent_gemini import (
+    GENERATION_ERROR_RESPONSE,
+    build_application_response,
+    build_explanation_prompt,
+    clean_text_for_tts,
+)
+from precompute import audio_key, scheme_content_hash
+
+
+logger = logging.getLogger(__name__)
+
+
+class PrefetchHandle:
+    """Prefetch jobs scheduled for one presentation; cancel() on session end"""
+
+    def __init__(self):
+        self.cancelled = threading.Event()
+        self.futures = []
+
+    def cancel(self):
+        self.cancelled.set()
+        for future in self.futures:
+            future.cancel()
+
+
+class Prefetcher:
+    """Background generator and cache for scheme explanations and their audio"""
+
+    def __init__(self, generator, speech_service, precomputed=None, admission=None):
+        """
+        Args:
+            generator: Response generator (not admission-wrapped; PREFETCH_WORKERS bounds its calls)
+            speech_service: Speech service used for synthesis
+            precomputed: PrecomputedStore; its entries are never prefetched
+            admission: AdmissionController; prefetch TTS runs in its tts stage
+        """
+        self.generator = generator
+        self.speech_service = speech_service
+        self.precomputed = precomputed
+        self.admission = admission
+
+        self.workers = int(os.getenv("PREFETCH_WORKERS", "2"))
+        self.max_pending = int(os.getenv("PREFETCH_MAX_PENDING", "16"))
+        self.cache_size = int(os.getenv("PREFETCH_CACHE_SIZE", "256"))
+        self.wait_seconds = float(os.getenv("PREFETCH_WAIT_SECONDS", "10"))
+        self.output_dir = os.getenv("PREFETCH_DIR", "prefetched")
+
+        self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix="prefetch") if self.workers > 0 else None
+        if self.executor:
+            os.makedirs(self.output_dir, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.texts = OrderedDict()     # scheme content hash -> explanation
+        self.audio = OrderedDict()     # audio key -> wav path
+        self.inflight = {}             # cache key -> Event set when done
+        self.counters = {"scheduled": 0, "skipped_budget": 0, "text_hits": 0, "audio_hits": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.executor is not None
+
+    def schedule(self, schemes: List[Dict]) -> PrefetchHandle:
+        """Queue explanation and audio prefetch for presented schemes, within the global budget"""
+        handle = PrefetchHandle()
+        if not self.enabled:
+            return handle
+
+        for scheme in schemes:
+            with self.lock:
+                if self.pending >= self.max_pending:
+                    self.counters["skipped_budget"] += 1
+                    continue
+                self.pending += 1
+                self.counters["scheduled"] += 1
+
+            future = self.executor.submit(self._prefetch_scheme, scheme, handle)
+            future.add_done_callback(self._job_done)
+            handle.futures.append(future)
+
+        return handle
+
+    def _content_hash(self, scheme: Dict) -> str:
+        """Text cache key; the precomputed store caches it per catalog version"""
+        return self.precomputed.content_hash(scheme) if self.precomputed else scheme_content_hash(scheme)
+
+    def _job_done(self, future):
+        with self.lock:
+            self.pending -= 1
+
+    def explanation(self, scheme: Dict) -> Optional[str]:
+        """Prefetched explanation, waiting for an in-flight prefetch of it"""
+        text = self._lookup(self.texts, self._content_hash(scheme))
+        if text:
+            self.counters["text_hits"] += 1
+        return text
+
+    def audio_for_text(self, clean_text: str) -> Optional[str]:
+        """Prefetched WAV path for a TTS-ready text, waiting for an in-flight prefetch of it"""
+        path = self._lookup(self.audio, audio_key(clean_text))
+        if path and os.path.exists(path):
+            self.counters["audio_hits"] += 1
+            return path
+        return None
+
+    def _lookup(self, cache: OrderedDict, key: str):
+        with self.lock:
+            if key in cache:
+                cache.move_to_end(key)
+                return cache[key]
+            done = self.inflight.get(key)
+
+        if done is None or not done.wait(self.wait_seconds):
+            return None
+
+        with self.lock:
+            return cache.get(key)
+
+    def _claim(self, cache: OrderedDict, key: str) -> bool:
+        """Mark a key as being produced; False if cached or already in flight"""
+        with self.lock:
+            if key in cache or key in self.inflight:
+                return False
+            self.inflight[key] = threading.Event()
+            return True
+
+    def _finish(self, cache: OrderedDict, key: str, value, evict=None):
+        with self.lock:
+            if value is not None:
+                cache[key] = value
+                cache.move_to_end(key)
+                while len(cache) > self.cache_size:
+                    _, old = cache.popitem(last=False)
+                    if evict:
+                        evict(old)
+            self.inflight.pop(key).set()
+
+    def _prefetch_scheme(self, scheme: Dict, handle: PrefetchHandle):
+        if handle.cancelled.is_set():
+            return
+
+        explanation = self.precomputed.explanation(scheme) if self.precomputed else None
+        if explanation is None:
+            explanation = self._prefetch_explanation(scheme, handle)
+
+        for text in (explanation, build_application_response(scheme)):
+            if text and not handle.cancelled.is_set():
+                self._prefetch_audio(clean_text_for_tts(text))
+
+    def _prefetch_explanation(self, scheme: Dict, handle: PrefetchHandle) -> Optional[str]:
+        key = self._content_hash(scheme)
+        if not self._claim(self.texts, key):
+            return self._lookup(self.texts, key)
+
+        text = None
+        try:
+            if not handle.cancelled.is_set():
+                context, task = build_explanation_prompt(scheme)
+                text = self.generator.generate_response(context, task, scheme["name_telugu"])
+                if text == GENERATION_ERROR_RESPONSE:
+                    text = None
+        except Exception as e:
+            logger.warning("Explanation prefetch failed for %s: %s", scheme.get("id"), e)
+        finally:
+            self._finish(self.texts, key, text)
+
+        return text
+
+    def _prefetch_audio(self, clean_text: str):
+        if self.precomputed and self.precomputed.audio_for_text(clean_text):
+            return
+
+        key = audio_key(clean_text)
+        if not self._claim(self.audio, key):
+            return
+
+        path = os.path.join(self.output_dir, f"{key}.wav")
+        result = None
+        try:
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            if self._synthesize(clean_text, temp_path):
+                os.replace(temp_path, path)
+                result = path
+        except Exception as e:
+            logger.warning("Audio prefetch failed: %s", e)
+        finally:
+            self._finish(self.audio, key, result, evict=_remove_file)
+
+    def _synthesize(self, clean_text: str, output_file: str) -> bool:
+        if self.admission is None:
+            return self.speech_service.text_to_speech(clean_text, output_file)
+
+        with self.admission.stage("tts"):
+            return self.speech_service.text_to_speech(clean_text, output_file)
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {
+                "enabled": self.enabled,
+                "pending": self.pending,
+                "cached_explanations": len(self.texts),
+                "cached_audio": len(self.audio),
+                **self.counters,
+            }
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,186 @@
+"""
+On-Demand Request Profiling
+Wraps turn endpoints in a sampling profiler when a request asks for it
+(X-Profile header with the admin token) or is picked by PROFILE_SAMPLE_RATE.
+Samples are stored as folded stacks ("a;b;c count"), which flamegraph.pl,
+speedscope and inferno read directly.
+
+When neither ADMIN_TOKEN nor PROFILE_SAMPLE_RATE is set, the decorator
+returns the view unchanged, so disabled profiling costs nothing.
+
+Environment:
+    PROFILE_SAMPLE_RATE   Fraction of turns profiled automatically (default 0)
+    PROFILE_DIR           Where profiles are written (default profiles)
+    PROFILE_INTERVAL_MS   Sampling interval (default 5)
+    PROFILE_KEEP          Profiles retained on disk (default 100)
+"""
+
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from functools import wraps
+from typing import Dict, List, Optional
+
+from flask import make_response, request
+
+
+PROFILE_SUFFIX = ".folded"
+
+
+def token_matches(supplied: Optional[str], expected: Optional[str]) -> bool:
+    """Constant-time admin token check (False when no token is configured)"""
+    if not expected or not supplied:
+        return False
+    return hmac.compare_digest(supplied.encode("utf-8"), expected.encode("utf-8"))
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples one thread's stack from a background thread"""
+
+    def __init__(self, thread_id: int, root_frame, interval: float):
+        """
+        Args:
+            thread_id: Thread to sample
+            root_frame: Frame where stacks are cut (the profiled call)
+            interval: Seconds between samples
+        """
+        self.thread_id = thread_id
+        self.root_frame = root_frame
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+
+            labels = []
+            while frame is not None and frame is not self.root_frame:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+
+            if labels:
+                self.stacks[";".join(reversed(labels))] += 1
+
+
+class ProfileStore:
+    """Folded-stack profiles on local disk, newest kept"""
+
+    def __init__(self, directory: str, keep: int):
+        self.directory = directory
+        self.keep = keep
+        os.makedirs(directory, exist_ok=True)
+
+    def save(self, endpoint: str, stacks: Counter, duration: float) -> str:
+        """Write one profile and prune old ones; returns its file name"""
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        name = f"{stamp}_{endpoint}_{int(duration * 1000)}ms{PROFILE_SUFFIX}"
+
+        temp_path = os.path.join(self.directory, f".{name}.tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        os.replace(temp_path, os.path.join(self.directory, name))
+
+        for old in self.list()[self.keep:]:
+            try:
+                os.remove(os.path.join(self.directory, old["name"]))
+            except OSError:
+                pass
+
+        return name
+
+    def list(self) -> List[Dict]:
+        """Profiles, newest first"""
+        profiles = []
+
+        for name in os.listdir(self.directory):
+            if not name.endswith(PROFILE_SUFFIX):
+                continue
+            stamp, rest = name[:-len(PROFILE_SUFFIX)].split("_", 1)
+            endpoint, duration = rest.rsplit("_", 1)
+            profiles.append({
+                "name": name,
+                "endpoint": endpoint,
+                "duration_ms": int(duration.rstrip("ms")),
+                "recorded_at": datetime.strptime(stamp, "%Y%m%d-%H%M%S-%f").isoformat(),
+                "size_bytes": os.path.getsize(os.path.join(self.directory, name)),
+            })
+
+        return sorted(profiles, key=lambda profile: profile["name"], reverse=True)
+
+
+class RequestProfiler:
+    """Decides per request whether to profile, and records the result"""
+
+    def __init__(self, admin_token: Optional[str]):
+        self.admin_token = admin_token
+        self.sample_rate = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+        self.interval = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000.0
+        self.store = ProfileStore(
+            os.getenv("PROFILE_DIR", "profiles"),
+            int(os.getenv("PROFILE_KEEP", "100"))
+        ) if self.enabled else None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.admin_token) or self.sample_rate > 0
+
+    def wanted(self) -> bool:
+        """Profile this request? Header trigger requires the admin token"""
+        if request.headers.get("X-Profile") and token_matches(
+                request.headers.get("X-Admin-Token"), self.admin_token):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def profiled(self, endpoint: str):
+        """
+        Decorator for Flask views; a no-op when profiling is disabled
+
+        Args:
+            endpoint: Short name recorded with each profile
+        """
+        def decorator(view):
+            if not self.enabled:
+                return view
+
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.wanted():
+                    return view(*args, **kwargs)
+
+                profiler = SamplingProfiler(threading.get_ident(), sys._getframe(), self.interval)
+                start = time.time()
+                profiler.start()
+                try:
+                    result = view(*args, **kwargs)
+                finally:
+                    stacks = profiler.stop()
+                    name = self.store.save(endpoint, stacks, time.time() - start)
+
+                response = make_response(result)
+                response.headers["X-Profile-Id"] = name
+                return response
+
+            return wrapper
+
+        return decorator
@@ -0,0 +1,156 @@
+"""
+Local BM25 Retrieval over Scheme Text
+Inverted index with Telugu-aware tokenization over scheme names, descriptions,
+benefits and categories (Telugu and English), for free-form questions.
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+
+TOKEN_PATTERN = re.compile(r'[\u0C00-\u0C7F]+|[a-z0-9]+')
+
+# Case markers and plural endings, longest first
+TELUGU_SUFFIXES = sorted([
+    'నికి', 'లకు', 'లలో', 'ల్లో', 'లతో', 'లను', 'లని', 'కోసం', 'కొరకు', 'వరకు', 'నుండి',
+    'తో', 'లో', 'కు', 'కి', 'ని', 'ను', 'గా', 'లు', 'ల',
+], key=len, reverse=True)
+
+# Trailing vowel signs, anusvara and virama (పథకం/పథకాలు -> పథక)
+TRAILING_SIGNS = re.compile(r'[\u0C3E-\u0C4D\u0C02\u0C03]+$')
+
+STOPWORDS = {
+    'ఏమైనా', 'ఉందా', 'ఉంది', 'ఏ', 'ఈ', 'ఆ', 'మరియు', 'నాకు', 'మాకు', 'నేను', 'మీ', 'ఏమి', 'ఎలా',
+    'కి', 'కు', 'లో', 'తో', 'ని', 'ను', 'గా',
+    'the', 'a', 'an', 'for', 'of', 'to', 'and', 'is', 'any', 'scheme', 'schemes', 'in', 'me', 'my',
+}
+
+# Everyday Telugu words mapped to the catalog category they are about
+TOPIC_SYNONYMS = {
+    'ఇల్లు': 'housing', 'ఇంటి': 'housing', 'ఇళ్ల': 'housing', 'గృహ': 'housing', 'house': 'housing',
+    'చదువు': 'education', 'స్కాలర్': 'education', 'ఫీజు': 'education', 'scholarship': 'education',
+    'ఆరోగ్యం': 'healthcare', 'ఆసుపత్రి': 'healthcare', 'వైద్యం': 'healthcare', 'చికిత్స': 'healthcare',
+    'hospital': 'healthcare', 'health': 'healthcare',
+    'రైతు': 'agriculture', 'వ్యవసాయం': 'agriculture', 'పంట': 'agriculture', 'farm': 'agriculture',
+    'పెళ్లి': 'social_welfare', 'వివాహం': 'social_welfare', 'పెన్షన్': 'social_welfare', 'పింఛను': 'social_welfare',
+    'marriage': 'social_welfare', 'pension': 'social_welfare',
+    'ఉద్యోగం': 'employment', 'ఉపాధి': 'employment', 'job': 'employment',
+    'బ్యాంకు': 'financial_inclusion', 'ఖాతా': 'financial_inclusion', 'bank': 'financial_inclusion',
+}
+
+# Field weights: names count more than descriptions
+FIELD_WEIGHTS = {
+    "name_telugu": 3,
+    "name_english": 3,
+    "category": 2,
+    "category_telugu": 2,
+    "description_telugu": 1,
+    "description_english": 1,
+    "benefits": 1,
+}
+
+
+def _stem(token: str) -> str:
+    """Light Telugu stemming: drop one case/plural suffix, then trailing signs"""
+    if not '\u0C00' <= token[0] <= '\u0C7F':
+        return token[:-1] if len(token) > 3 and token.endswith('s') else token
+
+    for suffix in TELUGU_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 2:
+            token = token[:-len(suffix)]
+            break
+
+    stem = TRAILING_SIGNS.sub('', token)
+    return stem if len(stem) >= 2 else token
+
+
+def tokenize(text: str) -> List[str]:
+    """Split Telugu/English text into stemmed index terms"""
+    terms = []
+
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        terms.append(_stem(token))
+
+    return terms
+
+
+def expand_query(text: str) -> List[str]:
+    """Query terms plus the category a topical word points to"""
+    terms = tokenize(text)
+
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        for word, category in TOPIC_SYNONYMS.items():
+            if token.startswith(word):
+                terms.extend(tokenize(category.replace('_', ' ')))
+
+    return terms
+
+
+class SchemeSearchIndex:
+    """BM25 inverted index over the scheme catalog"""
+
+    K1 = 1.5
+    B = 0.75
+
+    def __init__(self, schemes, category_labels: Optional[Dict[str, str]] = None):
+        """
+        Build index
+
+        Args:
+            schemes: Sequence of scheme records
+            category_labels: Category id -> Telugu label (from the database)
+        """
+        category_labels = category_labels or {}
+        self.postings = defaultdict(list)
+        self.doc_lengths = []
+
+        for index, scheme in enumerate(schemes):
+            fields = dict(scheme)
+            fields["category"] = str(scheme.get("category") or "").replace('_', ' ')
+            fields["category_telugu"] = category_labels.get(scheme.get("category"), "")
+
+            counts = Counter()
+            for field, weight in FIELD_WEIGHTS.items():
+                for term in tokenize(str(fields.get(field) or "")):
+                    counts[term] += weight
+
+            for term, frequency in counts.items():
+                self.postings[term].append((index, frequency))
+            self.doc_lengths.append(sum(counts.values()))
+
+        self.doc_count = len(self.doc_lengths)
+        self.average_length = (sum(self.doc_lengths) / self.doc_count) if self.doc_count else 0.0
+        self.idf = {
+            term: math.log(1 + (self.doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+
+    def search(self, query: str, limit: int = 3) -> List[Tuple[int, float]]:
+        """
+        Rank schemes for a free-form query
+
+        Args:
+            query: User utterance (Telugu or English)
+            limit: Maximum results
+
+        Returns:
+            List of (scheme index, BM25 score), best first
+        """
+        scores = defaultdict(float)
+
+        for term in set(expand_query(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+
+            idf = self.idf[term]
+            for index, frequency in postings:
+                norm = self.K1 * (1 - self.B + self.B * self.doc_lengths[index] / self.average_length)
+                scores[index] += idf * frequency * (self.K1 + 1) / (frequency + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
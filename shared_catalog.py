@@ -0,0 +1,465 @@
+"""
+Shared-Memory Scheme Catalog
+The gunicorn master builds the catalog and its derived indexes once into a
+read-only file (in /dev/shm when available): the eligibility columns, id
+index, scheme records, the precomputed eligibility table and the BM25
+postings. Every worker memory-maps the same file, so that memory is paid
+once per node.
+
+Full records and table results are decoded on first access and kept in
+per-worker LRUs, so hot entries are decoded once and every caller gets the
+same object (treat it as read-only). What stays per worker is small: the
+header (ids, vocabularies, search terms) and the dicts built from it. Rules
+are compiled per worker only when a lookup misses the table.
+
+Environment:
+    SHARED_CATALOG_RECORDS   Decoded records cached per worker (default 1024)
+    SHARED_CATALOG_RESULTS   Decoded table results cached per worker (default 4096)
+
+File layout (little-endian, sections 8-byte aligned):
+    magic | header length (uint32) | header JSON
+    age_min int16[n] | age_max int16[n] | state uint16[n] | gender uint16[n]
+    occupation bitmask uint64[n] | income_max int64[n]
+    record offsets uint64[n + 1] | UTF-8 JSON records
+    table: result id uint32[keys] | result offsets uint64[r + 1] | UTF-8 JSON results
+    search: doc lengths uint32[n] | idf float64[t] | posting offsets uint64[t + 1]
+            posting scheme index uint32[p] | posting frequency uint32[p]
+"""
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+from itertools import product
+from typing import Callable, Dict, List, Optional, Tuple
+
+from agent_gemini import EligibilityTable, SchemeDatabase
+from scheme_search import SchemeSearchIndex
+
+
+MAGIC = b"TSCAT002"
+
+# Sentinels meaning "rule not present"
+NO_AGE = -32768
+NO_CODE = 0xFFFF
+NO_INCOME = 0
+
+# (name, array typecode, item size)
+COLUMNS = [
+    ("age_min", "h", 2),
+    ("age_max", "h", 2),
+    ("state", "H", 2),
+    ("gender", "H", 2),
+    ("occupation", "Q", 8),
+    ("income_max", "q", 8),
+]
+
+
+def default_shared_path() -> str:
+    """Location of the shared catalog file for this node"""
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, f"telugu-schemes-{os.getpid()}.catalog")
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _pad(out):
+    out.write(b"\0" * (_align(out.tell()) - out.tell()))
+
+
+def _write_blobs(out, blobs: List[bytes]):
+    """uint64 offsets followed by the concatenated blobs"""
+    offsets = [0]
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+    out.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+    for blob in blobs:
+        out.write(blob)
+    _pad(out)
+
+
+def _table_section(table) -> Tuple[Optional[Dict], List[int], List[bytes]]:
+    """Header entry, per-key result ids and encoded distinct results of an EligibilityTable"""
+    if not table.table:
+        return None, [], []
+
+    dimensions = [table.state_values, table.occupation_values, table.gender_values,
+                  table.age_buckets, table.income_buckets]
+    reason_ids = {}
+    result_ids = {}
+    blobs = []
+    keys = []
+    for key in product(*dimensions):
+        result = table.table[key]
+        # Results are shared between keys, so identity finds the duplicates
+        result_id = result_ids.get(id(result))
+        if result_id is None:
+            result_id = result_ids[id(result)] = len(blobs)
+            # Reasons are a handful of fixed sentences, stored once in the header
+            encoded = [
+                [index, score, [reason_ids.setdefault(reason, len(reason_ids)) for reason in result_reasons]]
+                for index, score, result_reasons in result
+            ]
+            blobs.append(json.dumps(encoded).encode("utf-8"))
+        keys.append(result_id)
+
+    header = {
+        "dimensions": dimensions,
+        "age_bounds": table.age_bounds,
+        "income_thresholds": table.income_thresholds,
+        "reasons": list(reason_ids),
+        "results": len(blobs),
+    }
+    return header, keys, blobs
+
+
+def _code(vocabulary: List[str], value: Optional[str]) -> int:
+    """Index of a string in a vocabulary, adding it if new"""
+    if not value:
+        return NO_CODE
+    if value not in vocabulary:
+        vocabulary.append(value)
+    return vocabulary.index(value)
+
+
+def build_shared_catalog(schemes_path: str, output_path: str) -> str:
+    """
+    Build the shared catalog file from the JSON database
+
+    Args:
+        schemes_path: Path to schemes_database.json
+        output_path: Where to write the catalog file
+
+    Returns:
+        Path of the written file
+    """
+    # The indexes are built exactly as a worker would build them
+    database = SchemeDatabase(schemes_path)
+    data = database.data
+    schemes = database.schemes
+    states, genders, occupations = [], [], []
+    columns = {name: [] for name, _, _ in COLUMNS}
+
+    for scheme in schemes:
+        eligibility = scheme["eligibility"]
+
+        age_min = eligibility.get("age_min")
+        age_max = eligibility.get("age_max")
+        columns["age_min"].append(NO_AGE if age_min is None else age_min)
+        columns["age_max"].append(NO_AGE if age_max is None else age_max)
+        columns["state"].append(_code(states, eligibility.get("state")))
+        columns["gender"].append(_code(genders, eligibility.get("gender")))
+
+        mask = 0
+        for occupation in eligibility.get("occupation") or []:
+            mask |= 1 << _code(occupations, occupation)
+        columns["occupation"].append(mask)
+
+        columns["income_max"].append(int(eligibility.get("income_max") or NO_INCOME))
+
+    if len(occupations) > 64:
+        raise ValueError("Shared catalog supports at most 64 distinct occupations")
+
+    records = [json.dumps(scheme, ensure_ascii=False).encode("utf-8") for scheme in schemes]
+    table_header, table_keys, table_results = _table_section(database.table)
+
+    index = database.search_index
+    terms = list(index.postings)
+    postings = [posting for term in terms for posting in index.postings[term]]
+
+    header = json.dumps({
+        "count": len(schemes),
+        "ids": [scheme["id"] for scheme in schemes],
+        "states": states,
+        "genders": genders,
+        "occupations": occupations,
+        "metadata": {key: value for key, value in data.items() if key != "schemes"},
+        "table": table_header,
+        "search": {"terms": terms, "postings": len(postings), "average_length": index.average_length},
+    }, ensure_ascii=False).encode("utf-8")
+
+    temp_path = f"{output_path}.tmp"
+    with open(temp_path, "wb") as out:
+        out.write(MAGIC)
+        out.write(struct.pack("<I", len(header)))
+        out.write(header)
+        _pad(out)
+
+        for name, typecode, _ in COLUMNS:
+            out.write(struct.pack(f"<{len(schemes)}{typecode}", *columns[name]))
+            _pad(out)
+
+        _write_blobs(out, records)
+
+        if table_header:
+            out.write(struct.pack(f"<{len(table_keys)}I", *table_keys))
+            _pad(out)
+            _write_blobs(out, table_results)
+
+        out.write(struct.pack(f"<{len(schemes)}I", *index.doc_lengths))
+        _pad(out)
+        out.write(struct.pack(f"<{len(terms)}d", *(index.idf[term] for term in terms)))
+        offsets = [0]
+        for term in terms:
+            offsets.append(offsets[-1] + len(index.postings[term]))
+        out.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+        out.write(struct.pack(f"<{len(postings)}I", *(scheme_index for scheme_index, _ in postings)))
+        _pad(out)
+        out.write(struct.pack(f"<{len(postings)}I", *(frequency for _, frequency in postings)))
+        _pad(out)
+
+    os.replace(temp_path, output_path)
+    return output_path
+
+
+class DecodedCache:
+    """Per-worker LRU of entries decoded from the shared file"""
+
+    def __init__(self, size: int, decode: Callable[[int], object]):
+        self.size = size
+        self.decode = decode
+        self._entries = OrderedDict()  # index -> entry, least recently used first
+        self._lock = threading.Lock()
+
+    def get(self, index: int):
+        with self._lock:
+            entry = self._entries.get(index)
+            if entry is not None:
+                self._entries.move_to_end(index)
+                return entry
+
+        entry = self.decode(index)
+
+        with self._lock:
+            # Another thread may have decoded it meanwhile; keep one copy
+            entry = self._entries.setdefault(index, entry)
+            self._entries.move_to_end(index)
+            if len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return entry
+
+    def values(self) -> List:
+        with self._lock:
+            return list(self._entries.values())
+
+
+class SharedBlobs:
+    """uint64 offsets and the concatenated UTF-8 JSON blobs they index"""
+
+    def __init__(self, view: memoryview, offset: int, count: int):
+        self.offsets = view[offset:offset + (count + 1) * 8].cast("Q")
+        start = offset + (count + 1) * 8
+        self.data = view[start:start + self.offsets[count]]
+        self.end = _align(start + self.offsets[count])
+
+    def decode(self, index: int):
+        return json.loads(bytes(self.data[self.offsets[index]:self.offsets[index + 1]]).decode("utf-8"))
+
+
+class SharedSchemeList(Sequence):
+    """Sequence of scheme dicts decoded on access from the shared records"""
+
+    def __init__(self, catalog: "SharedCatalog"):
+        self.catalog = catalog
+
+    def __len__(self):
+        return self.catalog.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.catalog.record(i) for i in range(*index.indices(self.catalog.count))]
+        if index < 0:
+            index += self.catalog.count
+        if not 0 <= index < self.catalog.count:
+            raise IndexError("scheme index out of range")
+        return self.catalog.record(index)
+
+
+class SharedEligibilityTable(EligibilityTable):
+    """EligibilityTable whose keys and result lists live in the shared file"""
+
+    def __init__(self, header: Dict, keys: memoryview, results: SharedBlobs, cache_size: int):
+        self._set_buckets(header["age_bounds"], header["income_thresholds"])
+        dimensions = header["dimensions"]
+        self.age_buckets = dimensions[3]
+        self.income_buckets = dimensions[4]
+
+        # Key position per dimension; the file's vocabularies win over this process's
+        self.positions = [{value: i for i, value in enumerate(values)} for values in dimensions]
+        self.size = len(keys)
+        self.distinct_results = header["results"]
+        self.table = None
+        self._keys = keys
+        reasons = header["reasons"]
+        self._results = DecodedCache(cache_size, lambda index: tuple(
+            (scheme_index, score, tuple(reasons[reason] for reason in reason_ids))
+            for scheme_index, score, reason_ids in results.decode(index)
+        ))
+
+    def lookup(self, profile: Dict) -> Optional[Tuple]:
+        key = self.key(profile)
+        if key is None:
+            return None
+
+        flat = 0
+        for positions, value in zip(self.positions, key):
+            position = positions.get(value)
+            if position is None:
+                return None
+            flat = flat * len(positions) + position
+        return self._results.get(self._keys[flat])
+
+
+class SharedPostings:
+    """Term -> [(scheme index, frequency)] over the shared posting arrays"""
+
+    def __init__(self, term_ids: Dict[str, int], offsets: memoryview, indexes: memoryview, frequencies: memoryview):
+        self.term_ids = term_ids
+        self.offsets = offsets
+        self.indexes = indexes
+        self.frequencies = frequencies
+
+    def get(self, term: str) -> Optional[List[Tuple[int, int]]]:
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            return None
+        start, end = self.offsets[term_id], self.offsets[term_id + 1]
+        return list(zip(self.indexes[start:end], self.frequencies[start:end]))
+
+
+class SharedIdf:
+    """Term -> idf over the shared array"""
+
+    def __init__(self, term_ids: Dict[str, int], values: memoryview):
+        self.term_ids = term_ids
+        self.values = values
+
+    def __getitem__(self, term: str) -> float:
+        return self.values[self.term_ids[term]]
+
+
+class SharedSearchIndex(SchemeSearchIndex):
+    """SchemeSearchIndex whose postings, idf and document lengths live in the shared file"""
+
+    def __init__(self, doc_lengths: memoryview, postings: SharedPostings, idf: SharedIdf, average_length: float):
+        self.doc_lengths = doc_lengths
+        self.postings = postings
+        self.idf = idf
+        self.doc_count = len(doc_lengths)
+        self.average_length = average_length
+
+
+class SharedCatalog:
+    """Zero-copy, read-only view of a shared catalog file"""
+
+    def __init__(self, path: str, cache_size: Optional[int] = None, results_cache_size: Optional[int] = None):
+        """
+        Attach to a catalog file built by build_shared_catalog
+
+        Args:
+            path: Path of the catalog file
+            cache_size: Decoded records kept (default SHARED_CATALOG_RECORDS)
+            results_cache_size: Decoded table results kept (default SHARED_CATALOG_RESULTS)
+        """
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        view = memoryview(self._mmap)
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"Not a shared scheme catalog: {path}")
+
+        offset = len(MAGIC)
+        (header_length,) = struct.unpack_from("<I", view, offset)
+        offset += 4
+        header = json.loads(bytes(view[offset:offset + header_length]).decode("utf-8"))
+        offset = _align(offset + header_length)
+
+        self.path = path
+        self.count = header["count"]
+        self.ids = header["ids"]
+        self.states = header["states"]
+        self.genders = header["genders"]
+        self.occupations = header["occupations"]
+        self.metadata = header["metadata"]
+        self.index_by_id = {scheme_id: i for i, scheme_id in enumerate(self.ids)}
+
+        self.columns = {}
+        for name, typecode, size in COLUMNS:
+            length = self.count * size
+            self.columns[name] = view[offset:offset + length].cast(typecode)
+            offset = _align(offset + length)
+
+        records = SharedBlobs(view, offset, self.count)
+        offset = records.end
+
+        if cache_size is None:
+            cache_size = int(os.getenv("SHARED_CATALOG_RECORDS", "1024"))
+        if results_cache_size is None:
+            results_cache_size = int(os.getenv("SHARED_CATALOG_RESULTS", "4096"))
+        self.cache_size = cache_size
+        self._decoded = DecodedCache(cache_size, records.decode)
+        self.schemes = SharedSchemeList(self)
+
+        # None when the master skipped the table (over ELIGIBILITY_TABLE_MAX_KEYS)
+        self.table = None
+        table = header["table"]
+        if table:
+            size = 1
+            for values in table["dimensions"]:
+                size *= len(values)
+            keys = view[offset:offset + size * 4].cast("I")
+            results = SharedBlobs(view, _align(offset + size * 4), table["results"])
+            offset = results.end
+            self.table = SharedEligibilityTable(table, keys, results, results_cache_size)
+
+        search = header["search"]
+        term_ids = {term: i for i, term in enumerate(search["terms"])}
+        terms, postings = len(term_ids), search["postings"]
+
+        doc_lengths = view[offset:offset + self.count * 4].cast("I")
+        offset = _align(offset + self.count * 4)
+        idf = view[offset:offset + terms * 8].cast("d")
+        offset += terms * 8
+        posting_offsets = view[offset:offset + (terms + 1) * 8].cast("Q")
+        offset += (terms + 1) * 8
+        indexes = view[offset:offset + postings * 4].cast("I")
+        offset = _align(offset + postings * 4)
+        frequencies = view[offset:offset + postings * 4].cast("I")
+
+        self.search_index = SharedSearchIndex(
+            doc_lengths, SharedPostings(term_ids, posting_offsets, indexes, frequencies),
+            SharedIdf(term_ids, idf), search["average_length"]
+        )
+
+    def record(self, index: int) -> Dict:
+        """One full scheme record, decoded on first use"""
+        return self._decoded.get(index)
+
+    def decoded_records(self) -> List[Dict]:
+        """Records currently cached (shared by every caller)"""
+        return self._decoded.values()
+
+    def eligibility(self, index: int) -> Dict:
+        """Rebuild the matching-relevant eligibility rules of one scheme from the columns"""
+        columns = self.columns
+
+        age_min = columns["age_min"][index]
+        age_max = columns["age_max"][index]
+        state = columns["state"][index]
+        gender = columns["gender"][index]
+        mask = columns["occupation"][index]
+
+        return {
+            "age_min": None if age_min == NO_AGE else age_min,
+            "age_max": None if age_max == NO_AGE else age_max,
+            "state": None if state == NO_CODE else self.states[state],
+            "gender": None if gender == NO_CODE else self.genders[gender],
+            "occupation": [occ for bit, occ in enumerate(self.occupations) if mask >> bit & 1] or None,
+            "income_max": columns["income_max"][index] or None,
+        }
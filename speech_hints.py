@@ -0,0 +1,165 @@
+"""
+Speech Adaptation Hints per Conversation State
+Google Speech-to-Text accepts phrase hints with a boost. Without them,
+scheme names, occupations and state names are often misheard, and the
+agent has to ask again. The phrases are taken from the catalog's scheme
+names and the agent's extractor keyword tables, so they follow the catalog
+and the keywords without a separate list to maintain.
+
+What the user is likely to say depends on the agent's state. While the
+profile is being collected, ages, state names and occupations are boosted.
+Spoken numbers are hinted with Google's digit-sequence class token, alone
+and followed by each age or income unit ("$OOV_CLASS_DIGIT_SEQUENCE
+సంవత్సరాలు"), since listing every number as a phrase would not fit.
+Once schemes are presented, scheme names, ordinals ("the second one") and
+apply/yes words are boosted. Each state's phrase sets are built once per
+catalog version and reused for every request.
+
+Districts are not hinted: the profile has no district field and the
+extractors never read one, so boosting them would only compete with the
+words the agent does use.
+
+Environment:
+    SPEECH_HINTS               Send phrase hints with recognition requests (default true)
+    SPEECH_HINTS_NUMBER_CLASS  Class token for spoken numbers (default $OOV_CLASS_DIGIT_SEQUENCE;
+                               empty disables number hints for languages without it)
+"""
+
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from agent_gemini import (
+    AFFIRMATION_KEYWORDS,
+    AGE_UNITS,
+    APPLY_KEYWORDS,
+    GENDER_KEYWORDS,
+    INCOME_UNITS,
+    OCCUPATION_KEYWORDS,
+    ORDINAL_KEYWORDS,
+    STATE_KEYWORDS,
+    AgentState,
+)
+
+
+# (phrases, boost); tuples so recognizers can cache the request objects built from them
+PhraseSet = Tuple[Tuple[str, ...], float]
+
+SCHEME_NAME_BOOST = 15.0
+EXPECTED_BOOST = 10.0
+BACKGROUND_BOOST = 4.0
+
+# Google rejects phrases longer than this
+MAX_PHRASE_CHARS = 100
+
+PARENTHESES = re.compile(r'\s*\([^)]*\)')
+
+
+def _numbers(number_class: str, units: List[str]) -> List[str]:
+    """The number class token alone and before each unit ("45 years")"""
+    if not number_class:
+        return []
+    return [number_class] + [f"{number_class} {unit}" for unit in units]
+
+
+def _keywords(*tables: Dict) -> List[str]:
+    return [keyword for table in tables for keywords in table.values() for keyword in keywords]
+
+
+def _scheme_names(schemes: Iterable[Dict]) -> List[str]:
+    """Telugu and English names, without parenthesized qualifiers"""
+    names = []
+    for scheme in schemes:
+        for key in ("name_telugu", "name_english"):
+            name = PARENTHESES.sub("", scheme.get(key) or "").strip()
+            if name:
+                names.append(name)
+    return names
+
+
+class SpeechHints:
+    """Phrase sets to send with a recognition request, by agent state"""
+
+    def __init__(self, database, number_class: str = "$OOV_CLASS_DIGIT_SEQUENCE"):
+        """
+        Args:
+            database: SchemeDatabase; phrase sets are rebuilt when it reloads
+            number_class: Class token for spoken numbers ("" for none)
+        """
+        self.database = database
+        self.number_class = number_class
+        self._build()
+
+    def _build(self):
+        version = self.database.version
+        names = _scheme_names(self.database.schemes)
+        states = _keywords(STATE_KEYWORDS)
+        occupations = _keywords(OCCUPATION_KEYWORDS)
+        genders = _keywords(GENDER_KEYWORDS)
+        ordinals = _keywords(ORDINAL_KEYWORDS)
+        follow_ups = APPLY_KEYWORDS + AFFIRMATION_KEYWORDS
+        ages = _numbers(self.number_class, AGE_UNITS) + AGE_UNITS
+        incomes = _numbers(self.number_class, INCOME_UNITS) + INCOME_UNITS
+
+        profile = [
+            (ages + states, EXPECTED_BOOST),
+            (genders + occupations + incomes, BACKGROUND_BOOST),
+        ]
+        additional = [
+            (occupations + incomes, EXPECTED_BOOST),
+            (ages + states + genders, BACKGROUND_BOOST),
+        ]
+        # Corrections ("I'm actually a weaver") stay possible after matching
+        schemes_presented = [
+            (names, SCHEME_NAME_BOOST),
+            (ordinals + follow_ups, EXPECTED_BOOST),
+            (occupations + states + AGE_UNITS, BACKGROUND_BOOST),
+        ]
+        application = [
+            (names, SCHEME_NAME_BOOST),
+            (follow_ups + ordinals, BACKGROUND_BOOST),
+        ]
+
+        self.phrase_sets = {
+            AgentState.GREETING: _finish(profile),
+            AgentState.COLLECTING_BASIC_INFO: _finish(profile),
+            AgentState.COLLECTING_ADDITIONAL_INFO: _finish(additional),
+            AgentState.MATCHING_SCHEMES: _finish(schemes_presented),
+            AgentState.PRESENTING_SCHEMES: _finish(schemes_presented),
+            AgentState.ANSWERING_QUESTIONS: _finish(schemes_presented),
+            AgentState.PROVIDING_APPLICATION_DETAILS: _finish(application),
+        }
+        self.version = version
+
+    @classmethod
+    def from_env(cls, database) -> Optional["SpeechHints"]:
+        if os.getenv("SPEECH_HINTS", "True").lower() != "true":
+            return None
+        return cls(database, number_class=os.getenv("SPEECH_HINTS_NUMBER_CLASS", "$OOV_CLASS_DIGIT_SEQUENCE"))
+
+    def for_state(self, state: AgentState) -> Tuple[PhraseSet, ...]:
+        if self.version != self.database.version:
+            self._build()
+        return self.phrase_sets.get(state, ())
+
+    def stats(self) -> Dict:
+        return {state.value: sum(len(phrases) for phrases, _ in sets) for state, sets in self.phrase_sets.items()}
+
+
+def _finish(sets: List[Tuple[List[str], float]]) -> Tuple[PhraseSet, ...]:
+    """Deduplicate across sets (a phrase keeps its highest boost) and drop phrases Google would reject"""
+    seen = set()
+    finished = []
+
+    for phrases, boost in sorted(sets, key=lambda item: -item[1]):
+        kept = []
+        for phrase in phrases:
+            key = phrase.lower()
+            if key in seen or len(phrase) > MAX_PHRASE_CHARS:
+                continue
+            seen.add(key)
+            kept.append(phrase)
+        if kept:
+            finished.append((tuple(kept), boost))
+
+    return tuple(finished)
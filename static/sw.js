@@ -0,0 +1,98 @@
+// Audio cache for the voice agent.
+// Response audio lives at /api/audio/<sha256>.wav and never changes, so it is
+// served cache-first. Fixed prompts (greeting, profile questions) are
+// precached from /api/audio/manifest.json; other responses are kept in a
+// small runtime cache so replays need no network.
+
+const PROMPT_CACHE = 'prompt-audio-v1';
+const RESPONSE_CACHE = 'response-audio-v1';
+const RESPONSE_CACHE_ENTRIES = 50;
+const AUDIO_PATH = /^\/api\/audio\/[0-9a-f]{64}\.wav$/;
+
+// Add prompts the cache is missing and drop ones no longer in the manifest
+async function precachePrompts() {
+    const response = await fetch('/api/audio/manifest.json', { cache: 'no-cache' });
+    if (!response.ok) return;
+    const manifest = await response.json();
+
+    const cache = await caches.open(PROMPT_CACHE);
+    const wanted = new Set(manifest.audio.map(path => new URL(path, self.location.origin).href));
+
+    for (const request of await cache.keys()) {
+        if (!wanted.has(request.url)) {
+            await cache.delete(request);
+        }
+    }
+    for (const url of wanted) {
+        if (!(await cache.match(url))) {
+            await cache.add(url);
+        }
+    }
+}
+
+async function trimResponseCache() {
+    const cache = await caches.open(RESPONSE_CACHE);
+    const keys = await cache.keys();
+    for (const request of keys.slice(0, Math.max(0, keys.length - RESPONSE_CACHE_ENTRIES))) {
+        await cache.delete(request);
+    }
+}
+
+// Media elements ask for byte ranges; answer them from the cached body
+async function rangeResponse(request, cached) {
+    const match = /^bytes=(\d+)-(\d*)$/.exec(request.headers.get('Range') || '');
+    if (!match) return cached;
+
+    const body = await cached.arrayBuffer();
+    const start = Number(match[1]);
+    const end = match[2] ? Math.min(Number(match[2]), body.byteLength - 1) : body.byteLength - 1;
+    if (start > end) {
+        return new Response(null, { status: 416, headers: { 'Content-Range': `bytes */${body.byteLength}` } });
+    }
+
+    return new Response(body.slice(start, end + 1), {
+        status: 206,
+        headers: {
+            'Content-Type': 'audio/wav',
+            'Content-Length': String(end - start + 1),
+            'Content-Range': `bytes ${start}-${end}/${body.byteLength}`,
+        },
+    });
+}
+
+async function audioFromCache(request) {
+    const cached = await caches.match(request.url);
+    if (cached) return rangeResponse(request, cached);
+
+    // Fetch the whole file (not the range) so it can be cached
+    const response = await fetch(request.url);
+    if (response.status === 200) {
+        const cache = await caches.open(RESPONSE_CACHE);
+        await cache.put(request.url, response.clone());
+        trimResponseCache();
+        return rangeResponse(request, response);
+    }
+    return response;
+}
+
+self.addEventListener('install', event => {
+    event.waitUntil(precachePrompts().catch(() => {}).then(() => self.skipWaiting()));
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil(self.clients.claim());
+});
+
+// Pages ask for a refresh on load, since a deploy changes the manifest but not this file
+self.addEventListener('message', event => {
+    if (event.data && event.data.type === 'precache') {
+        event.waitUntil(precachePrompts().catch(() => {}));
+    }
+});
+
+self.addEventListener('fetch', event => {
+    const url = new URL(event.request.url);
+    if (event.request.method === 'GET' && url.origin === self.location.origin && AUDIO_PATH.test(url.pathname)) {
+        event.respondWith(audioFromCache(event.request));
+    }
+});
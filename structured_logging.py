@@ -0,0 +1,183 @@
+"""
+Non-Blocking Structured Logging
+Request threads only put records on an in-memory queue; a background
+listener formats them (JSON or text) and writes to stdout. When the queue
+is full, records are dropped and counted rather than blocking a turn.
+
+Every record carries the session id bound to the current request, and
+DEBUG records can be sampled so verbose dumps stay cheap in production.
+
+Environment:
+    LOG_LEVEL               Minimum level (default INFO)
+    LOG_FORMAT              json or text (default json)
+    LOG_DEBUG_SAMPLE_RATE   Fraction of DEBUG records kept (default 0.1)
+    LOG_QUEUE_SIZE          Records buffered before dropping (default 10000)
+"""
+
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+
+# Session id of the request being handled on this thread
+session_id_var = contextvars.ContextVar("session_id", default=None)
+
+# LogRecord attributes that are not user-supplied extra fields
+STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "session_id"}
+
+_handler = None
+_listener = None
+
+
+def bind_session(session_id: Optional[str]):
+    """Attach a session id to every record logged by this request"""
+    session_id_var.set(session_id)
+
+
+def _extra_fields(record: logging.LogRecord) -> dict:
+    return {
+        key: value for key, value in record.__dict__.items()
+        if key not in STANDARD_ATTRS and not key.startswith("_")
+    }
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+
+        if getattr(record, "session_id", None):
+            payload["session_id"] = record.session_id
+
+        payload.update(_extra_fields(record))
+
+        if record.exc_text:
+            payload["exception"] = record.exc_text
+
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for local development"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = f"{self.formatTime(record)} {record.levelname:<7} {record.name}"
+
+        if getattr(record, "session_id", None):
+            line += f" [{record.session_id}]"
+        line += f" {record.getMessage()}"
+
+        fields = _extra_fields(record)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+
+        if record.exc_text:
+            line += "\n" + record.exc_text
+
+        return line
+
+
+class ContextFilter(logging.Filter):
+    """Stamps the bound session id and samples DEBUG records"""
+
+    def __init__(self, debug_sample_rate: float):
+        super().__init__()
+        self.debug_sample_rate = debug_sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno <= logging.DEBUG and random.random() >= self.debug_sample_rate:
+            return False
+
+        record.session_id = session_id_var.get()
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of waiting on a full queue"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message now; formatting to JSON/text happens on the listener thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging():
+    """Route all logging through the background queue (idempotent)"""
+    global _handler, _listener
+
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    if os.getenv("LOG_FORMAT", "json").lower() == "text":
+        output.setFormatter(TextFormatter())
+    else:
+        output.setFormatter(JsonFormatter())
+
+    _handler = NonBlockingQueueHandler(queue.Queue(int(os.getenv("LOG_QUEUE_SIZE", "10000"))))
+    _handler.addFilter(ContextFilter(float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.1"))))
+
+    root = logging.getLogger()
+    root.handlers = [_handler]
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+    _listener = QueueListener(_handler.queue, output, respect_handler_level=True)
+    _listener.start()
+
+    atexit.register(_stop_listener)
+    os.register_at_fork(after_in_child=_restart_in_child)
+
+
+def _stop_listener():
+    """Flush queued records on exit"""
+    if _listener is not None:
+        _listener.stop()
+
+
+def _restart_in_child():
+    """The listener thread does not survive fork; give the child its own"""
+    global _listener
+
+    if _listener is None:
+        return
+
+    _handler.queue = queue.Queue(_handler.queue.maxsize)
+    _listener = QueueListener(_handler.queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def dropped_records() -> int:
+    """Records dropped because the queue was full"""
+    return _handler.dropped if _handler else 0
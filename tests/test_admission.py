@@ -0,0 +1,168 @@
+"""Stage limiter queueing, shedding and the agent's rollback of a shed turn"""
+
+import os
+import threading
+import time
+
+import pytest
+
+import admission
+from admission import AdmissionController, AdmittedGenerator, Overloaded, StageLimiter
+from agent_gemini import AgentState, SchemeDatabase, TeluguSchemeAgent
+
+
+CATALOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "schemes_database.json")
+
+
+def _limiter(per_session=2, queue_size=8, max_wait=5.0):
+    return StageLimiter("llm", limit=1, queue_size=queue_size, per_session=per_session, max_wait=max_wait)
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def _queue(limiter, session_id, granted, name):
+    """Start a thread that waits for a slot and records when it got one"""
+    def run():
+        limiter.acquire(session_id)
+        granted.append(name)
+
+    queued = limiter.queued
+    thread = threading.Thread(target=run)
+    thread.start()
+    _wait_for(lambda: limiter.queued == queued + 1)
+    return thread
+
+
+def test_waiting_sessions_are_served_round_robin():
+    limiter = _limiter()
+    limiter.acquire("a")
+    granted = []
+
+    # Session a queues twice before b queues once
+    threads = [_queue(limiter, "a", granted, "a1"), _queue(limiter, "a", granted, "a2"),
+               _queue(limiter, "b", granted, "b1")]
+
+    for expected in (["a1"], ["a1", "b1"], ["a1", "b1", "a2"]):
+        limiter.release(0.1)
+        _wait_for(lambda: len(granted) == len(expected))
+        assert granted == expected
+        assert limiter.in_flight == 1
+
+    limiter.release(0.1)
+    for thread in threads:
+        thread.join()
+    assert (limiter.in_flight, limiter.queued, len(limiter.queues)) == (0, 0, 0)
+
+
+def test_session_over_its_share_gets_429():
+    limiter = _limiter(per_session=1)
+    limiter.acquire("a")
+    granted = []
+    thread = _queue(limiter, "a", granted, "a1")
+
+    with pytest.raises(Overloaded) as shed:
+        limiter.acquire("a")
+    assert shed.value.status == 429
+    assert shed.value.retry_after >= 1
+
+    # Another session still gets a place in the queue
+    other = _queue(limiter, "b", granted, "b1")
+
+    limiter.release(0.1)
+    limiter.release(0.1)
+    thread.join()
+    other.join()
+    assert granted == ["a1", "b1"]
+    assert limiter.rejected == 1
+
+
+def test_full_queue_gets_503():
+    limiter = _limiter(queue_size=1)
+    limiter.acquire("a")
+    granted = []
+    thread = _queue(limiter, "a", granted, "a1")
+
+    with pytest.raises(Overloaded) as shed:
+        limiter.acquire("b")
+    assert shed.value.status == 503
+
+    limiter.release(0.1)
+    thread.join()
+
+
+def test_wait_times_out_with_503():
+    limiter = _limiter(max_wait=0.05)
+    limiter.acquire("a")
+
+    with pytest.raises(Overloaded) as shed:
+        limiter.acquire("b")
+    assert shed.value.status == 503
+    assert "timed out" in str(shed.value)
+    assert (limiter.in_flight, limiter.queued, len(limiter.queues)) == (1, 0, 0)
+
+
+def test_grant_between_timeout_and_lock_keeps_the_slot(monkeypatch):
+    limiter = _limiter(max_wait=0.05)
+    limiter.acquire("a")
+
+    class LateGrantWaiter(admission._Waiter):
+        """The holder releases right as this waiter's wait times out"""
+
+        def __init__(self):
+            super().__init__()
+            wait = self.event.wait
+
+            def timed_out(timeout):
+                wait(0)
+                limiter.release(0.1)
+                return False
+
+            self.event.wait = timed_out
+
+    monkeypatch.setattr(admission, "_Waiter", LateGrantWaiter)
+
+    limiter.acquire("b")
+    assert (limiter.in_flight, limiter.queued, limiter.rejected) == (1, 0, 0)
+    limiter.release(0.1)
+    assert limiter.in_flight == 0
+
+
+class SheddableGenerator:
+    """Canned replies, or Overloaded while shedding"""
+
+    def __init__(self):
+        self.shedding = False
+
+    def generate_response(self, context, task, user_input):
+        if self.shedding:
+            raise Overloaded("llm", 503, 1, "queue full")
+        return "సరే"
+
+
+def test_shed_turn_rolls_back_and_retries_cleanly():
+    generator = SheddableGenerator()
+    agent = TeluguSchemeAgent(api_key=None, schemes_path=CATALOG, database=SchemeDatabase(CATALOG),
+                              generator=AdmittedGenerator(generator, AdmissionController({})))
+    agent.process_input("నమస్కారం")
+    context = agent.context
+    before = (agent.state, dict(context.profile), list(context.conversation_history),
+              set(context.asked_questions), context.confirmed_schemes, agent.llm_calls)
+
+    turn = "నా వయస్సు 45 సంవత్సరాలు, తెలంగాణ, నేను రైతు"
+    generator.shedding = True
+    with pytest.raises(Overloaded):
+        agent.process_input(turn)
+
+    assert (agent.state, dict(context.profile), list(context.conversation_history),
+            set(context.asked_questions), context.confirmed_schemes, agent.llm_calls) == before
+
+    generator.shedding = False
+    _, metadata = agent.process_input(turn)
+    assert agent.state == AgentState.PRESENTING_SCHEMES
+    assert metadata["profile"]["age"] == 45
+    assert len(context.conversation_history) == len(before[2]) + 2
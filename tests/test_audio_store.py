@@ -0,0 +1,83 @@
+"""Content-addressed audio: pruning order, pinning and fixed-prompt warm-up"""
+
+import os
+
+import pytest
+
+import audio_store
+from audio_store import AudioStore
+from voice_pipeline import VoiceConfig
+
+
+def _store(store, text, mtime):
+    """Add audio for a text and backdate it to mtime"""
+    digest = store.digest(text)
+    temp_file = store.temp_path()
+    with open(temp_file, "wb") as f:
+        f.write(b"RIFF")
+    path = store.add(temp_file, digest)
+    os.utime(path, (mtime, mtime))
+    return digest
+
+
+def test_prune_removes_least_recently_served_and_keeps_pinned(tmp_path):
+    store = AudioStore(str(tmp_path), keep=2)
+    digests = [_store(store, f"text {index}", 1000 + index) for index in range(5)]
+
+    store.pinned.add(digests[0])          # oldest, but a fixed prompt
+    os.utime(store.get(digests[1]), (2000, 2000))  # served again just now
+
+    store.prune()
+
+    remaining = {name[:-4] for name in os.listdir(tmp_path) if name.endswith(".wav")}
+    assert remaining == {digests[0], digests[1], digests[4]}
+    assert store.counters["pruned"] == 2
+    assert store.get(digests[2]) is None
+
+
+def test_prune_runs_every_few_adds(tmp_path, monkeypatch):
+    monkeypatch.setattr(audio_store, "PRUNE_EVERY", 3)
+    store = AudioStore(str(tmp_path), keep=1)
+
+    for index in range(3):
+        _store(store, f"text {index}", 1000 + index)
+
+    assert store.counters["pruned"] == 2
+
+
+def test_warm_synthesizes_missing_prompts_and_pins_them(tmp_path):
+    store = AudioStore(str(tmp_path))
+    existing = _store(store, "already stored", 1000)
+    calls = []
+
+    def synthesize(text, output_file):
+        calls.append(text)
+        if text == "fails":
+            return False
+        with open(output_file, "wb") as f:
+            f.write(b"RIFF")
+        return True
+
+    store.warm(["already stored", "new prompt", "fails"], synthesize)
+
+    assert calls == ["new prompt", "fails"]
+    assert store.pinned == {existing, store.digest("new prompt")}
+    assert store.pinned_url(existing) == f"/api/audio/{existing}.wav"
+    assert store.pinned_url(store.digest("fails")) is None
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+    version = store.manifest()["version"]
+    store.pinned.discard(existing)
+    assert store.manifest()["version"] != version
+
+
+def test_digest_depends_on_voice_and_rejects_bad_names(tmp_path, monkeypatch):
+    store = AudioStore(str(tmp_path))
+    digest = store.digest("నమస్కారం")
+    assert digest == store.digest("నమస్కారం")
+
+    monkeypatch.setattr(VoiceConfig, "GOOGLE_VOICE", "te-IN-Standard-B")
+    assert store.digest("నమస్కారం") != digest
+
+    with pytest.raises(ValueError):
+        store.path("../../etc/passwd")
@@ -0,0 +1,52 @@
+"""Bulk matching keeps going past rows that cannot be parsed"""
+
+import json
+import os
+
+import pytest
+
+from bulk_eligibility import decode_lines, match_profiles, read_profiles
+from agent_gemini import SchemeDatabase
+
+
+CATALOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "schemes_database.json")
+
+
+@pytest.fixture(scope="module")
+def database():
+    return SchemeDatabase(CATALOG)
+
+
+def _run(database, byte_lines, fmt):
+    return [json.loads(line) for line in match_profiles(database, read_profiles(decode_lines(byte_lines), fmt))]
+
+
+def test_jsonl_bad_rows_do_not_end_the_stream(database):
+    results = _run(database, [
+        '\ufeff{"id": "a", "age": 45, "state": "Telangana", "occupation": "farmer"}\n'.encode("utf-8"),
+        b'{"id": "b", "age": 1e999}\n',
+        b'{"id": "c", "occupation": "\xff\xfe"}\n',
+        '{"id": "d", "age": 70, "state": "Telangana", "gender": "female"}\n'.encode("utf-8"),
+    ], "jsonl")
+
+    assert [result["row"] for result in results] == [1, 2, 3, 4]
+    assert results[0]["id"] == "a" and results[0]["schemes"]
+    assert results[1]["id"] == "b" and "finite" in results[1]["error"]
+    assert "utf-8" in results[2]["error"] and "schemes" not in results[2]
+    assert results[3]["id"] == "d" and "schemes" in results[3]
+
+
+def test_csv_bad_rows_do_not_end_the_stream(database):
+    results = _run(database, [
+        b"id,age,state,occupation\n",
+        b"a,45,Telangana,farmer\n",
+        b"b,\xff\xfe,Telangana,farmer\n",
+        b"c,1e999,Telangana,farmer\n",
+        b"d,70,Telangana,weaver\n",
+    ], "csv")
+
+    assert [result["row"] for result in results] == [1, 2, 3, 4]
+    assert results[0]["id"] == "a" and results[0]["schemes"]
+    assert "utf-8" in results[1]["error"]
+    assert results[2]["id"] == "c" and "error" in results[2]
+    assert results[3]["id"] == "d" and "schemes" in results[3]
@@ -0,0 +1,49 @@
+"""WebSocket control handling that needs no upstreams"""
+
+import json
+
+import conversation_socket
+from conversation_socket import ConversationSocket
+
+
+class RecordingWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, message):
+        self.sent.append(json.loads(message))
+
+
+def _socket():
+    ws = RecordingWebSocket()
+    socket = ConversationSocket(ws, open_session=lambda session_id: "s1", run_turn=None, transcribe=None)
+    socket._receive_text_frame(json.dumps({"type": "start"}))
+    return socket, ws
+
+
+def test_overflowed_recording_is_dropped_until_the_next_one(monkeypatch):
+    monkeypatch.setattr(conversation_socket, "MAX_UPLOAD_BYTES", 10)
+    socket, ws = _socket()
+
+    socket._receive_text_frame(json.dumps({"type": "audio_start"}))
+    socket._receive_audio(b"x" * 8)
+    socket._receive_audio(b"x" * 8)
+    socket._receive_audio(b"tail")
+    socket._receive_text_frame(json.dumps({"type": "audio_end"}))
+
+    assert ws.sent[-1] == {"type": "error", "error": "Recording too long"}
+    assert socket.turns.empty()
+
+    socket._receive_text_frame(json.dumps({"type": "audio_start"}))
+    socket._receive_audio(b"next")
+    socket._receive_text_frame(json.dumps({"type": "audio_end"}))
+    assert socket.turns.get_nowait() == ("audio", b"next")
+
+
+def test_malformed_control_frames_are_answered():
+    socket, ws = _socket()
+
+    socket._receive_text_frame("not json")
+    socket._receive_text_frame("[1, 2]")
+
+    assert [message["type"] for message in ws.sent] == ["session", "error", "error"]
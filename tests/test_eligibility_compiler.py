@@ -0,0 +1,105 @@
+"""Differential tests: compiled eligibility rules against the interpreter"""
+
+import json
+import os
+
+import pytest
+
+from agent_gemini import SchemeDatabase
+from eligibility_compiler import prepare_profile, verify
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CATALOG = os.path.join(ROOT, "schemes_database.json")
+
+# Rule shapes the shipped catalog may not cover
+SYNTHETIC_RULES = [
+    {},
+    {"age_min": 0},
+    {"age_max": 0},
+    {"age_min": 30, "age_max": 30},
+    {"state": "All India"},
+    {"state": "TELANGANA", "gender": "Female"},
+    {"occupation": []},
+    {"occupation": ["Farmer", "AGRICULTURE"]},
+    {"occupation": ["student"], "age_min": 10, "age_max": 18, "gender": "female"},
+    {"income_max": 0},
+    {"income_max": 1},
+    {"income_max": 150000, "state": "Andhra Pradesh"},
+    {"age_min": 60, "occupation": ["weaver"], "income_max": 200000, "state": "Telangana", "gender": "male"},
+]
+
+
+@pytest.fixture(scope="module")
+def database():
+    return SchemeDatabase(CATALOG)
+
+
+def _boundary_profiles(database):
+    """Every catalog threshold with its neighbours, crossed with missing fields"""
+    ages, incomes = {None}, {None}
+    for index in range(len(database.schemes)):
+        rules = database.eligibility_rules(index)
+        for key in ("age_min", "age_max"):
+            if rules.get(key) is not None:
+                ages.update({rules[key] - 1, rules[key], rules[key] + 1})
+        if rules.get("income_max"):
+            incomes.update({rules["income_max"] - 1, rules["income_max"], rules["income_max"] + 1})
+
+    domains = database.rule_domains()
+    return [
+        {"age": age, "income": income, "state": state, "occupation": occupation, "gender": gender}
+        for age in sorted(ages, key=lambda value: -1 if value is None else value)
+        for income in sorted(incomes, key=lambda value: -1 if value is None else value)
+        for state in domains["state"]
+        for occupation in domains["occupation"]
+        for gender in (None, "female")
+    ]
+
+
+def _assert_agrees(database, profile):
+    prepared = prepare_profile(profile)
+    for index, rule in enumerate(database.compiled_rules):
+        expected = database._calculate_eligibility(database.eligibility_rules(index), profile)
+        actual = rule(*prepared)
+        assert actual[0] == expected[0], (index, profile)
+        if expected[0] > 0:
+            assert actual[1] == expected[1], (index, profile)
+
+
+def test_shipped_catalog(database):
+    assert verify(database, samples=5000) == []
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_randomized_profiles(database, seed):
+    assert verify(database, samples=2000, seed=seed) == []
+
+
+def test_bucket_boundaries(database):
+    for profile in _boundary_profiles(database):
+        _assert_agrees(database, profile)
+
+
+@pytest.mark.parametrize("profile", [
+    {},
+    {"age": None, "state": None, "occupation": None, "gender": None, "income": None},
+    {"age": 0, "income": 0, "state": "", "occupation": "", "gender": ""},
+    {"age": 45},
+    {"state": "Telangana"},
+    {"occupation": "farmer", "income": None},
+])
+def test_missing_fields(database, profile):
+    _assert_agrees(database, profile)
+
+
+def test_synthetic_rules(tmp_path):
+    schemes = [{"id": f"SYN{index:03d}", "eligibility": rules} for index, rules in enumerate(SYNTHETIC_RULES)]
+    path = tmp_path / "schemes.json"
+    path.write_text(json.dumps({"schemes": schemes}), encoding="utf-8")
+
+    database = SchemeDatabase(str(path))
+
+    assert verify(database, samples=3000) == []
+    for profile in _boundary_profiles(database):
+        _assert_agrees(database, profile)
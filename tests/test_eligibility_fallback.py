@@ -0,0 +1,54 @@
+"""The full-scan fallback (table skipped or off-vocabulary values) against the table"""
+
+import os
+
+import pytest
+
+from agent_gemini import EligibilityTable, SchemeDatabase
+
+
+CATALOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "schemes_database.json")
+
+# A conversation filling in and correcting its profile one field at a time
+PROFILES = [
+    {},
+    {"age": 45},
+    {"age": 45, "state": "Telangana"},
+    {"age": 45, "state": "Telangana", "occupation": "farmer"},
+    {"age": 45, "state": "Telangana", "occupation": "farmer", "income": 100000},
+    {"age": 45, "state": "Telangana", "occupation": "weaver", "income": 100000},
+    {"age": 70, "state": "Telangana", "occupation": "weaver", "income": 100000},
+    {"age": 70, "state": "Telangana", "occupation": "weaver", "income": 100000, "gender": "female"},
+    {"age": 17, "state": "Andhra Pradesh", "occupation": "student", "income": 150000, "gender": "female"},
+    {"age": None, "state": None, "occupation": "student", "income": None, "gender": None},
+]
+
+
+def _ranked(results):
+    return [(item["scheme"]["id"], item["eligibility_score"], list(item["match_reasons"])) for item in results]
+
+
+@pytest.fixture(scope="module")
+def with_table():
+    return SchemeDatabase(CATALOG)
+
+
+def test_skipped_table_scans_like_the_table(monkeypatch, with_table):
+    monkeypatch.setattr(EligibilityTable, "MAX_KEYS", 0)
+    without_table = SchemeDatabase(CATALOG)
+    assert without_table.table.lookup({"state": "Telangana"}) is None
+
+    for profile in PROFILES:
+        assert with_table.table.lookup(profile) is not None
+        assert _ranked(without_table.find_eligible_schemes(profile)) == \
+            _ranked(with_table.find_eligible_schemes(profile))
+
+
+def test_off_vocabulary_value_is_scanned(with_table):
+    profile = {"age": 45, "state": "Nowhere", "occupation": "farmer"}
+    assert with_table.table.lookup(profile) is None
+
+    ranked = [(with_table.schemes[index]["id"], score, list(reasons))
+              for index, score, reasons in with_table.score_all(profile)]
+    assert ranked
+    assert _ranked(with_table.find_eligible_schemes(profile)) == ranked
@@ -0,0 +1,78 @@
+"""Loading the intent model and applying its confidence thresholds"""
+
+import os
+
+import pytest
+
+from intent_classifier import (
+    AFFIRMATION,
+    APPLY_REQUEST,
+    NEGATION,
+    OFF_TOPIC,
+    PROFILE_CORRECTION,
+    IntentClassifier,
+    read_examples,
+)
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL = os.path.join(ROOT, "intent_model.json")
+SEED = os.path.join(ROOT, "intent_seed.jsonl")
+
+
+@pytest.fixture(scope="module")
+def model():
+    return IntentClassifier.load(MODEL)
+
+
+def test_shipped_model_is_the_seed_set_trained(model):
+    trained = IntentClassifier.train(read_examples([SEED]))
+    for text, _ in read_examples([SEED]):
+        assert model.classify(text) == trained.classify(text)
+
+
+@pytest.mark.parametrize("text, label", [
+    ("అవును", AFFIRMATION),
+    ("ఎలా దరఖాస్తు చేయాలి?", APPLY_REQUEST),
+    ("వద్దు", NEGATION),
+    ("నా వయస్సు తప్పు", PROFILE_CORRECTION),
+    ("cricket score enti", OFF_TOPIC),
+])
+def test_routine_turns(model, text, label):
+    assert model.predict(text).label == label
+
+
+def test_unseen_utterance_has_no_intent(model):
+    assert model.posteriors("qqqq zzzz xxxx") == {}
+    assert model.classify("qqqq zzzz xxxx") is None
+
+
+def test_predict_applies_min_confidence():
+    text = "ఆ పథకం వద్దు, దరఖాస్తు ఎలా?"
+    confidence = IntentClassifier.load(MODEL).classify(text).confidence
+
+    assert IntentClassifier.load(MODEL, min_confidence=confidence - 1e-6).predict(text).confidence == confidence
+    assert IntentClassifier.load(MODEL, min_confidence=confidence + 1e-6).predict(text) is None
+
+
+def test_save_load_round_trip(tmp_path, model):
+    path = str(tmp_path / "model.json")
+    model.save(path)
+    reloaded = IntentClassifier.load(path)
+
+    for text in ("అవును", "ఎలా దరఖాస్తు చేయాలి?", "cricket score enti"):
+        assert reloaded.posteriors(text) == pytest.approx(model.posteriors(text))
+
+
+def test_from_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("INTENT_MODEL_PATH", str(tmp_path / "missing.json"))
+    assert IntentClassifier.from_env() is None
+
+    monkeypatch.setenv("INTENT_MODEL_PATH", MODEL)
+    monkeypatch.setenv("INTENT_MIN_CONFIDENCE", "0.9")
+    assert IntentClassifier.from_env().min_confidence == 0.9
+
+
+def test_unknown_training_label():
+    with pytest.raises(ValueError):
+        IntentClassifier.train([("hello", "greeting")])
@@ -0,0 +1,62 @@
+"""A split response under a saturated tts stage"""
+
+import threading
+import time
+import wave
+
+from admission import AdmissionController
+from fake_services import FakeSpeechService, LatencyModel
+from parallel_tts import ParallelSynthesizer, split_segments
+from structured_logging import session_id_var
+
+
+SENTENCE = "ఈ పథకం రైతులకు ప్రతి సంవత్సరం ఆర్థిక సహాయం అందిస్తుంది."
+TEXT = " ".join([SENTENCE] * 12)
+
+
+class CountingSpeech(FakeSpeechService):
+    """Fake TTS that records how many calls overlap"""
+
+    def __init__(self):
+        super().__init__(LatencyModel(0, 0), LatencyModel(50, 50), error_rate=0.0)
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def text_to_speech(self, text, output_file="output.wav"):
+        with self.lock:
+            self.calls += 1
+        return super().text_to_speech(text, output_file)
+
+
+def test_segments_of_one_turn_share_its_tts_slot(monkeypatch, tmp_path):
+    monkeypatch.setenv("TTS_CONCURRENCY", "1")
+    monkeypatch.setenv("ADMISSION_PER_SESSION_QUEUE", "2")
+    admission = AdmissionController.from_env()
+    speech = CountingSpeech()
+    synthesizer = ParallelSynthesizer(speech, admission=admission, workers=4, split_min_chars=100, segment_chars=80)
+    assert len(split_segments(TEXT, 80, 4)) == 4
+
+    # Another session holds the only slot, so this turn has to queue
+    holding = threading.Event()
+
+    def other_session():
+        session_id_var.set("other")
+        with admission.stage("tts"):
+            holding.set()
+            time.sleep(0.2)
+
+    other = threading.Thread(target=other_session)
+    other.start()
+    holding.wait()
+
+    session_id_var.set("turn")
+    output = tmp_path / "response.wav"
+    assert synthesizer.text_to_speech(TEXT, str(output))
+    other.join()
+
+    assert speech.calls == 4
+    assert synthesizer.stats()["split"] == 1
+    assert admission.stats()["tts"]["rejected"] == 0
+    assert admission.stats()["tts"]["in_flight"] == 0
+    with wave.open(str(output), "rb") as audio:
+        assert audio.getnframes() > 0
@@ -0,0 +1,42 @@
+"""Precompute job: unchanged schemes are skipped unless forced or named with --only"""
+
+import os
+
+from agent_gemini import SchemeDatabase
+from precompute import PrecomputeJob
+
+
+CATALOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "schemes_database.json")
+
+
+class CountingGenerator:
+    """Canned explanation per call, counting calls"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate_response(self, context, task, user_input):
+        self.calls += 1
+        return f"{user_input} వివరణ {self.calls}"
+
+
+class FakeSpeech:
+    def text_to_speech(self, text, output_file):
+        with open(output_file, "wb") as f:
+            f.write(b"RIFF")
+        return True
+
+
+def test_only_regenerates_named_schemes_even_if_unchanged(tmp_path):
+    database = SchemeDatabase(CATALOG)
+    generator = CountingGenerator()
+    job = PrecomputeJob(database=database, generator=generator, speech_service=FakeSpeech(),
+                        output_dir=str(tmp_path))
+
+    assert job.run()["generated"] == len(database.schemes)
+    assert job.run() == {"generated": 0, "skipped": len(database.schemes), "failed": 0, "removed": 0}
+
+    scheme_id = database.schemes[0]["id"]
+    before = job.manifest["schemes"][scheme_id]["explanation"]
+    assert job.run(only={scheme_id}) == {"generated": 1, "skipped": 0, "failed": 0, "removed": 0}
+    assert job.manifest["schemes"][scheme_id]["explanation"] != before
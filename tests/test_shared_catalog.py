@@ -0,0 +1,61 @@
+"""The shared catalog file answers exactly like the in-process indexes"""
+
+import os
+
+import pytest
+
+from agent_gemini import GENDER_KEYWORDS, OCCUPATION_KEYWORDS, STATE_KEYWORDS, EligibilityTable, SchemeDatabase
+from shared_catalog import build_shared_catalog
+
+
+CATALOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "schemes_database.json")
+
+QUERIES = ["రైతు పథకం", "pension for old age", "ఇల్లు కావాలి", "scholarship for students", "బ్యాంకు ఖాతా", "xyz"]
+
+
+def _profiles():
+    for state in [None, "Nowhere", *STATE_KEYWORDS]:
+        for occupation in [None, "astronaut", *OCCUPATION_KEYWORDS]:
+            for gender in [None, *GENDER_KEYWORDS]:
+                for age, income in [(None, None), (17, 50000), (18, 100000), (45, 100001), (65, 250000), (130, 10 ** 9)]:
+                    yield {"age": age, "state": state, "occupation": occupation, "gender": gender, "income": income}
+
+
+@pytest.fixture(scope="module")
+def databases(tmp_path_factory):
+    path = build_shared_catalog(CATALOG, str(tmp_path_factory.mktemp("shared") / "schemes.catalog"))
+    return SchemeDatabase(CATALOG), SchemeDatabase(CATALOG, shared_catalog_path=path)
+
+
+def test_records_and_search_match(databases):
+    local, shared = databases
+
+    assert [scheme["id"] for scheme in shared.schemes] == [scheme["id"] for scheme in local.schemes]
+    assert shared.schemes[0] is shared.schemes[0]
+    for query in QUERIES:
+        assert shared.search(query, 5) == local.search(query, 5)
+
+
+def test_table_matches_without_compiling(databases):
+    local, shared = databases
+
+    for profile in _profiles():
+        assert shared.table.lookup(profile) == local.table.lookup(profile)
+        if shared.table.lookup(profile) is not None:
+            assert shared.find_eligible_schemes(profile) == local.find_eligible_schemes(profile)
+    assert shared._compiled_rules is None
+
+    # Off-vocabulary values fall back to a scan, which compiles the rules
+    profile = {"age": 45, "state": "Nowhere", "occupation": "farmer"}
+    assert shared.find_eligible_schemes(profile) == local.find_eligible_schemes(profile)
+    assert shared._compiled_rules is not None
+
+
+def test_skipped_table_falls_back(monkeypatch, tmp_path):
+    monkeypatch.setattr(EligibilityTable, "MAX_KEYS", 0)
+    path = build_shared_catalog(CATALOG, str(tmp_path / "schemes.catalog"))
+    local, shared = SchemeDatabase(CATALOG), SchemeDatabase(CATALOG, shared_catalog_path=path)
+
+    assert shared.catalog.table is None
+    profile = {"age": 45, "state": "Telangana", "occupation": "farmer", "income": 100000}
+    assert shared.find_eligible_schemes(profile) == local.find_eligible_schemes(profile)
@@ -0,0 +1,82 @@
+"""Turn log rotation, pruning and export filters"""
+
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from turn_log import TurnLog, normalize_timestamp
+
+
+def _flush(log, written):
+    deadline = time.monotonic() + 2
+    while log.counters["written"] < written:
+        assert time.monotonic() < deadline, "turn log writer stalled"
+        time.sleep(0.005)
+
+
+def _record(timestamp, session_id="s1", state="presenting_schemes"):
+    return {"timestamp": timestamp, "session_id": session_id, "state": state, "user": "x" * 50}
+
+
+def test_rotation_and_pruning(tmp_path):
+    log = TurnLog(str(tmp_path), max_bytes=1, keep=2)
+
+    for index in range(4):
+        log.append(_record(f"2026-01-0{index + 1}T00:00:00"))
+        _flush(log, index + 1)
+
+    rotated = log._rotated_files()
+    assert log.counters["rotations"] == 4
+    assert len(rotated) == 2
+    assert not os.path.exists(log.active_path)
+
+    # The two newest rotated files survive, oldest first
+    assert [record["timestamp"] for record in log.records()] == ["2026-01-03T00:00:00", "2026-01-04T00:00:00"]
+
+
+def test_filters(tmp_path):
+    log = TurnLog(str(tmp_path))
+    records = [
+        _record("2026-03-01T09:00:00", "s1", "collecting_basic_info"),
+        _record("2026-03-01T10:00:00", "s2", "presenting_schemes"),
+        _record("2026-03-01T11:00:00", "s1", "presenting_schemes"),
+    ]
+    for record in records:
+        log.append(record)
+    _flush(log, len(records))
+
+    # A partially written last line is skipped
+    with open(log.active_path, "a", encoding="utf-8") as f:
+        f.write('{"timestamp": "2026-03-01T12:')
+
+    assert len(list(log.records())) == 3
+    assert [r["timestamp"] for r in log.records(start="2026-03-01T10:00:00")] == ["2026-03-01T10:00:00", "2026-03-01T11:00:00"]
+    assert [r["timestamp"] for r in log.records(end="2026-03-01T10:00:00")] == ["2026-03-01T09:00:00"]
+    assert [r["session_id"] for r in log.records(states=["presenting_schemes"])] == ["s2", "s1"]
+    assert [r["timestamp"] for r in log.records(session_id="s1", states=["presenting_schemes"])] == ["2026-03-01T11:00:00"]
+
+
+def test_rotated_file_ending_before_start_is_not_read(tmp_path):
+    log = TurnLog(str(tmp_path))
+
+    # Rotated in 2020, so nothing in it can be newer; the record inside is never seen
+    with open(tmp_path / "turns.20200101T000000000000.1.jsonl", "w", encoding="utf-8") as f:
+        f.write(json.dumps(_record("2030-01-01T00:00:00", "stale")) + "\n")
+    with open(tmp_path / "turns.20260101T000000000000.1.jsonl", "w", encoding="utf-8") as f:
+        f.write(json.dumps(_record("2025-12-31T23:00:00", "kept")) + "\n")
+
+    assert [r["session_id"] for r in log.records()] == ["stale", "kept"]
+    assert [r["session_id"] for r in log.records(start="2025-06-01T00:00:00")] == ["kept"]
+
+
+def test_normalize_timestamp():
+    assert normalize_timestamp("2026-03-01") == "2026-03-01T00:00:00"
+
+    moment = datetime(2026, 3, 1, 12, 0, tzinfo=timezone(timedelta(hours=5, minutes=30)))
+    assert normalize_timestamp(moment.isoformat()) == moment.astimezone().replace(tzinfo=None).isoformat()
+
+    with pytest.raises(ValueError):
+        normalize_timestamp("yesterday")
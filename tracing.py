@@ -0,0 +1,457 @@
+"""
+Distributed Tracing for Conversation Turns
+OpenTelemetry-style spans with W3C trace context. Each turn gets one trace: a
+root span for the HTTP request or WebSocket turn, and child spans for STT,
+the agent's state handlers, Gemini and TTS. Attributes carry the session id,
+turn number and agent state, so a slow turn can be broken down stage by stage.
+
+Sampling is decided once, at the root (head-based). An incoming traceparent
+header's sampled flag is honoured; otherwise a fraction of trace ids is kept.
+Spans of unsampled traces, and spans opened outside any trace (background
+prefetch), are not recorded. Finished spans go on an in-memory queue that a
+background thread exports in batches. When the queue is full, spans are
+dropped and counted rather than blocking a turn.
+
+Exporters:
+    file   One JSON span per line (default traces.jsonl); fully offline
+    otlp   OTLP/HTTP JSON to a collector (Jaeger, Tempo, otel-collector)
+
+Find the slowest traced turns and where their time went:
+
+    python tracing.py traces.jsonl --top 10
+
+Environment:
+    TRACE_EXPORTER                 none, file or otlp (default none, tracing off)
+    TRACE_FILE                     File exporter path (default traces.jsonl)
+    OTEL_EXPORTER_OTLP_ENDPOINT    Collector base URL (default http://localhost:4318)
+    OTEL_SERVICE_NAME              Service name on exported spans (default telugu-scheme-agent)
+    TRACE_SAMPLE_RATE              Fraction of new traces recorded (default 0.1)
+    TRACE_QUEUE_SIZE               Finished spans buffered before dropping (default 2048)
+"""
+
+import argparse
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+import urllib.request
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+BATCH_SIZE = 256
+FLUSH_SECONDS = 2.0
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_tracer = None
+
+
+class Span:
+    """One timed operation within a trace"""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind",
+                 "start_ns", "end_ns", "attributes", "error")
+
+    recording = True
+
+    def __init__(self, trace_id: str, parent_id: Optional[str], name: str, kind: str, attributes: Dict):
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.error = None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+
+    def set_attribute(self, key: str, value):
+        if value is not None:
+            self.attributes[key] = value
+
+    def record_error(self, error: BaseException):
+        self.error = f"{type(error).__name__}: {error}"
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class NonRecordingSpan:
+    """Stands in for spans of an unsampled trace so children inherit the decision"""
+
+    recording = False
+    trace_id = None
+    traceparent = None
+
+    def set_attribute(self, key: str, value):
+        pass
+
+    def record_error(self, error: BaseException):
+        pass
+
+
+NON_RECORDING = NonRecordingSpan()
+
+
+class FileExporter:
+    """Appends finished spans as JSON lines"""
+
+    def __init__(self, path: str, service_name: str):
+        self.path = path
+        self.service_name = service_name
+
+    def export(self, spans: List[Span]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for span in spans:
+                record = span.to_dict()
+                record["service"] = self.service_name
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class OtlpHttpExporter:
+    """Posts spans to an OTLP/HTTP collector using the JSON encoding"""
+
+    KINDS = {"internal": 1, "server": 2, "client": 3}
+
+    def __init__(self, endpoint: str, service_name: str, timeout: float = 5.0):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self.timeout = timeout
+
+    def export(self, spans: List[Span]):
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": self.service_name})},
+                "scopeSpans": [{
+                    "scope": {"name": __name__},
+                    "spans": [self._encode(span) for span in spans],
+                }],
+            }],
+        }
+
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    def _encode(self, span: Span) -> Dict:
+        encoded = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": self.KINDS.get(span.kind, 1),
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": _otlp_attributes(span.attributes),
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 0},
+        }
+        if span.parent_id:
+            encoded["parentSpanId"] = span.parent_id
+        return encoded
+
+
+def _otlp_attributes(attributes: Dict) -> List[Dict]:
+    encoded = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        encoded.append({"key": key, "value": typed})
+    return encoded
+
+
+class Tracer:
+    """Head-sampled span factory with a batching background exporter"""
+
+    def __init__(self, exporter, sample_rate: float, queue_size: int):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.queue = queue.Queue(queue_size)
+        self.counters = {"started_traces": 0, "sampled_traces": 0, "exported": 0, "dropped": 0, "export_errors": 0}
+        self.thread = None
+        self._start_thread()
+
+    def _start_thread(self):
+        self.thread = threading.Thread(target=self._export_loop, name="trace-exporter", daemon=True)
+        self.thread.start()
+
+    def sampled(self, trace_id: str) -> bool:
+        """Trace-id ratio sampling: the same trace id always gets the same decision"""
+        return int(trace_id[:16], 16) < self.sample_rate * (1 << 64)
+
+    def finish(self, span: Span):
+        span.end_ns = time.time_ns()
+        try:
+            self.queue.put_nowait(span)
+        except queue.Full:
+            self.counters["dropped"] += 1
+
+    def _export_loop(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + FLUSH_SECONDS
+
+            while len(batch) < BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            stop = None in batch
+            self._export([span for span in batch if span is not None])
+            if stop:
+                return
+
+    def _export(self, spans: List[Span]):
+        if not spans:
+            return
+        try:
+            self.exporter.export(spans)
+            self.counters["exported"] += len(spans)
+        except Exception as e:
+            self.counters["export_errors"] += 1
+            logger.warning("Span export failed (%d spans): %s", len(spans), e)
+
+    def shutdown(self):
+        """Export everything queued (called at exit)"""
+        self.queue.put(None)
+        self.thread.join(timeout=FLUSH_SECONDS + 5)
+
+    def stats(self) -> Dict:
+        return {"sample_rate": self.sample_rate, "queued": self.queue.qsize(), **self.counters}
+
+
+def configure_tracing():
+    """Set up the exporter from the environment (idempotent; tracing stays off without TRACE_EXPORTER)"""
+    global _tracer
+
+    if _tracer is not None:
+        return
+
+    kind = os.getenv("TRACE_EXPORTER", "none").lower()
+    service_name = os.getenv("OTEL_SERVICE_NAME", "telugu-scheme-agent")
+
+    if kind == "file":
+        exporter = FileExporter(os.getenv("TRACE_FILE", "traces.jsonl"), service_name)
+    elif kind == "otlp":
+        exporter = OtlpHttpExporter(os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318"), service_name)
+    else:
+        return
+
+    _tracer = Tracer(
+        exporter,
+        sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "0.1")),
+        queue_size=int(os.getenv("TRACE_QUEUE_SIZE", "2048")),
+    )
+    logger.info("Tracing enabled", extra={"exporter": kind, "sample_rate": _tracer.sample_rate})
+
+    atexit.register(_tracer.shutdown)
+    os.register_at_fork(after_in_child=_restart_in_child)
+
+
+def _restart_in_child():
+    """The exporter thread does not survive fork; give the child its own"""
+    if _tracer is not None:
+        _tracer.queue = queue.Queue(_tracer.queue.maxsize)
+        _tracer._start_thread()
+
+
+def current_span():
+    """Innermost active span (a no-op span outside any trace)"""
+    return _current_span.get() or NON_RECORDING
+
+
+def parse_traceparent(header: Optional[str]):
+    """(trace_id, parent_span_id, sampled) from a W3C traceparent header, or None"""
+    match = TRACEPARENT.match((header or "").strip().lower())
+    if not match or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+@contextmanager
+def start_trace(name: str, attributes: Optional[Dict] = None, traceparent: Optional[str] = None, kind: str = "server"):
+    """
+    Root span of a turn; makes the head sampling decision for the whole trace
+
+    Args:
+        name: Span name
+        attributes: Span attributes, OpenTelemetry-style dotted keys
+        traceparent: Incoming W3C traceparent header; the trace continues it
+        kind: server for requests, internal otherwise
+    """
+    if _tracer is None:
+        yield NON_RECORDING
+        return
+
+    parent = parse_traceparent(traceparent)
+    _tracer.counters["started_traces"] += 1
+
+    if parent:
+        trace_id, parent_id, sampled = parent
+    else:
+        trace_id, parent_id = secrets.token_hex(16), None
+        sampled = _tracer.sampled(trace_id)
+
+    if not sampled:
+        token = _current_span.set(NON_RECORDING)
+        try:
+            yield NON_RECORDING
+        finally:
+            _current_span.reset(token)
+        return
+
+    _tracer.counters["sampled_traces"] += 1
+    yield from _run_span(Span(trace_id, parent_id, name, kind, _attributes(attributes)))
+
+
+@contextmanager
+def span(name: str, attributes: Optional[Dict] = None):
+    """Child span of the active trace; a no-op outside a sampled trace"""
+    parent = _current_span.get()
+    if parent is None or not parent.recording:
+        yield NON_RECORDING
+        return
+
+    yield from _run_span(Span(parent.trace_id, parent.span_id, name, "internal", _attributes(attributes)))
+
+
+def _run_span(active: Span):
+    token = _current_span.set(active)
+    try:
+        yield active
+    except BaseException as e:
+        active.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        _tracer.finish(active)
+
+
+def _attributes(attributes: Optional[Dict]) -> Dict:
+    return {key: value for key, value in (attributes or {}).items() if value is not None}
+
+
+def traced(route: str):
+    """Decorator for Flask views: root span per request, continuing any traceparent header"""
+    from flask import make_response, request
+
+    def decorator(view):
+        if _tracer is None:
+            return view
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            attributes = {"http.method": request.method, "http.route": route}
+            with start_trace(f"{request.method} {route}", attributes, request.headers.get("traceparent")) as root:
+                response = make_response(view(*args, **kwargs))
+                root.set_attribute("http.status_code", response.status_code)
+                if root.recording:
+                    response.headers["X-Trace-Id"] = root.trace_id
+                return response
+
+        return wrapper
+
+    return decorator
+
+
+def tracing_stats() -> Optional[Dict]:
+    """Exporter counters, or None when tracing is off"""
+    return _tracer.stats() if _tracer else None
+
+
+def slowest_traces(path: str, top: int) -> List[Dict]:
+    """
+    Root spans from a file export, slowest first, each with its descendants
+
+    A root is any span whose parent is not in the file: a span with no
+    parent, or a request's local root whose parent came in a traceparent
+    header from another service.
+    """
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+
+    exported = {(record["trace_id"], record["span_id"]) for record in records}
+    children = defaultdict(list)
+    roots = []
+
+    for record in records:
+        parent = (record["trace_id"], record["parent_span_id"])
+        if record["parent_span_id"] and parent in exported:
+            children[parent].append(record)
+        else:
+            roots.append(record)
+
+    roots.sort(key=lambda record: record["duration_ms"], reverse=True)
+
+    def attach(record: Dict) -> Dict:
+        kids = sorted(children.get((record["trace_id"], record["span_id"]), []),
+                      key=lambda child: child["start_time_unix_nano"])
+        return {**record, "children": [attach(child) for child in kids]}
+
+    return [attach(root) for root in roots[:top]]
+
+
+def _print_tree(record: Dict, depth: int = 0):
+    attributes = record["attributes"]
+    detail = " ".join(f"{key}={attributes[key]}" for key in ("session.id", "turn.number", "agent.state")
+                      if key in attributes)
+    error = f"  ERROR {record['error']}" if record["error"] else ""
+    print(f"{'  ' * depth}{record['duration_ms']:>10.1f} ms  {record['name']}  {detail}{error}")
+    for child in record["children"]:
+        _print_tree(child, depth + 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the slowest traced turns from a file export")
+    parser.add_argument("path", nargs="?", default="traces.jsonl", help="TRACE_FILE written by the server")
+    parser.add_argument("--top", type=int, default=10, help="Number of traces to show")
+    args = parser.parse_args()
+
+    for trace in slowest_traces(args.path, args.top):
+        print(f"trace {trace['trace_id']}")
+        _print_tree(trace)
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+"""
+Append-Only Turn Log
+Every completed turn is written as one JSON line to a rotating log on disk,
+so transcripts can be analyzed without touching the serving process's memory.
+Request threads only enqueue the record; a background thread does the file
+I/O. When the queue is full, records are dropped and counted rather than
+delaying a turn.
+
+Each process writes its own file (turns.<pid>.jsonl). When that file passes
+TURN_LOG_MAX_BYTES, it is renamed to turns.<rotated-at>.<pid>.jsonl and never
+written again. Export walks rotated files oldest first, then the active
+files, and skips any rotated file that ended before the requested start.
+
+Environment:
+    TURN_LOG_DIR          Directory for turn logs (default turn_logs; empty disables)
+    TURN_LOG_MAX_BYTES    Rotate the active file past this size (default 50000000)
+    TURN_LOG_KEEP         Rotated files kept per directory (default 50)
+    TURN_LOG_QUEUE_SIZE   Records buffered before dropping (default 10000)
+"""
+
+import glob
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, Optional
+
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_PATTERN = "turns.*.jsonl"
+STAMP_FORMAT = "%Y%m%dT%H%M%S%f"
+
+
+class TurnLog:
+    """Background writer and reader for the rotating JSONL turn log"""
+
+    def __init__(self, directory: str, max_bytes: int = 50_000_000, keep: int = 50, queue_size: int = 10000):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.queue = queue.Queue(queue_size)
+        self.counters = {"written": 0, "dropped": 0, "rotations": 0, "write_errors": 0}
+
+        os.makedirs(directory, exist_ok=True)
+        self._start_writer()
+        os.register_at_fork(after_in_child=self._restart_in_child)
+
+    @classmethod
+    def from_env(cls) -> Optional["TurnLog"]:
+        """Turn log configured from the environment, or None when disabled"""
+        directory = os.getenv("TURN_LOG_DIR", "turn_logs")
+        if not directory:
+            return None
+        return cls(
+            directory,
+            max_bytes=int(os.getenv("TURN_LOG_MAX_BYTES", "50000000")),
+            keep=int(os.getenv("TURN_LOG_KEEP", "50")),
+            queue_size=int(os.getenv("TURN_LOG_QUEUE_SIZE", "10000")),
+        )
+
+    def _start_writer(self):
+        threading.Thread(target=self._write_loop, name="turn-log", daemon=True).start()
+
+    def _restart_in_child(self):
+        """The writer thread does not survive fork; the child gets its own (and its own file)"""
+        self.queue = queue.Queue(self.queue.maxsize)
+        self._start_writer()
+
+    @property
+    def active_path(self) -> str:
+        return os.path.join(self.directory, f"turns.{os.getpid()}.jsonl")
+
+    def append(self, record: Dict):
+        """Queue a turn record (never blocks)"""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.counters["dropped"] += 1
+
+    def _write_loop(self):
+        records = self.queue
+        while True:
+            batch = [records.get()]
+            while len(batch) < 512:
+                try:
+                    batch.append(records.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self._write(batch)
+                self.counters["written"] += len(batch)
+            except OSError as e:
+                self.counters["write_errors"] += 1
+                logger.warning("Turn log write failed (%d records): %s", len(batch), e)
+
+    def _write(self, batch):
+        path = self.active_path
+        lines = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in batch)
+
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(lines)
+            size = f.tell()
+
+        if size >= self.max_bytes:
+            self._rotate(path)
+
+    def _rotate(self, path: str):
+        stamp = datetime.now().strftime(STAMP_FORMAT)
+        os.replace(path, os.path.join(self.directory, f"turns.{stamp}.{os.getpid()}.jsonl"))
+        self.counters["rotations"] += 1
+
+        rotated = self._rotated_files()
+        for old in rotated[:max(0, len(rotated) - self.keep)]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+    def _rotated_files(self):
+        """Rotated files, oldest first"""
+        return sorted(path for path in glob.glob(os.path.join(self.directory, ACTIVE_PATTERN))
+                      if _rotation_stamp(path))
+
+    def _active_files(self):
+        return sorted(path for path in glob.glob(os.path.join(self.directory, ACTIVE_PATTERN))
+                      if not _rotation_stamp(path))
+
+    def records(self, start: Optional[str] = None, end: Optional[str] = None,
+                states: Optional[Iterable[str]] = None, session_id: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Stream turn records matching the filters, one file at a time
+
+        Args:
+            start: ISO timestamp; records at or after it
+            end: ISO timestamp; records before it
+            states: Agent states to keep (all when empty)
+            session_id: Only this session's turns
+        """
+        states = set(states or ())
+        start_stamp = _file_stamp(start) if start else None
+
+        for path in self._rotated_files() + self._active_files():
+            # A rotated file holds nothing newer than its rotation time
+            rotated_at = _rotation_stamp(path)
+            if start_stamp and rotated_at and rotated_at < start_stamp:
+                continue
+
+            try:
+                f = open(path, encoding="utf-8")
+            except FileNotFoundError:
+                continue  # rotated away or pruned since listing
+
+            with f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # partially written last line
+
+                    timestamp = record.get("timestamp", "")
+                    if start and timestamp < start:
+                        continue
+                    if end and timestamp >= end:
+                        continue
+                    if states and record.get("state") not in states:
+                        continue
+                    if session_id and record.get("session_id") != session_id:
+                        continue
+                    yield record
+
+    def stats(self) -> Dict:
+        return {"directory": self.directory, "queued": self.queue.qsize(), **self.counters}
+
+
+def normalize_timestamp(value: str) -> str:
+    """
+    Query-string timestamp in the records' local isoformat, so strings compare in time order
+
+    Raises:
+        ValueError: If the value is not an ISO date or datetime
+    """
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed.isoformat()
+
+
+def _file_stamp(timestamp: str) -> str:
+    return datetime.fromisoformat(timestamp).strftime(STAMP_FORMAT)
+
+
+def _rotation_stamp(path: str) -> Optional[str]:
+    parts = os.path.basename(path).split(".")
+    return parts[1] if len(parts) == 4 else None
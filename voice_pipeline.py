@@ -3,13 +3,40 @@ Voice Pipeline for Telugu Speech-to-Text and Text-to-Speech
 Web Service Version - NO SOUNDDEVICE (for cloud deployment)
 """
 
-from google.cloud import speech_v1p1beta1 as speech
-from google.cloud import texttospeech
-from typing import Tuple
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
 import os
 import io
+import logging
+import threading
+import time
 import wave
 
+from tracing import span
+
+
+logger = logging.getLogger(__name__)
+
+
+def _speech():
+    """Import Speech-to-Text on first use (gRPC stack is slow to import)"""
+    from google.cloud import speech_v1p1beta1 as speech
+    return speech
+
+
+def _texttospeech():
+    """Import Text-to-Speech on first use (gRPC stack is slow to import)"""
+    from google.cloud import texttospeech
+    return texttospeech
+
+
+@lru_cache(maxsize=32)
+def _speech_contexts(hints: Tuple) -> List:
+    """SpeechContext messages for a phrase-set tuple (one per agent state, so built once each)"""
+    speech = _speech()
+    return [speech.SpeechContext(phrases=list(phrases), boost=boost) for phrases, boost in hints]
+
 
 class VoiceConfig:
     """Configuration for voice services"""
@@ -24,6 +51,163 @@ class VoiceConfig:
     
     # Voice names
     GOOGLE_VOICE = "te-IN-Standard-A"  # Female voice
+    
+    # gRPC client pool
+    POOL_SIZE = int(os.getenv("SPEECH_POOL_SIZE", "2"))
+    KEEPALIVE_MS = int(os.getenv("SPEECH_KEEPALIVE_MS", "30000"))
+    KEEPALIVE_TIMEOUT_MS = int(os.getenv("SPEECH_KEEPALIVE_TIMEOUT_MS", "10000"))
+    WARMUP_TIMEOUT = float(os.getenv("SPEECH_WARMUP_TIMEOUT", "10"))
+    IDLE_REWARM_SECONDS = float(os.getenv("SPEECH_IDLE_REWARM_SECONDS", "120"))
+    UNHEALTHY_AFTER_FAILURES = 3
+    MAINTENANCE_INTERVAL = 15
+
+
+def channel_options() -> List[Tuple[str, int]]:
+    """gRPC channel options that keep idle connections open"""
+    return [
+        ("grpc.keepalive_time_ms", VoiceConfig.KEEPALIVE_MS),
+        ("grpc.keepalive_timeout_ms", VoiceConfig.KEEPALIVE_TIMEOUT_MS),
+        ("grpc.keepalive_permit_without_calls", 1),
+        ("grpc.http2.max_pings_without_data", 0),
+    ]
+
+
+class PooledClient:
+    """One gRPC client on its own channel, with health tracking"""
+    
+    def __init__(self, client, channel):
+        self.client = client
+        self.channel = channel
+        self.in_flight = 0
+        self.last_used = time.time()
+        self.consecutive_failures = 0
+        self.total_failures = 0
+        self.last_error = None
+        self.healthy = True
+
+
+class ClientPool:
+    """Pool of gRPC clients so concurrent turns don't share one channel"""
+    
+    def __init__(self, name: str, factory: Callable, size: int,
+                 warmup: Optional[Callable] = None, rewarm: Optional[Callable] = None):
+        """
+        Create and warm a client pool
+        
+        Args:
+            name: Pool name for logs and stats
+            factory: Returns a (client, channel) pair on a fresh channel
+            size: Number of channels
+            warmup: Optional cheap RPC run against a new or rebuilt client
+            rewarm: Optional RPC run against a client after an idle period;
+                without one, idle channels are only reconnected
+        """
+        self.name = name
+        self.factory = factory
+        self.warmup_rpc = warmup
+        self.rewarm_rpc = rewarm
+        self.lock = threading.Lock()
+        self.slots = [self._create_slot() for _ in range(max(1, size))]
+    
+    def _create_slot(self) -> PooledClient:
+        client, channel = self.factory()
+        return PooledClient(client, channel)
+    
+    def warm(self, slot: PooledClient, idle: bool = False):
+        """Connect the channel and run the warm-up RPC (the re-warm RPC for an idle channel)"""
+        import grpc
+        
+        grpc.channel_ready_future(slot.channel).result(timeout=VoiceConfig.WARMUP_TIMEOUT)
+        rpc = self.rewarm_rpc if idle else self.warmup_rpc
+        if rpc:
+            rpc(slot.client)
+        slot.last_used = time.time()
+    
+    def warm_all(self):
+        """Warm every channel, marking the ones that fail as unhealthy"""
+        for slot in self.slots:
+            try:
+                self.warm(slot)
+                self._record_success(slot)
+            except Exception as e:
+                logger.warning("%s warm-up failed: %s", self.name, e)
+                self._record_failure(slot, e)
+    
+    @contextmanager
+    def client(self):
+        """Check out the least busy healthy client"""
+        with self.lock:
+            candidates = [slot for slot in self.slots if slot.healthy] or self.slots
+            slot = min(candidates, key=lambda item: item.in_flight)
+            slot.in_flight += 1
+        
+        try:
+            yield slot.client
+        except Exception as e:
+            self._record_failure(slot, e)
+            raise
+        else:
+            self._record_success(slot)
+        finally:
+            with self.lock:
+                slot.in_flight -= 1
+                slot.last_used = time.time()
+    
+    def _record_success(self, slot: PooledClient):
+        with self.lock:
+            slot.consecutive_failures = 0
+            slot.healthy = True
+    
+    def _record_failure(self, slot: PooledClient, error: Exception):
+        with self.lock:
+            slot.consecutive_failures += 1
+            slot.total_failures += 1
+            slot.last_error = str(error)
+            if slot.consecutive_failures >= VoiceConfig.UNHEALTHY_AFTER_FAILURES:
+                slot.healthy = False
+    
+    def maintain(self):
+        """Rebuild unhealthy channels and re-warm idle ones"""
+        now = time.time()
+        
+        for index, slot in enumerate(list(self.slots)):
+            if slot.in_flight:
+                continue
+            
+            replacement = None
+            try:
+                if not slot.healthy:
+                    replacement = self._create_slot()
+                    self.warm(replacement)
+                    with self.lock:
+                        self.slots[index] = replacement
+                    slot.channel.close()
+                    logger.info("Rebuilt unhealthy %s channel %d", self.name, index)
+                elif now - slot.last_used > VoiceConfig.IDLE_REWARM_SECONDS:
+                    self.warm(slot, idle=True)
+            except Exception as e:
+                if replacement is not None and replacement is not self.slots[index]:
+                    replacement.channel.close()
+                self._record_failure(slot, e)
+    
+    def close(self):
+        """Close every channel"""
+        with self.lock:
+            slots = list(self.slots)
+        for slot in slots:
+            slot.channel.close()
+    
+    def stats(self) -> List[Dict]:
+        """Per-channel health snapshot"""
+        with self.lock:
+            return [{
+                "healthy": slot.healthy,
+                "in_flight": slot.in_flight,
+                "idle_seconds": round(time.time() - slot.last_used, 1),
+                "consecutive_failures": slot.consecutive_failures,
+                "total_failures": slot.total_failures,
+                "last_error": slot.last_error,
+            } for slot in self.slots]
 
 
 class GoogleSpeechService:
@@ -38,19 +222,107 @@ class GoogleSpeechService:
         """
         os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = credentials_path
         
-        self.stt_client = speech.SpeechClient()
-        self.tts_client = texttospeech.TextToSpeechClient()
+        # One credentials object for every channel so the token is fetched once
+        import google.auth
+        self.credentials, _ = google.auth.default(
+            scopes=["https://www.googleapis.com/auth/cloud-platform"]
+        )
+        
+        # The silent recognize is billed, so idle STT channels are only reconnected;
+        # keepalive pings already hold them open
+        self.stt_pool = ClientPool("STT", self._create_stt_client, VoiceConfig.POOL_SIZE,
+                                   warmup=self._recognize_silence)
+        list_voices = lambda client: client.list_voices(language_code=VoiceConfig.TELUGU_GOOGLE)
+        self.tts_pool = ClientPool(
+            "TTS", self._create_tts_client, VoiceConfig.POOL_SIZE,
+            warmup=list_voices, rewarm=list_voices
+        )
+        
+        self.warm_up()
+        
+        self._stop_maintenance = threading.Event()
+        threading.Thread(target=self._maintenance_loop, daemon=True).start()
+    
+    def _create_stt_client(self):
+        """Speech-to-Text client on a dedicated keepalive channel"""
+        from google.cloud.speech_v1p1beta1.services.speech.transports import SpeechGrpcTransport
+        
+        channel = SpeechGrpcTransport.create_channel(
+            credentials=self.credentials, options=channel_options()
+        )
+        client = _speech().SpeechClient(transport=SpeechGrpcTransport(channel=channel))
+        return client, channel
+    
+    @staticmethod
+    def _recognize_silence(client):
+        """
+        STT warm-up: recognize 100 ms of silence
+        
+        Connecting the channel alone leaves the first real turn to set up the
+        HTTP/2 stream and the recognizer. Speech has no free metadata RPC like
+        list_voices, so this is a billed (minimum-length) request, made only
+        when a channel is created or rebuilt.
+        """
+        speech = _speech()
+        config = speech.RecognitionConfig(
+            encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+            sample_rate_hertz=VoiceConfig.SAMPLE_RATE,
+            language_code=VoiceConfig.TELUGU_GOOGLE
+        )
+        silence = bytes(VoiceConfig.SAMPLE_RATE // 10 * 2)
+        client.recognize(config=config, audio=speech.RecognitionAudio(content=silence),
+                         timeout=VoiceConfig.WARMUP_TIMEOUT)
+    
+    def _create_tts_client(self):
+        """Text-to-Speech client on a dedicated keepalive channel"""
+        from google.cloud.texttospeech_v1.services.text_to_speech.transports import TextToSpeechGrpcTransport
+        
+        channel = TextToSpeechGrpcTransport.create_channel(
+            credentials=self.credentials, options=channel_options()
+        )
+        client = _texttospeech().TextToSpeechClient(transport=TextToSpeechGrpcTransport(channel=channel))
+        return client, channel
+    
+    def warm_up(self):
+        """Fetch the access token and connect every channel before the first turn"""
+        from google.auth.transport.requests import Request
+        
+        try:
+            self.credentials.refresh(Request())
+        except Exception as e:
+            logger.warning("Credential refresh failed during warm-up: %s", e)
         
-    def speech_to_text(self, audio_data: bytes) -> Tuple[str, float]:
+        self.stt_pool.warm_all()
+        self.tts_pool.warm_all()
+    
+    def _maintenance_loop(self):
+        """Keep channels warm after idle periods and replace unhealthy ones"""
+        while not self._stop_maintenance.wait(VoiceConfig.MAINTENANCE_INTERVAL):
+            self.stt_pool.maintain()
+            self.tts_pool.maintain()
+    
+    def close(self):
+        """Stop maintenance and close every channel"""
+        self._stop_maintenance.set()
+        self.stt_pool.close()
+        self.tts_pool.close()
+    
+    def pool_stats(self) -> Dict:
+        """Health of every pooled channel"""
+        return {"stt": self.stt_pool.stats(), "tts": self.tts_pool.stats()}
+        
+    def speech_to_text(self, audio_data: bytes, hints: Tuple = ()) -> Tuple[str, float]:
         """
         Convert Telugu speech to text
         
         Args:
             audio_data: Raw audio bytes (WAV format)
+            hints: Phrase sets ((phrases, boost), ...) from speech_hints
             
         Returns:
             Tuple of (transcribed_text, confidence_score)
         """
+        speech = _speech()
         audio = speech.RecognitionAudio(content=audio_data)
         
         config = speech.RecognitionConfig(
@@ -60,11 +332,15 @@ class GoogleSpeechService:
             enable_automatic_punctuation=True,
             model="default",
             use_enhanced=True,
-            alternative_language_codes=["en-IN"]
+            alternative_language_codes=["en-IN"],
+            speech_contexts=_speech_contexts(hints)
         )
         
         try:
-            response = self.stt_client.recognize(config=config, audio=audio)
+            with span("speech.recognize", {"audio.bytes": len(audio_data), "audio.encoding": "LINEAR16",
+                                           "stt.hint_sets": len(hints)}), \
+                    self.stt_pool.client() as client:
+                response = client.recognize(config=config, audio=audio)
             
             if not response.results:
                 return "", 0.0
@@ -75,9 +351,46 @@ class GoogleSpeechService:
             return alternative.transcript, alternative.confidence
             
         except Exception as e:
-            print(f"STT Error: {e}")
+            logger.error("STT error: %s", e)
             return "", 0.0
     
+    def transcribe_webm(self, audio_data: bytes, hints: Tuple = ()) -> Tuple[str, float]:
+        """
+        Convert browser-recorded Telugu speech to text
+        
+        Args:
+            audio_data: WEBM/Opus bytes from MediaRecorder
+            hints: Phrase sets ((phrases, boost), ...) from speech_hints
+            
+        Returns:
+            Tuple of (transcribed_text, confidence_score); empty text if nothing recognized
+            
+        Raises:
+            Exception: If the recognition request itself fails
+        """
+        speech = _speech()
+        audio = speech.RecognitionAudio(content=audio_data)
+        
+        config = speech.RecognitionConfig(
+            encoding=speech.RecognitionConfig.AudioEncoding.WEBM_OPUS,
+            language_code=VoiceConfig.TELUGU_GOOGLE,
+            enable_automatic_punctuation=True,
+            model="default",
+            use_enhanced=True,
+            speech_contexts=_speech_contexts(hints)
+        )
+        
+        with span("speech.recognize", {"audio.bytes": len(audio_data), "audio.encoding": "WEBM_OPUS",
+                                       "stt.hint_sets": len(hints)}), \
+                self.stt_pool.client() as client:
+            response = client.recognize(config=config, audio=audio)
+        
+        if not response.results:
+            return "", 0.0
+        
+        alternative = response.results[0].alternatives[0]
+        return alternative.transcript, alternative.confidence
+    
     def text_to_speech(self, text: str, output_file: str = "output.wav") -> bool:
         """
         Convert Telugu text to speech
@@ -89,6 +402,7 @@ class GoogleSpeechService:
         Returns:
             Success status
         """
+        texttospeech = _texttospeech()
         synthesis_input = texttospeech.SynthesisInput(text=text)
         
         voice = texttospeech.VoiceSelectionParams(
@@ -105,11 +419,12 @@ class GoogleSpeechService:
         )
         
         try:
-            response = self.tts_client.synthesize_speech(
-                input=synthesis_input,
-                voice=voice,
-                audio_config=audio_config
-            )
+            with span("speech.synthesize", {"tts.chars": len(text)}), self.tts_pool.client() as client:
+                response = client.synthesize_speech(
+                    input=synthesis_input,
+                    voice=voice,
+                    audio_config=audio_config
+                )
             
             # Save audio to file
             with open(output_file, "wb") as out:
@@ -118,21 +433,22 @@ class GoogleSpeechService:
             return True
             
         except Exception as e:
-            print(f"TTS Error: {e}")
+            logger.error("TTS error: %s", e)
             return False
 
 
 class VoicePipeline:
     """Complete voice pipeline using Google Cloud (Web Service Version)"""
     
-    def __init__(self, credentials_path: str):
+    def __init__(self, credentials_path: str, speech_service=None):
         """
         Initialize voice pipeline
         
         Args:
             credentials_path: Path to Google Cloud credentials JSON
+            speech_service: Optional replacement service (e.g. local fakes for load tests)
         """
-        self.speech_service = GoogleSpeechService(credentials_path=credentials_path)
+        self.speech_service = speech_service or GoogleSpeechService(credentials_path=credentials_path)
     
     def speak(self, text: str, output_file: str = "response.wav") -> bool:
         """
@@ -145,4 +461,10 @@ class VoicePipeline:
         Returns:
             Success status
         """
-        return self.speech_service.text_to_speech(text, output_file)
\ No newline at end of file
+        return self.speech_service.text_to_speech(text, output_file)
+    
+    def close(self):
+        """Release the speech clients (the local fakes hold none)"""
+        close = getattr(self.speech_service, "close", None)
+        if close:
+            close()
\ No newline at end of file